@@ -0,0 +1,249 @@
+"""
+Admission control for the API.
+AdmissionControlMiddleware sorts requests into route groups and, before
+they reach a route handler:
+
+- applies a per-client token bucket for the group, answering 429 with
+  Retry-After when the client is over its rate;
+- admits at most a fixed number of concurrent requests per group, queues
+  a bounded number more, and answers 503 with Retry-After when the queue
+  is full or a queued request waited too long.
+
+Groups are "crud" (single-recipe reads and writes, listing), "search"
+(search, facets, batch reads, shopping lists, meal plans) and "ai" (Gemini
+calls), so a burst of expensive searches or AI calls is shed without
+slowing cheap reads. Health, metrics, admin and docs routes are never
+limited. Clients are keyed by a configured API key (X-API-Key) or by IP.
+"""
+from typing import Deque, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import math
+import time
+
+import orjson
+
+from metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_REJECTIONS
+
+API_KEY_HEADER = b"x-api-key"
+FORWARDED_FOR_HEADER = b"x-forwarded-for"
+
+GROUPS = ("crud", "search", "ai")
+
+# Expensive /api/recipes endpoints; everything else under it is "crud"
+SEARCH_PATHS = {
+    "/api/recipes/search", "/api/recipes/facets", "/api/recipes/batch-get", "/api/recipes/shopping-list"
+}
+
+
+# Long-lived connections, capped by the endpoint itself rather than holding a slot
+UNLIMITED_PATHS = {"/api/recipes/stream"}
+
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """Route group for a request, or None if it is never limited."""
+    if method == "OPTIONS":
+        return None
+    path = path.rstrip("/")
+    if path in UNLIMITED_PATHS:
+        return None
+    if path.startswith("/api/ai/"):
+        return None if path == "/api/ai/health" else "ai"
+    if path.startswith("/api/plans/") or path in SEARCH_PATHS:
+        return "search"
+    if path == "/api/recipes" or path.startswith("/api/recipes/"):
+        return "crud"
+    return None
+
+
+def parse_group_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "group=a:b,..." (e.g. "search=16:32,ai=4:8") into {group: (a, b)}."""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        group, _, values = item.partition("=")
+        first, _, second = values.partition(":")
+        group = group.strip()
+        if group not in GROUPS:
+            raise ValueError(f"Unknown route group {group!r}, expected one of {GROUPS}")
+        limits[group] = (float(first), float(second or 0))
+    return limits
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` requests in progress, plus up to `queue_size` waiting
+    their turn (first come, first served) for at most queue_timeout_s.
+    """
+    
+    def __init__(self, group: str, limit: int, queue_size: int, queue_timeout_s: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout_s = queue_timeout_s
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._in_flight = ADMISSION_IN_FLIGHT.labels(group)
+        self._queued = ADMISSION_QUEUED.labels(group)
+    
+    async def acquire(self) -> Optional[str]:
+        """Take a slot; returns None when admitted, else why it was rejected."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._in_flight.inc()
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queued.inc()
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout_s)
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot we were just handed
+            if not self._abandon(waiter):
+                self.release()
+            raise
+        finally:
+            self._queued.dec()
+        if not self._abandon(waiter):
+            return None
+        return "queue_timeout"
+    
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """Leave the queue; False if release() already handed this waiter a slot."""
+        if waiter.done():
+            return False
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        return True
+    
+    def release(self) -> None:
+        """Hand the slot to the next waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+        self._in_flight.dec()
+
+
+class TokenBucketLimiter:
+    """
+    Per-client token buckets: `rate` requests per second with bursts of
+    up to `burst`. Buckets for the least recently seen clients are dropped
+    beyond max_clients, which at worst resets their bucket to full.
+    """
+    
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_clients = max_clients
+        # client -> [tokens, last refill time]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+    
+    def acquire(self, client: str) -> float:
+        """Take a token; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [self.burst, now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying per-group rate and concurrency limits."""
+    
+    def __init__(
+        self,
+        app,
+        concurrency_limits: Dict[str, Tuple[float, float]],
+        rate_limits: Dict[str, Tuple[float, float]],
+        queue_timeout_s: float = 2.0,
+        retry_after_s: int = 1,
+        api_keys: Tuple[str, ...] = (),
+        trust_forwarded_for: bool = False
+    ):
+        self.app = app
+        self.limiters = {
+            group: ConcurrencyLimiter(group, int(limit), int(queue_size), queue_timeout_s)
+            for group, (limit, queue_size) in concurrency_limits.items() if limit > 0
+        }
+        self.rate_limiters = {
+            group: TokenBucketLimiter(rate, burst)
+            for group, (rate, burst) in rate_limits.items() if rate > 0
+        }
+        self.retry_after_s = retry_after_s
+        self.api_keys = {key.encode() for key in api_keys}
+        self.trust_forwarded_for = trust_forwarded_for
+        self._rejections = {
+            (group, reason): ADMISSION_REJECTIONS.labels(group, reason)
+            for group in GROUPS for reason in ("rate_limited", "queue_full", "queue_timeout")
+        }
+    
+    def _client(self, scope) -> str:
+        forwarded_for = None
+        for name, value in scope["headers"]:
+            if name == API_KEY_HEADER and value in self.api_keys:
+                return "key:" + value.decode()
+            if name == FORWARDED_FOR_HEADER:
+                forwarded_for = value
+        if forwarded_for and self.trust_forwarded_for:
+            return "ip:" + forwarded_for.split(b",")[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+    
+    async def __call__(self, scope, receive, send):
+        group = route_group(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+        
+        rate_limiter = self.rate_limiters.get(group)
+        if rate_limiter is not None:
+            wait_s = rate_limiter.acquire(self._client(scope))
+            if wait_s:
+                self._rejections[(group, "rate_limited")].inc()
+                await self._reject(send, 429, "Rate limit exceeded", math.ceil(wait_s))
+                return
+        
+        limiter = self.limiters.get(group)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        
+        reason = await limiter.acquire()
+        if reason is not None:
+            self._rejections[(group, reason)].inc()
+            await self._reject(send, 503, "Server busy, please retry", self.retry_after_s)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+    
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after_s: int) -> None:
+        body = orjson.dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after_s).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
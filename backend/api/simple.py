@@ -9,11 +9,16 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+# A serverless function can't hold an event stream open, so clients poll instead
+os.environ.setdefault("RECIPE_STREAM_ENABLED", "false")
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from config import settings
+
 # Import routes
-from routes import recipe_routes, ai_routes
+from routes import recipe_routes, ai_routes, plan_routes, batch_routes
 
 # Create app
 app = FastAPI(title="Recipe Explorer API", version="1.0.0")
@@ -30,6 +35,8 @@ app.add_middleware(
 # Include routers
 app.include_router(recipe_routes.router)
 app.include_router(ai_routes.router)
+app.include_router(plan_routes.router)
+app.include_router(batch_routes.router)
 
 @app.get("/")
 async def root():
@@ -41,4 +48,4 @@ async def health():
 
 @app.get("/api/health")
 async def api_health():
-    return {"status": "healthy", "version": "1.0.0"}
+    return {"status": "healthy", "version": "1.0.0", "streaming": settings.recipe_stream_enabled}
@@ -0,0 +1,117 @@
+"""
+Benchmark: per-request logging overhead on POST /api/recipes/search.
+Runs the same searches through the app (in-memory store, ASGI transport)
+with logging off, with the old synchronous basicConfig-style text handler,
+and with the queued JSON pipeline from logging_config (unsampled and with
+the recipe service's info lines sampled at 10%).
+
+Log lines go to a sink that sleeps on every write, standing in for a
+stdout pipe that a slow log collector drains; --write-latency-us 0 writes
+to an in-memory buffer instead.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 2000] [--write-latency-us 200]
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import statistics
+import sys
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ["METRICS_ENABLED"] = "false"
+
+from httpx import AsyncClient
+
+from benchmarks.synthetic import generate_recipes, CUISINES
+from database import MemoryStore
+from logging_config import setup_logging, shutdown_logging
+from main import app
+
+
+class SlowSink(io.TextIOBase):
+    """Text stream whose writes take a fixed time, like a backed-up pipe."""
+    
+    def __init__(self, write_latency_s: float):
+        self.write_latency_s = write_latency_s
+        self.lines = 0
+    
+    def write(self, text: str) -> int:
+        if self.write_latency_s:
+            time.sleep(self.write_latency_s)
+        self.lines += text.count("\n")
+        return len(text)
+
+
+MODES = {
+    "logging off": None,
+    "sync text (basicConfig)": dict(log_format="text", use_queue=False),
+    "queued json": dict(log_format="json", use_queue=True),
+    "queued json, 10% sampled": dict(log_format="json", use_queue=True, sample_rates="services.recipe_service=0.1"),
+}
+
+
+# Requests per mode before switching to the next
+BATCH = 100
+
+
+async def run_mode(client: AsyncClient, requests: int) -> list:
+    cuisines = list(CUISINES)
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        response = await client.post("/api/recipes/search", json={"cuisine": cuisines[i % len(cuisines)], "max_prep_time": 30})
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latencies
+
+
+async def main_async(args):
+    store = MemoryStore.get_store()
+    for recipe in generate_recipes(args.recipes):
+        await store.insert(recipe)
+    
+    # Keep the client's own request logs out of the measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = {mode: ([], 0) for mode in MODES}
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        await run_mode(client, 200)  # warm up
+        # Alternate modes in small batches so drift affects them all equally
+        for _ in range(args.requests // BATCH):
+            for mode, options in MODES.items():
+                sink = SlowSink(args.write_latency_us / 1e6)
+                setup_logging(level="WARNING" if options is None else "INFO", stream=sink, **(options or {}))
+                latencies = await run_mode(client, BATCH)
+                shutdown_logging()
+                results[mode][0].extend(latencies)
+                results[mode] = (results[mode][0], results[mode][1] + sink.lines)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Searches per mode")
+    parser.add_argument("--recipes", type=int, default=2000, help="Synthetic catalog size")
+    parser.add_argument("--write-latency-us", type=float, default=200, help="Time each log write blocks")
+    args = parser.parse_args()
+    
+    results = asyncio.run(main_async(args))
+    baseline = statistics.median(results["logging off"][0])
+    
+    print(f"{args.requests} searches per mode, {args.write_latency_us:.0f}us per log write")
+    print(f"  {'mode':<26}{'p50 us':>10}{'p99 us':>10}{'p50 overhead us':>17}{'lines':>8}")
+    for mode, (latencies, lines) in results.items():
+        p50 = statistics.median(latencies)
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f"  {mode:<26}{p50 * 1e6:>10.0f}{p99 * 1e6:>10.0f}{(p50 - baseline) * 1e6:>17.0f}{lines:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: meal plan optimizer over a synthetic catalog.
+Applies the same candidate pruning as MealPlanService (prep-time bound,
+difficulty filter, fastest CANDIDATE_LIMIT recipes) in memory, then reports
+optimizer latency and plan quality against a random feasible baseline.
+
+Usage:
+    python benchmarks/bench_meal_planner.py [--recipes 100000] [--plans 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from benchmarks.synthetic import generate_recipes
+from models import MealPlanRequest, DIFFICULTY_LEVELS
+from services.meal_plan_service import MealPlanOptimizer, CANDIDATE_LIMIT
+
+
+def prune(catalog, request: MealPlanRequest):
+    """In-memory equivalent of MealPlanService._fetch_candidates (single-query case)."""
+    max_prep = None
+    if request.max_total_prep_minutes is not None:
+        max_prep = request.max_total_prep_minutes - (request.recipe_count - 1)
+    levels = DIFFICULTY_LEVELS
+    if request.max_difficulty:
+        levels = levels[:levels.index(request.max_difficulty) + 1]
+    levels = {level for level in levels if request.difficulty_caps.get(level, 1) > 0}
+    matching = [
+        recipe for recipe in catalog
+        if recipe["difficulty"] in levels and (max_prep is None or recipe["prep_time_minutes"] <= max_prep)
+    ]
+    matching.sort(key=lambda recipe: recipe["prep_time_minutes"])
+    return matching[:CANDIDATE_LIMIT]
+
+
+def random_baseline(optimizer: MealPlanOptimizer, rng: random.Random, tries: int = 200):
+    """Best distinct-ingredient count among random plans meeting the constraints."""
+    best = None
+    indices = range(len(optimizer.candidates))
+    for _ in range(tries):
+        plan = rng.sample(indices, optimizer.size)
+        summary = optimizer.score_plan(plan)
+        if summary["feasible"] and (best is None or summary["distinct_ingredients"] < best):
+            best = summary["distinct_ingredients"]
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=100_000, help="Synthetic catalog size")
+    parser.add_argument("--plans", type=int, default=20, help="Number of random constraint sets")
+    parser.add_argument("--budget-ms", type=int, default=300, help="Optimizer latency budget")
+    args = parser.parse_args()
+    
+    print(f"Generating {args.recipes:,} recipes...")
+    catalog = generate_recipes(args.recipes)
+    rng = random.Random(42)
+    
+    latencies, distinct, baseline, feasible, timed_out = [], [], [], 0, 0
+    for _ in range(args.plans):
+        size = rng.randint(3, 14)
+        request = MealPlanRequest(
+            recipe_count=size,
+            max_total_prep_minutes=size * rng.randint(20, 45),
+            min_vegetarian_ratio=rng.choice([0, 0.5, 0.7]),
+            max_per_cuisine=rng.choice([None, 2, 3]),
+            max_difficulty=rng.choice([None, "medium"]),
+            difficulty_caps=rng.choice([{}, {"hard": 1}]),
+            time_budget_ms=args.budget_ms,
+        )
+        
+        # The in-memory scan stands in for the indexed candidate query, so it isn't timed
+        candidates = prune(catalog, request)
+        start = time.perf_counter()
+        optimizer = MealPlanOptimizer(candidates, request)
+        plan, cut_short = optimizer.optimize(start + args.budget_ms / 1000)
+        latencies.append((time.perf_counter() - start) * 1000)
+        
+        summary = optimizer.score_plan(plan)
+        feasible += summary["feasible"]
+        timed_out += cut_short
+        distinct.append(summary["distinct_ingredients"] / size)
+        random_best = random_baseline(optimizer, rng)
+        if random_best is not None:
+            baseline.append(random_best / size)
+    
+    latencies.sort()
+    print(f"Plans: {args.plans}  feasible: {feasible}  hit latency budget: {timed_out}")
+    print(f"Latency ms  p50: {statistics.median(latencies):.1f}  "
+          f"p95: {latencies[int(0.95 * (len(latencies) - 1))]:.1f}  max: {latencies[-1]:.1f}")
+    print(f"Distinct ingredients per recipe  optimizer: {statistics.mean(distinct):.2f}  "
+          f"random feasible: {statistics.mean(baseline) if baseline else float('nan'):.2f}")
+
+
+if __name__ == "__main__":
+    main()
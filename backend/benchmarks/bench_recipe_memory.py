@@ -0,0 +1,85 @@
+"""
+Benchmark: memory per recipe held in process, raw documents vs RecipeRecords.
+Builds a synthetic catalog the way Motor returns it (BSON-decoded, so
+documents share no string objects) and keeps it either as the raw dicts or
+as compact RecipeRecords. Each form is built in a fresh subprocess, and the
+growth in resident memory per recipe is reported. Linux only (reads
+/proc/self/statm); the default size needs a few GB of RAM for the raw form.
+
+Usage:
+    python benchmarks/bench_recipe_memory.py [--recipes 1000000]
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import bson
+
+from benchmarks.synthetic import generate_recipes
+from storage.records import RecipeRecord
+
+FORMS = ("dict", "record")
+BATCH_SIZE = 10_000
+
+
+def resident_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def build(form: str, count: int) -> list:
+    """Keep `count` recipes in memory in the given form."""
+    kept = []
+    for start in range(0, count, BATCH_SIZE):
+        documents = [bson.decode(bson.encode(recipe)) for recipe in generate_recipes(min(BATCH_SIZE, count - start), seed=start)]
+        if form == "record":
+            records = [RecipeRecord.from_dict(document) for document in documents]
+            assert records[0].to_dict() == documents[0]
+            documents = records
+        kept.extend(documents)
+    return kept
+
+
+def measure(form: str, count: int) -> None:
+    """Child process: build one form and print bytes per recipe and build time."""
+    gc.collect()
+    before = resident_bytes()
+    started = time.perf_counter()
+    kept = build(form, count)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    print((resident_bytes() - before) / len(kept), elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=1_000_000, help="Synthetic catalog size")
+    parser.add_argument("--form", choices=FORMS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.form:
+        measure(args.form, args.recipes)
+        return
+    
+    print(f"{args.recipes:,} recipes")
+    results = {}
+    for form in FORMS:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--recipes", str(args.recipes), "--form", form],
+            check=True, capture_output=True, text=True
+        ).stdout.split()
+        results[form] = float(output[0])
+        print(f"  {form:>6}: {results[form]:8,.0f} bytes/recipe  "
+              f"({results[form] * args.recipes / 2 ** 20:,.0f} MiB total, built in {float(output[1]):.1f}s)")
+    print(f"  record/dict: {results['record'] / results['dict']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
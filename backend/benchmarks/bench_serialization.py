@@ -0,0 +1,91 @@
+"""
+Benchmark: serializing a page of recipes for GET /api/recipes/.
+Compares FastAPI's default path (response_model validation + jsonable_encoder
++ stdlib json) with the orjson fast path used by RecipeJSONResponse.
+
+Usage:
+    python benchmarks/bench_serialization.py [--items 100] [--rounds 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+# Allow running from the backend directory or the benchmarks directory
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from models import RecipeResponse
+from responses import encode_recipes
+
+
+def make_recipes(count: int) -> List[dict]:
+    """Build recipe documents shaped like the ones returned by RecipeService."""
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": str(ObjectId()),
+            "name": f"Recipe {i}",
+            "cuisine": ["Indian", "Italian", "Chinese", "Mexican"][i % 4],
+            "is_vegetarian": i % 3 != 0,
+            "prep_time_minutes": 10 + i % 80,
+            "ingredients": ["paneer", "tomato", "cream", "butter", "spices", "onion"],
+            "difficulty": ["easy", "medium", "hard"][i % 3],
+            "instructions": "Step 1: Heat butter in a pan and add onions. " * 12,
+            "tags": ["dinner", "party", "rich"],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def bench_default(recipes: List[dict], adapter: TypeAdapter) -> bytes:
+    """What FastAPI does for response_model=List[RecipeResponse]."""
+    validated = adapter.validate_python(recipes)
+    content = jsonable_encoder(validated, by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def bench_fast(recipes: List[dict], adapter: TypeAdapter) -> bytes:
+    """RecipeJSONResponse path."""
+    return encode_recipes(recipes)
+
+
+def run(fn, recipes: List[dict], rounds: int) -> float:
+    """Return items serialized per second."""
+    adapter = TypeAdapter(List[RecipeResponse])
+    fn(recipes, adapter)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(recipes, adapter)
+    elapsed = time.perf_counter() - start
+    return len(recipes) * rounds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100, help="Recipes per page")
+    parser.add_argument("--rounds", type=int, default=200, help="Pages serialized per measurement")
+    args = parser.parse_args()
+    
+    recipes = make_recipes(args.items)
+    before = run(bench_default, recipes, args.rounds)
+    after = run(bench_fast, recipes, args.rounds)
+    
+    print(f"Serializing {args.items}-item pages x {args.rounds}")
+    print(f"  response_model + json : {before:12,.0f} items/sec")
+    print(f"  orjson fast path      : {after:12,.0f} items/sec")
+    print(f"  speedup               : {after / before:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
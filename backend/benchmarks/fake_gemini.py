@@ -0,0 +1,118 @@
+"""
+Local stand-in for the Gemini REST API, for benchmarks.
+Answers generateContent with a canned recipe after a configurable delay and
+fails a configurable share of requests, so AI routes can be load-tested
+without network access or quota. Point the app at it with
+GEMINI_API_ENDPOINT=http://127.0.0.1:<port> and any GEMINI_API_KEY.
+
+Usage:
+    python benchmarks/fake_gemini.py [--port 8765] [--latency-ms 50] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import random
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+CANNED_TEXT = """Recipe: Benchmark Stir-Fry
+
+**Instructions:**
+1. Heat oil in a pan
+2. Add the ingredients and stir-fry for 5 minutes
+3. Season and serve hot
+
+**Prep Time:** 10 minutes | **Cook Time:** 10 minutes | **Difficulty:** Easy"""
+
+
+def create_app(latency_ms: float = 50, jitter_ms: float = 0, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """Build the fake API app; app.state.stats counts served and failed calls."""
+    app = FastAPI(title="Fake Gemini API")
+    rng = random.Random(seed)
+    app.state.stats = {"requests": 0, "errors": 0}
+    
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str):
+        app.state.stats["requests"] += 1
+        delay = latency_ms + (rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0)
+        await asyncio.sleep(max(delay, 0) / 1000)
+        
+        if rng.random() < error_rate:
+            app.state.stats["errors"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"code": 500, "message": "Injected failure", "status": "INTERNAL"}}
+            )
+        
+        return {
+            "candidates": [{
+                "content": {"parts": [{"text": CANNED_TEXT}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {"promptTokenCount": 120, "candidatesTokenCount": 60, "totalTokenCount": 180}
+        }
+    
+    return app
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeGeminiServer:
+    """Runs the fake API with uvicorn on a background thread."""
+    
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 0, error_rate: float = 0.0,
+                 seed: int = 0, port: int = 0):
+        self.app = create_app(latency_ms, jitter_ms, error_rate, seed)
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+    
+    @property
+    def stats(self) -> dict:
+        return dict(self.app.state.stats)
+    
+    def start(self, timeout: float = 10) -> "FakeGeminiServer":
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake Gemini server failed to start")
+            time.sleep(0.01)
+        return self
+    
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+    
+    def __enter__(self) -> "FakeGeminiServer":
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Import-time profiler for cold starts.
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+reports per-module import cost, so cold-start regressions can be traced to
+the import that caused them.
+
+Usage:
+    python benchmarks/import_profile.py [--module main] [--top 25] [--output importtime.json]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Any
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-import budget for `main` (app + routers), in milliseconds
+COLD_IMPORT_BUDGET_MS = 2000
+
+# Heavy SDKs and drivers that must only be imported on first use, never by `import main`
+DEFERRED_MODULES = ["google.generativeai", "google.ai.generativelanguage", "grpc", "motor", "pymongo"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def profile_imports(module: str = "main") -> Dict[str, Any]:
+    """
+    Import `module` in a fresh interpreter and collect per-module import times.
+    
+    Returns {"module", "total_ms", "modules": {name: {"self_ms", "cumulative_ms", "depth"}}}.
+    The first run after a code change also pays for bytecode compilation;
+    run twice when measuring.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = {
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": len(indent) // 2
+        }
+    
+    return {
+        "module": module,
+        "total_ms": modules.get(module, {}).get("cumulative_ms", 0.0),
+        "modules": modules
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Number of slowest imports to print")
+    parser.add_argument("--output", help="Write the full profile to this JSON file")
+    args = parser.parse_args()
+    
+    profile_imports(args.module)  # warm the bytecode cache
+    profile = profile_imports(args.module)
+    
+    print(f"import {args.module}: {profile['total_ms']:.1f} ms (budget {COLD_IMPORT_BUDGET_MS} ms)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    slowest = sorted(profile["modules"].items(), key=lambda item: item[1]["cumulative_ms"], reverse=True)
+    for name, timing in slowest[:args.top]:
+        print(f"{timing['cumulative_ms']:14.1f} {timing['self_ms']:9.1f}  {name}")
+    
+    loaded = [name for name in DEFERRED_MODULES if name in profile["modules"]]
+    if loaded:
+        print(f"\nWARNING: deferred modules imported at startup: {', '.join(loaded)}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(profile, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Load test: drive every API route at fixed concurrency and record latency.
+
+The app runs on the in-memory store over a synthetic catalog, with AI
+routes calling a local fake Gemini server (benchmarks/fake_gemini.py), so
+runs are hermetic and repeatable. Each route is measured through an
+in-process ASGI client and/or a real uvicorn server in a subprocess.
+Throughput and p50/p95/p99 latencies go to a JSON file; pass --compare
+with an earlier results file to flag regressions between commits.
+
+Usage:
+    python benchmarks/load_test.py [--recipes 5000] [--concurrency 16] [--requests 500]
+        [--target asgi|uvicorn|both] [--gemini-latency-ms 50] [--gemini-error-rate 0.05]
+        [--routes search,facets] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import httpx
+
+from benchmarks.fake_gemini import FakeGeminiServer, free_port
+from benchmarks.synthetic import generate_recipes, TAGS
+from storage.memory_store import InMemoryRecipeStore
+
+# (method, path, httpx request kwargs)
+RequestSpec = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class Catalog:
+    """IDs and vocabularies the request generators draw from."""
+    ids: List[str]
+    cuisines: List[str]
+    ingredients: List[str]
+    created_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, Catalog], RequestSpec]
+    ai: bool = False
+
+
+def _search_filters(rng: random.Random, catalog: Catalog) -> Dict[str, Any]:
+    """One or two random filters, as a client would combine them."""
+    filters: Dict[str, Any] = {}
+    for choice in rng.sample(["cuisine", "is_vegetarian", "max_prep_time", "difficulty", "tags", "search_query"], rng.randint(1, 2)):
+        if choice == "cuisine":
+            filters["cuisine"] = rng.choice(catalog.cuisines)
+        elif choice == "is_vegetarian":
+            filters["is_vegetarian"] = rng.random() < 0.5
+        elif choice == "max_prep_time":
+            filters["max_prep_time"] = rng.randint(10, 60)
+        elif choice == "difficulty":
+            filters["difficulty"] = rng.choice(["easy", "medium", "hard"])
+        elif choice == "tags":
+            filters["tags"] = [rng.choice(TAGS)]
+        else:
+            filters["search_query"] = rng.choice(catalog.ingredients[:50])
+    return filters
+
+
+def _new_recipe(rng: random.Random, catalog: Catalog) -> Dict[str, Any]:
+    return {
+        "name": f"Load Test Recipe {rng.randrange(10 ** 9)}",
+        "cuisine": rng.choice(catalog.cuisines),
+        "is_vegetarian": rng.random() < 0.5,
+        "prep_time_minutes": rng.randint(5, 120),
+        "ingredients": rng.sample(catalog.ingredients[:100], 5),
+        "difficulty": rng.choice(["easy", "medium", "hard"]),
+        "instructions": "Step 1: Prepare the ingredients. Step 2: Cook and serve.",
+        "tags": [rng.choice(TAGS)]
+    }
+
+
+def _delete_created(rng: random.Random, catalog: Catalog) -> RequestSpec:
+    # Delete recipes made by the create scenario so the catalog size stays stable
+    recipe_id = catalog.created_ids.pop() if catalog.created_ids else "missing"
+    return "DELETE", f"/api/recipes/{recipe_id}", {}
+
+
+SCENARIOS = [
+    Scenario("GET /api/recipes/", lambda rng, c: (
+        "GET", "/api/recipes/", {"params": {"skip": rng.randrange(max(1, len(c.ids) - 20)), "limit": 20}})),
+    Scenario("GET /api/recipes/count", lambda rng, c: ("GET", "/api/recipes/count", {})),
+    Scenario("GET /api/recipes/facets", lambda rng, c: (
+        "GET", "/api/recipes/facets", {"params": _search_filters(rng, c) if rng.random() < 0.5 else {}})),
+    Scenario("GET /api/recipes/{id}", lambda rng, c: ("GET", f"/api/recipes/{rng.choice(c.ids)}", {})),
+    Scenario("POST /api/recipes/search", lambda rng, c: ("POST", "/api/recipes/search", {"json": _search_filters(rng, c)})),
+    Scenario("POST /api/recipes/batch-get", lambda rng, c: (
+        "POST", "/api/recipes/batch-get", {"json": {"ids": rng.sample(c.ids, 20)}})),
+    Scenario("POST /api/recipes/shopping-list", lambda rng, c: (
+        "POST", "/api/recipes/shopping-list", {"json": {"recipe_ids": rng.sample(c.ids, 7)}})),
+    Scenario("POST /api/plans/generate", lambda rng, c: (
+        "POST", "/api/plans/generate",
+        {"json": {"recipe_count": 5, "max_total_prep_minutes": 150, "min_vegetarian_ratio": 0.4, "time_budget_ms": 50}})),
+    Scenario("POST /api/recipes/", lambda rng, c: ("POST", "/api/recipes/", {"json": _new_recipe(rng, c)})),
+    Scenario("PUT /api/recipes/{id}", lambda rng, c: (
+        "PUT", f"/api/recipes/{rng.choice(c.ids)}", {"json": {"prep_time_minutes": rng.randint(5, 120)}})),
+    Scenario("DELETE /api/recipes/{id}", _delete_created),
+    Scenario("GET /api/ai/health", lambda rng, c: ("GET", "/api/ai/health", {}), ai=True),
+    Scenario("POST /api/ai/suggest-recipe", lambda rng, c: (
+        "POST", "/api/ai/suggest-recipe", {"json": {"ingredients": rng.sample(c.ingredients[:30], 3)}}), ai=True),
+    Scenario("POST /api/ai/simplify-recipe", lambda rng, c: (
+        "POST", "/api/ai/simplify-recipe", {"json": {"recipe_id": rng.choice(c.ids)}}), ai=True),
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+# Rejected by admission control (rate limit, full queue) rather than failed
+SHED_STATUSES = (429, 503)
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": sum(count for code, count in statuses.items() if code not in SHED_STATUSES and (code >= 500 or code == 0)),
+        "shed": sum(count for code, count in statuses.items() if code in SHED_STATUSES),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered), 3) if ordered else 0.0,
+            "p50": round(percentile(ordered, 50), 3),
+            "p95": round(percentile(ordered, 95), 3),
+            "p99": round(percentile(ordered, 99), 3),
+            "max": round(ordered[-1], 3) if ordered else 0.0,
+        }
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    catalog: Catalog,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int
+) -> Dict[str, Any]:
+    """Send `requests` requests with `concurrency` workers and summarize them."""
+    rng = random.Random(f"{seed}:{scenario.name}")
+    for _ in range(warmup):
+        method, path, kwargs = scenario.build(rng, catalog)
+        await client.request(method, path, **kwargs)
+    
+    specs = [scenario.build(rng, catalog) for _ in range(requests)]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    
+    async def worker():
+        while specs:
+            method, path, kwargs = specs.pop()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                code = response.status_code
+                if scenario.name == "POST /api/recipes/" and code == 201:
+                    catalog.created_ids.append(response.json()["_id"])
+            except httpx.HTTPError:
+                code = 0
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[code] += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+async def run_target(client: httpx.AsyncClient, catalog: Catalog, args, scenarios: List[Scenario]) -> Dict[str, Any]:
+    results = {}
+    for scenario in scenarios:
+        requests = args.ai_requests if scenario.ai else args.requests
+        result = await run_scenario(client, scenario, catalog, requests, args.concurrency, args.warmup, args.seed)
+        latency = result["latency_ms"]
+        print(f"  {scenario.name:34} {result['throughput_rps']:9.1f} req/s  "
+              f"p50 {latency['p50']:8.2f}  p95 {latency['p95']:8.2f}  p99 {latency['p99']:8.2f} ms  "
+              f"errors {result['errors']}  shed {result['shed']}")
+        results[scenario.name] = result
+    return results
+
+
+async def bench_asgi(recipes: List[Dict], catalog: Catalog, gemini_url: str, args, scenarios: List[Scenario]) -> Dict[str, Any]:
+    """Measure through httpx's ASGI transport, in this process."""
+    from config import settings
+    from database import MemoryStore
+    from services.ai_service import AIService, ai_cache
+    
+    settings.storage_backend = "memory"
+    settings.read_only = False
+    settings.gemini_api_key = "benchmark-key"
+    settings.gemini_api_endpoint = gemini_url
+    MemoryStore.store = InMemoryRecipeStore(recipes)
+    AIService._model = None
+    AIService._model_failed = False
+    # Measure model calls, not cached answers
+    ai_cache.ttl_s = 0
+    
+    from main import app
+    # The app logs every request, and every injected Gemini failure, in this process
+    logging.getLogger().setLevel(logging.CRITICAL)
+    
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        return await run_target(client, catalog, args, scenarios)
+
+
+async def bench_uvicorn(recipes: List[Dict], catalog: Catalog, gemini_url: str, args, scenarios: List[Scenario]) -> Dict[str, Any]:
+    """Measure against `uvicorn main:app` in a subprocess, over real sockets."""
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "catalog.json")
+        InMemoryRecipeStore(recipes).save_snapshot(snapshot_path)
+        port = free_port()
+        env = {
+            **os.environ,
+            "STORAGE_BACKEND": "memory",
+            "MEMORY_SNAPSHOT_PATH": snapshot_path,
+            "READ_ONLY": "false",
+            "GEMINI_API_KEY": "benchmark-key",
+            "GEMINI_API_ENDPOINT": gemini_url,
+            "AI_CACHE_TTL_S": "0",
+        }
+        log_path = os.path.join(tmp, "server.log")
+        with open(log_path, "wb") as log:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                 "--log-level", "warning", "--no-access-log"],
+                cwd=parent_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await _wait_until_ready(client, server, log_path)
+                return await run_target(client, catalog, args, scenarios)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+async def _wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen, log_path: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            break
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    with open(log_path, "r", errors="replace") as log:
+        raise RuntimeError(f"uvicorn did not start:\n{log.read()[-2000:]}")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Describe routes whose throughput fell or p95 rose by more than threshold."""
+    regressions = []
+    for target, routes in results["targets"].items():
+        for route, current in routes.items():
+            previous = baseline.get("targets", {}).get(target, {}).get(route)
+            if not previous:
+                continue
+            old_rps, new_rps = previous["throughput_rps"], current["throughput_rps"]
+            old_p95, new_p95 = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+            if old_rps and new_rps < old_rps * (1 - threshold):
+                regressions.append(f"{target} {route}: throughput {old_rps:.1f} -> {new_rps:.1f} req/s")
+            if old_p95 and new_p95 > old_p95 * (1 + threshold):
+                regressions.append(f"{target} {route}: p95 {old_p95:.2f} -> {new_p95:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=5000, help="Synthetic catalog size")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the catalog and request mix")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per route")
+    parser.add_argument("--ai-requests", type=int, default=50, help="Measured requests per AI route")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per route")
+    parser.add_argument("--target", choices=["asgi", "uvicorn", "both"], default="both")
+    parser.add_argument("--routes", help="Comma-separated substrings; only matching routes run")
+    parser.add_argument("--gemini-latency-ms", type=float, default=50, help="Fake Gemini response delay")
+    parser.add_argument("--gemini-jitter-ms", type=float, default=10, help="Uniform +/- jitter on the delay")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.05, help="Share of fake Gemini calls that fail")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file to write")
+    parser.add_argument("--compare", help="Earlier results file to check for regressions")
+    parser.add_argument("--regression-threshold", type=float, default=0.15, help="Relative change flagged as regression")
+    args = parser.parse_args()
+    
+    scenarios = SCENARIOS
+    if args.routes:
+        wanted = [part.strip() for part in args.routes.split(",") if part.strip()]
+        scenarios = [scenario for scenario in SCENARIOS if any(part in scenario.name for part in wanted)]
+    
+    print(f"Generating {args.recipes:,} recipes (seed {args.seed})...")
+    recipes = generate_recipes(args.recipes, seed=args.seed)
+    ingredient_counts = Counter(ingredient for recipe in recipes for ingredient in recipe["ingredients"])
+    
+    def new_catalog() -> Catalog:
+        return Catalog(
+            ids=[recipe["_id"] for recipe in recipes],
+            cuisines=sorted({recipe["cuisine"] for recipe in recipes}),
+            ingredients=[name for name, _ in ingredient_counts.most_common()]
+        )
+    
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                key: getattr(args, key) for key in [
+                    "recipes", "seed", "concurrency", "requests", "ai_requests", "warmup",
+                    "gemini_latency_ms", "gemini_jitter_ms", "gemini_error_rate"
+                ]
+            }
+        },
+        "targets": {}
+    }
+    
+    with FakeGeminiServer(args.gemini_latency_ms, args.gemini_jitter_ms, args.gemini_error_rate, seed=args.seed) as gemini:
+        if args.target in ("asgi", "both"):
+            print(f"\nIn-process ASGI, concurrency {args.concurrency}")
+            results["targets"]["asgi"] = asyncio.run(bench_asgi(recipes, new_catalog(), gemini.url, args, scenarios))
+        if args.target in ("uvicorn", "both"):
+            print(f"\nuvicorn subprocess, concurrency {args.concurrency}")
+            results["targets"]["uvicorn"] = asyncio.run(bench_uvicorn(recipes, new_catalog(), gemini.url, args, scenarios))
+        results["meta"]["fake_gemini"] = gemini.stats
+    
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.regression_threshold)
+        if regressions:
+            print(f"\nRegressions vs {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
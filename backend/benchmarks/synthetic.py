@@ -0,0 +1,78 @@
+"""
+Synthetic recipe catalogs for benchmarks.
+Generates recipe documents shaped like the ones stored in MongoDB, with
+realistic cuisine/difficulty mixes and Zipf-distributed ingredients.
+"""
+import itertools
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Cuisine -> relative weight in the catalog
+CUISINES = {
+    "Indian": 30, "Italian": 20, "Chinese": 15, "Mexican": 10, "Thai": 8,
+    "Japanese": 6, "French": 5, "Mediterranean": 4, "American": 2,
+}
+
+DIFFICULTY_WEIGHTS = {"easy": 5, "medium": 4, "hard": 1}
+
+TAGS = ["dinner", "lunch", "breakfast", "quick", "party", "healthy", "spicy",
+        "simple", "special", "rich", "comfort", "snack", "dessert", "vegan"]
+
+# Common ingredients first; rank drives the Zipf weight
+BASE_INGREDIENTS = [
+    "salt", "onion", "garlic", "oil", "tomato", "spices", "ginger", "butter",
+    "rice", "chili", "pepper", "lemon", "sugar", "cream", "potato", "yogurt",
+    "cumin", "coriander", "flour", "egg", "milk", "cheese", "chicken", "paneer",
+    "pasta", "soy sauce", "olive oil", "basil", "carrot", "peas", "beans",
+    "spinach", "mushroom", "bell pepper", "cauliflower", "lentils", "coconut milk",
+    "tofu", "fish", "mutton", "noodles", "vinegar", "honey", "parsley", "mint",
+]
+
+
+def ingredient_vocabulary(size: int) -> List[str]:
+    """Return `size` ingredient names, real ones first, padded with synthetic names."""
+    extra = (f"ingredient {i}" for i in itertools.count(1))
+    return (BASE_INGREDIENTS + list(itertools.islice(extra, max(0, size - len(BASE_INGREDIENTS)))))[:size]
+
+
+def generate_recipes(
+    count: int,
+    seed: int = 0,
+    vocabulary_size: int = 2000,
+    zipf_exponent: float = 1.1,
+    start: Optional[datetime] = None
+) -> List[Dict]:
+    """Generate `count` recipe documents deterministically from `seed`."""
+    rng = random.Random(seed)
+    vocabulary = ingredient_vocabulary(vocabulary_size)
+    ingredient_weights = list(itertools.accumulate(1 / (rank ** zipf_exponent) for rank in range(1, len(vocabulary) + 1)))
+    cuisines, cuisine_weights = zip(*CUISINES.items())
+    difficulties, difficulty_weights = zip(*DIFFICULTY_WEIGHTS.items())
+    start = start or datetime(2025, 1, 1)
+    
+    recipes = []
+    for i in range(count):
+        ingredients = set()
+        target = rng.randint(3, 12)
+        while len(ingredients) < target:
+            ingredients.add(rng.choices(vocabulary, cum_weights=ingredient_weights)[0])
+        
+        cuisine = rng.choices(cuisines, weights=cuisine_weights)[0]
+        difficulty = rng.choices(difficulties, weights=difficulty_weights)[0]
+        created_at = start + timedelta(minutes=i)
+        steps = " ".join(f"Step {step}: Prepare and cook the {ing}." for step, ing in enumerate(sorted(ingredients), 1))
+        recipes.append({
+            "_id": f"syn_{seed}_{i}",
+            "name": f"{cuisine} Dish {i}",
+            "cuisine": cuisine,
+            "is_vegetarian": rng.random() < 0.55,
+            "prep_time_minutes": max(5, int(rng.lognormvariate(3.4, 0.5))),
+            "ingredients": sorted(ingredients),
+            "difficulty": difficulty,
+            "instructions": steps,
+            "tags": sorted(rng.sample(TAGS, rng.randint(1, 4))),
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    return recipes
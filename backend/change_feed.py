@@ -0,0 +1,323 @@
+"""
+Recipe change feed.
+Delivers create/update/delete events for the recipes collection to
+subscribers in every API process, so process-local state (cached responses,
+in-memory indexes) is invalidated or patched within a second of a write by
+any instance, rather than when a TTL runs out.
+
+Events come from a MongoDB change stream when the deployment has one
+(replica sets and sharded clusters). On a standalone server, MongoRecipeStore
+appends every write to the `recipe_changes` outbox collection instead, and
+each process polls it through its `updated_at` index. Either way every event
+carries a resume token: after an error the feed resumes from the last one,
+and when it can't (the stream history or outbox entries are gone) it
+publishes a "reset" event so subscribers drop everything they hold.
+
+pymongo is imported where it's used, since only the MongoDB store starts
+the feed.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from datetime import timedelta
+import asyncio
+import logging
+import time
+
+from bson import ObjectId
+
+from config import settings
+from metrics import RECIPE_CHANGE_EVENTS
+from storage.base import FINGERPRINT_FIELDS, POPULARITY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Event ops; "reset" means changes may have been missed and carries no recipe
+CHANGE_OPS = ("create", "update", "delete")
+RESET = "reset"
+
+OUTBOX_COLLECTION = "recipe_changes"
+# Outbox entries are removed by a TTL index this long after they're written
+OUTBOX_RETENTION_S = 3600
+# Each poll re-reads entries this far behind the newest one seen, so an entry
+# stamped just before another but committed after it is not skipped
+OUTBOX_OVERLAP_S = 1.0
+OUTBOX_BATCH_SIZE = 1000
+# Longest a change stream getMore waits for new events
+STREAM_MAX_AWAIT_MS = 1000
+# Wait before re-opening the feed after an error
+RETRY_DELAY_S = 1.0
+# Server error code when a resume token is older than the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# Change stream operationType -> event op; any other type (drop, rename,
+# invalidate) means the whole collection changed
+_STREAM_OPS = {"insert": "create", "update": "update", "replace": "update", "delete": "delete"}
+
+# Drops updates that only touch popularity counters or fingerprints: they
+# change nothing clients are sent, and a counter flush or fingerprint
+# backfill would otherwise invalidate every touched recipe on every instance
+_STREAM_PIPELINE = [{"$match": {"$expr": {"$not": [{"$and": [
+    {"$eq": ["$operationType", "update"]},
+    {"$eq": [{"$size": {"$ifNull": ["$updateDescription.removedFields", []]}}, 0]},
+    {"$eq": [{"$size": {"$setDifference": [
+        {"$map": {"input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}}, "in": "$$this.k"}},
+        POPULARITY_FIELDS + FINGERPRINT_FIELDS
+    ]}}, 0]}
+]}]}}}]
+
+
+class ChangeEvent:
+    """
+    A write to one recipe.
+    
+    document is the recipe after the write when the change stream provides
+    it (create/update), else None. token is the feed position just after
+    this event.
+    """
+    
+    __slots__ = ("op", "recipe_id", "document", "token")
+    
+    def __init__(self, op: str, recipe_id: Optional[str], document: Optional[Dict[str, Any]] = None, token: Any = None):
+        self.op = op
+        self.recipe_id = recipe_id
+        self.document = document
+        self.token = token
+    
+    def __repr__(self) -> str:
+        return f"ChangeEvent({self.op!r}, {self.recipe_id!r})"
+
+
+def stream_event(change: Dict[str, Any]) -> ChangeEvent:
+    """Convert a change stream document into an event."""
+    op = _STREAM_OPS.get(change.get("operationType"))
+    if op is None:
+        return ChangeEvent(RESET, None, token=change.get("_id"))
+    document = change.get("fullDocument")
+    if document is not None:
+        document["_id"] = str(document["_id"])
+    return ChangeEvent(op, str(change["documentKey"]["_id"]), document, change.get("_id"))
+
+
+class ChangeOutbox:
+    """The outbox collection: MongoRecipeStore records each write here when there's no change stream."""
+    
+    def __init__(self, collection):
+        self.collection = collection
+    
+    async def ensure_indexes(self) -> None:
+        from pymongo import ASCENDING, IndexModel
+        
+        await self.collection.create_indexes([
+            IndexModel([("updated_at", ASCENDING)], name="updated_at", expireAfterSeconds=OUTBOX_RETENTION_S)
+        ])
+    
+    async def record(self, op: str, recipe_id: str) -> None:
+        """Append a change, stamped with the server's clock so all instances share one order."""
+        await self.collection.update_one(
+            {"_id": ObjectId()},
+            {"$set": {"op": op, "recipe_id": recipe_id}, "$currentDate": {"updated_at": True}},
+            upsert=True
+        )
+    
+    async def latest_token(self) -> Optional[Dict[str, Any]]:
+        """Token for the newest entry, or None when the outbox is empty."""
+        from pymongo import DESCENDING
+        
+        entries = await self.collection.find().sort("updated_at", DESCENDING).limit(1).to_list(length=1)
+        return {"updated_at": entries[0]["updated_at"], "_id": entries[0]["_id"]} if entries else None
+
+
+class ChangeFeed:
+    """
+    Fans recipe change events out to this process's subscribers.
+    
+    start() picks the source on first use ("auto" probes the server for
+    change stream support) and runs the watcher as a task in the running
+    event loop. Subscribers are plain callables run on that loop, so they
+    must not block; one that raises is logged and skipped.
+    """
+    
+    def __init__(self, mode: str = "auto", poll_interval_s: float = 0.25):
+        self.mode = mode
+        self.poll_interval_s = poll_interval_s
+        # "change_stream" or "outbox" once started
+        self.source: Optional[str] = None
+        # Set when the source is "outbox", for MongoRecipeStore to write to
+        self.outbox: Optional[ChangeOutbox] = None
+        self.resume_token: Any = None
+        # Outbox entries inside the overlap window already delivered: _id -> updated_at
+        self._outbox_seen: Dict[ObjectId, Any] = {}
+        self.events_total = 0
+        self.last_event_at: Optional[float] = None
+        self._subscribers: List[Callable[[ChangeEvent], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def subscribe(self, callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """Call callback with every event; returns a function that unsubscribes it."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+    
+    def publish(self, event: ChangeEvent) -> None:
+        """Deliver an event to every subscriber."""
+        self.events_total += 1
+        self.last_event_at = time.time()
+        RECIPE_CHANGE_EVENTS.labels(self.source or "local", event.op).inc()
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Change feed subscriber failed on %r", event)
+    
+    def _get_lock(self) -> asyncio.Lock:
+        """Start lock for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+    
+    async def start(self, db) -> None:
+        """Watch for changes in the running event loop (no-op while already watching)."""
+        if self.mode == "off":
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        
+        async with self._get_lock():
+            if self.source is None:
+                try:
+                    await self._configure(db)
+                except Exception as e:
+                    # Without a feed, caches fall back to their TTLs; the next request retries
+                    logger.warning("Could not start recipe change feed: %s", e)
+                    return
+            if self._task is None or self._task.done() or self._loop is not loop:
+                watch = self._watch_stream if self.source == "change_stream" else self._poll_outbox
+                self._loop = loop
+                self._task = loop.create_task(watch(db))
+                logger.info("Watching recipe changes through the %s", self.source)
+    
+    async def stop(self) -> None:
+        """Stop watching; the resume token is kept for the next start()."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    async def _configure(self, db) -> None:
+        """Choose the source and, for the outbox, start from its newest entry."""
+        source = self.mode
+        if source == "auto":
+            hello = await db.command("hello")
+            supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+            source = "change_stream" if supported else "outbox"
+        if source == "outbox":
+            outbox = ChangeOutbox(db[OUTBOX_COLLECTION])
+            await outbox.ensure_indexes()
+            self.resume_token = await outbox.latest_token()
+            self.outbox = outbox
+        self.source = source
+    
+    def _reset(self) -> None:
+        logger.warning("Recipe changes may have been missed; resetting subscribers")
+        self.publish(ChangeEvent(RESET, None, token=self.resume_token))
+    
+    async def _watch_stream(self, db) -> None:
+        from pymongo.errors import OperationFailure
+        
+        while True:
+            try:
+                async with db.recipes.watch(
+                    _STREAM_PIPELINE,
+                    full_document="updateLookup",
+                    resume_after=self.resume_token,
+                    max_await_time_ms=STREAM_MAX_AWAIT_MS
+                ) as stream:
+                    while stream.alive:
+                        change = await stream.try_next()
+                        # Advances on empty batches too, so a reconnect doesn't replay old events
+                        self.resume_token = stream.resume_token
+                        if change is None:
+                            continue
+                        event = stream_event(change)
+                        if event.op == RESET:
+                            self.resume_token = None
+                            self._reset()
+                            break
+                        self.publish(event)
+                continue
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    self.resume_token = None
+                    self._reset()
+                logger.warning("Recipe change stream failed, retrying: %s", e)
+            except Exception as e:
+                logger.warning("Recipe change stream failed, retrying: %s", e)
+            await asyncio.sleep(RETRY_DELAY_S)
+    
+    async def _poll_outbox(self, db) -> None:
+        from pymongo import ASCENDING
+        
+        collection = self.outbox.collection
+        seen = self._outbox_seen
+        last_polled = time.monotonic()
+        while True:
+            entries = []
+            try:
+                if time.monotonic() - last_polled > OUTBOX_RETENTION_S - OUTBOX_OVERLAP_S:
+                    # Entries written while we weren't polling may have expired
+                    self.resume_token = await self.outbox.latest_token()
+                    seen.clear()
+                    self._reset()
+                
+                query: Dict[str, Any] = {}
+                if self.resume_token is not None:
+                    since = self.resume_token["updated_at"] - timedelta(seconds=OUTBOX_OVERLAP_S)
+                    query["updated_at"] = {"$gte": since}
+                    for entry_id in [entry_id for entry_id, updated_at in seen.items() if updated_at < since]:
+                        del seen[entry_id]
+                    if seen:
+                        query["_id"] = {"$nin": list(seen)}
+                entries = await collection.find(query).sort("updated_at", ASCENDING).limit(OUTBOX_BATCH_SIZE).to_list(
+                    length=OUTBOX_BATCH_SIZE
+                )
+                last_polled = time.monotonic()
+                
+                for entry in entries:
+                    seen[entry["_id"]] = entry["updated_at"]
+                    if self.resume_token is None or entry["updated_at"] >= self.resume_token["updated_at"]:
+                        self.resume_token = {"updated_at": entry["updated_at"], "_id": entry["_id"]}
+                    self.publish(ChangeEvent(entry["op"], entry["recipe_id"], token=self.resume_token))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Recipe change outbox poll failed, retrying: %s", e)
+                await asyncio.sleep(RETRY_DELAY_S)
+                continue
+            # A full batch means there's more waiting
+            if len(entries) < OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(self.poll_interval_s)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Feed status for this process."""
+        return {
+            "mode": self.mode,
+            "source": self.source,
+            "running": self._task is not None and not self._task.done(),
+            "subscribers": len(self._subscribers),
+            "events_total": self.events_total,
+            "last_event_at": self.last_event_at,
+            "resume_token": str(self.resume_token) if self.resume_token is not None else None
+        }
+
+
+# Process-wide feed, started by database.get_recipe_store() for MongoDB storage
+change_feed = ChangeFeed(settings.change_feed, settings.change_feed_poll_interval_ms / 1000)
@@ -0,0 +1,180 @@
+"""
+HTTP response compression.
+CompressionMiddleware gzip- or brotli-encodes JSON and text responses
+above a minimum size, choosing the encoding from the request's
+Accept-Encoding. Responses that already carry a Content-Encoding (e.g.
+pre-compressed cache entries from response_cache) pass through untouched.
+
+Brotli is used when the optional `brotli` package is installed; gzip
+always works.
+"""
+from typing import Optional, Tuple
+import zlib
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (b"application/json", b"application/x-ndjson", b"text/")
+# Long-lived event streams: a compressor per idle connection costs far more
+# memory than compressing their small events saves
+UNCOMPRESSED_TYPES = (b"text/event-stream",)
+
+# Status codes whose responses have no body to compress
+_NO_BODY_STATUSES = {204, 304}
+
+
+def negotiate_encoding(accept_encoding: Optional[str], encodings: Tuple[str, ...] = ENCODINGS) -> Optional[str]:
+    """
+    Best supported encoding the client accepts, or None for identity.
+    
+    Honours q-values (q=0 refuses an encoding) and "*"; on a tie the
+    order of `encodings` decides, so brotli wins over gzip.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str,
+             gzip_level: int = settings.compression_gzip_level,
+             brotli_quality: int = settings.compression_brotli_quality) -> bytes:
+    """Compress a whole body with "gzip" or "br"."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class _StreamCompressor:
+    """Incremental compressor for streamed bodies; each chunk is flushed."""
+    
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if last else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON/text responses of at least minimum_size bytes.
+    
+    Whole responses are compressed in one go; streamed responses (e.g.
+    NDJSON shopping lists) are compressed chunk by chunk and flushed so
+    lines still arrive as they are produced.
+    """
+    
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        stream: Optional[_StreamCompressor] = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start_message, stream, passthrough
+            if passthrough:
+                await send(message)
+                return
+            
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = b""
+                for name, value in headers:
+                    if name == b"content-encoding":
+                        passthrough = True
+                    elif name == b"content-type":
+                        content_type = value
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+                if passthrough or message["status"] in _NO_BODY_STATUSES or not compressible:
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+            
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            
+            if stream is not None:
+                await send({"type": "http.response.body", "body": stream.chunk(body, not more_body), "more_body": more_body})
+                return
+            
+            headers = [(name, value) for name, value in start_message.get("headers", []) if name != b"content-length"]
+            headers.append((b"vary", b"Accept-Encoding"))
+            
+            if not more_body:
+                if len(body) < self.minimum_size:
+                    start_message["headers"] = list(start_message.get("headers", [])) + [(b"vary", b"Accept-Encoding")]
+                    await send(start_message)
+                    await send(message)
+                    return
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(body)).encode())]
+                start_message["headers"] = headers
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body})
+                return
+            
+            # Streamed response: length unknown up front
+            stream = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+            headers.append((b"content-encoding", encoding.encode()))
+            start_message["headers"] = headers
+            await send(start_message)
+            await send({"type": "http.response.body", "body": stream.chunk(body, False), "more_body": True})
+        
+        await self.app(scope, receive, send_compressed)
@@ -14,14 +14,141 @@ class Settings(BaseSettings):
     mongodb_url: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     database_name: str = os.getenv("DATABASE_NAME", "recipe_explorer")
     
+    # MongoDB connection pool (one pool per process, reused across warm invocations)
+    mongodb_max_pool_size: int = 20
+    mongodb_min_pool_size: int = 0
+    mongodb_max_idle_time_ms: int = 60000
+    mongodb_server_selection_timeout_ms: int = 5000
+    mongodb_connect_timeout_ms: int = 5000
+    mongodb_wait_queue_timeout_ms: Optional[int] = 2000
+    
+    # Recipe storage: "mongo", or "memory" to serve recipes from process memory
+    # (loaded from memory_snapshot_path when set) without a database, or
+    # "columnar" to serve a read-only columnar snapshot (export_snapshot.py
+    # --format columnar) mapped from columnar_snapshot_path and shared by all
+    # workers; it is re-checked every columnar_refresh_interval_s (0 = never)
+    storage_backend: str = "mongo"
+    memory_snapshot_path: Optional[str] = None
+    columnar_snapshot_path: Optional[str] = None
+    columnar_refresh_interval_s: float = 5
+    # Reject create/update/delete, e.g. for edge deployments serving a snapshot
+    read_only: bool = False
+    # Recipe change feed (mongo storage): writes by any instance invalidate every
+    # process's cached responses within a second. "auto" uses a change stream on
+    # replica sets and sharded clusters, else the recipe_changes outbox polled
+    # every change_feed_poll_interval_ms; "change_stream"/"outbox" force one and
+    # "off" leaves caches to their TTLs. Use one setting for all instances.
+    change_feed: str = "auto"
+    change_feed_poll_interval_ms: int = 250
+    # GET /api/recipes/stream (Server-Sent Events): open connections per process,
+    # and events queued per client before it is told to resync instead
+    recipe_stream_max_clients: int = 10000
+    recipe_stream_queue_size: int = 64
+    # Off for serverless functions (api/simple.py), which can't hold a stream
+    # open; clients only subscribe when GET /api/health reports "streaming"
+    recipe_stream_enabled: bool = True
+    # Recipe view and simplification counters are summed in process memory and
+    # written every popularity_flush_interval_s as one bulk update (0 = don't
+    # count); a crash loses at most one interval of hits. Past
+    # popularity_max_pending recipes, hits on further recipes are dropped until
+    # the next flush. ?sort=trending ranks by hits decayed with this half-life.
+    popularity_flush_interval_s: float = 10
+    popularity_max_pending: int = 10000
+    trending_half_life_hours: float = 24
+    # New recipes at least near_duplicate_threshold similar (MinHash estimate
+    # over ingredients and instruction wording) to an existing one are
+    # "reject"ed with 409, "merge"d into it (new tags added, existing recipe
+    # returned) or created anyway ("off"). Fingerprints are stored either way.
+    near_duplicate_mode: str = "off"
+    near_duplicate_threshold: float = 0.7
+    
     # Google Gemini API Configuration (Free tier)
     # Get your free API key from: https://makersuite.google.com/app/apikey
     gemini_api_key: Optional[str] = os.getenv("GEMINI_API_KEY")
+    # Override the Gemini API host (REST transport), e.g. a proxy or the benchmark fake server
+    gemini_api_endpoint: Optional[str] = None
+    # Prompts: "compact" or "verbose" templates, optionally replaced per feature
+    # from a JSON file ({"suggest": "...{ingredients}..."}); recipe instructions
+    # beyond ai_simplify_instruction_budget tokens are cut before being sent
+    # (0 = never). Generation limits per feature; Gemini 2.5 counts thinking
+    # toward max output tokens, so keep them well above the answer length.
+    ai_prompt_style: str = "compact"
+    ai_prompt_templates_path: Optional[str] = None
+    ai_simplify_instruction_budget: int = 1000
+    ai_suggest_max_output_tokens: int = 1024
+    ai_simplify_max_output_tokens: int = 1536
+    ai_suggest_temperature: Optional[float] = None
+    ai_simplify_temperature: Optional[float] = None
     
     # Application Settings
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     
+    # Response compression (gzip, or brotli when installed) for JSON/text bodies
+    # of at least compression_minimum_size bytes; higher levels trade CPU for bytes
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    
+    # Cached recipe detail and facet responses (kept with their compressed forms)
+    response_cache_ttl_s: float = 30
+    response_cache_size: int = 1024
+    # Successful Gemini answers, cached by normalized request
+    ai_cache_ttl_s: float = 3600
+    ai_cache_size: int = 1024
+    # Recipe suggestions for an ingredient set at least this similar (Jaccard)
+    # to an already answered one reuse its answer; 1 = identical sets only
+    ai_similarity_threshold: float = 0.75
+    # SQLite file shared by all workers on the host (local disk or /dev/shm):
+    # when set, AI answers and response bodies are cached there, up to
+    # shared_cache_size entries per cache, instead of once per worker
+    shared_cache_path: Optional[str] = None
+    shared_cache_size: int = 10000
+    
+    # Admission control per route group (crud, search, ai): "group=limit:queue"
+    # caps concurrent requests and queued ones (503 + Retry-After beyond that),
+    # and "group=rate:burst" rate-limits each client (429 + Retry-After).
+    # Clients are keyed by X-API-Key when it is one of api_keys, else by IP.
+    admission_control_enabled: bool = True
+    concurrency_limits: str = "crud=64:128,search=16:32,ai=4:8"
+    admission_queue_timeout_ms: int = 2000
+    admission_retry_after_s: int = 1
+    rate_limits: str = ""
+    api_keys: str = ""
+    # Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+    trust_forwarded_for: bool = False
+    
+    # Logging: "json" or "text" lines on stdout, written by a background thread
+    # unless log_async is off; log_sample_rates keeps a share of info lines per
+    # logger, e.g. "services.recipe_service=0.1,services.ai_service=0.5"
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_async: bool = True
+    log_queue_size: int = 10000
+    log_sample_rates: str = ""
+    
+    # Expose Prometheus metrics at /metrics and record per-request metrics
+    metrics_enabled: bool = True
+    
+    # Slow-query log: searches slower than the threshold get their explain()
+    # plan captured (at most once per filter shape per interval)
+    slow_query_threshold_ms: float = 100
+    slow_query_log_size: int = 100
+    slow_query_explain_interval_s: float = 60
+    
+    # Per-request profiling: requests with X-Profile-Token equal to profiling_token,
+    # plus a random profile_sample_rate share of all requests, are profiled and
+    # listed at /api/admin/profiles (saved under the temp dir unless profile_dir is set)
+    profiling_token: Optional[str] = None
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 5
+    profile_dir: Optional[str] = None
+    profile_max_files: int = 50
+    
+    # Token required in the X-Admin-Token header for /api/admin routes (disabled when unset)
+    admin_token: Optional[str] = None
+    
     # CORS Settings
     cors_origins: str = "*"
     
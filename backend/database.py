@@ -1,54 +1,214 @@
 """
 Database connection and operations module.
 Handles MongoDB connection and provides database instance.
+
+One client (and so one connection pool) is created per process and reused
+across requests and warm serverless invocations. Pool sizes and timeouts
+come from Settings so they can be tuned against the cluster's connection
+limit: a deployment's worst case is max_pool_size x concurrent instances.
+
+Motor and pymongo are imported when the first client is created, so
+processes serving the memory or columnar store never load them (they are
+a large share of a cold start).
 """
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import ConnectionFailure
+from fastapi import HTTPException, status
 from config import settings
+from change_feed import change_feed
+from response_cache import recipe_cache, facets_cache
+from storage.base import RecipeStore
+from storage.memory_store import InMemoryRecipeStore
+from typing import Optional, Dict, Any
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Secondary indexes on the recipes collection: (keys, name), 1 ascending and -1 descending
+RECIPE_INDEXES = [
+    ([("prep_time_minutes", 1)], "prep_time"),
+    ([("is_vegetarian", 1), ("prep_time_minutes", 1)], "vegetarian_prep_time"),
+    ([("difficulty", 1), ("prep_time_minutes", 1)], "difficulty_prep_time"),
+    ([("trending_score", -1), ("_id", 1)], "trending"),
+    ([("lsh_bands", 1)], "lsh_bands"),
+]
+
 
 class Database:
     """MongoDB database manager."""
     
-    client: AsyncIOMotorClient = None
+    client: Any = None
+    # mongo_monitoring listeners, created with the first client
+    pool_stats: Any = None
+    command_metrics: Any = None
+    _lock: Optional[asyncio.Lock] = None
+    _lock_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @classmethod
+    def client_options(cls) -> Dict[str, Any]:
+        """Connection pool and timeout options for AsyncIOMotorClient."""
+        options = {
+            "maxPoolSize": settings.mongodb_max_pool_size,
+            "minPoolSize": settings.mongodb_min_pool_size,
+            "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+            "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+            "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        }
+        if settings.mongodb_wait_queue_timeout_ms:
+            options["waitQueueTimeoutMS"] = settings.mongodb_wait_queue_timeout_ms
+        return options
     
     @classmethod
     async def connect_db(cls):
         """Establish connection to MongoDB."""
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo.errors import ConnectionFailure
+        from mongo_monitoring import CommandMetricsListener, PoolStatsListener
+        
+        if cls.pool_stats is None:
+            cls.pool_stats = PoolStatsListener()
+            cls.command_metrics = CommandMetricsListener()
+        client = AsyncIOMotorClient(
+            settings.mongodb_url,
+            event_listeners=[cls.pool_stats, cls.command_metrics],
+            **cls.client_options()
+        )
         try:
-            cls.client = AsyncIOMotorClient(settings.mongodb_url)
             # Verify connection
-            await cls.client.admin.command('ping')
-            logger.info(f"Successfully connected to MongoDB at {settings.mongodb_url}")
+            await client.admin.command('ping')
         except ConnectionFailure as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
+            logger.error("Failed to connect to MongoDB: %s", e)
+            client.close()
             raise
+        
+        cls.client = client
+        logger.info("Successfully connected to MongoDB at %s", settings.mongodb_url)
+        await cls.ensure_indexes()
+    
+    @classmethod
+    async def ensure_indexes(cls):
+        """Create the recipe indexes if they don't exist yet (no-op when they do)."""
+        from pymongo import IndexModel
+        
+        try:
+            db = cls.client[settings.database_name]
+            await db.recipes.create_indexes([IndexModel(keys, name=name) for keys, name in RECIPE_INDEXES])
+        except Exception as e:
+            # Missing indexes only slow queries down; don't fail the connection
+            logger.warning("Could not create recipe indexes: %s", e)
     
     @classmethod
     async def close_db(cls):
         """Close MongoDB connection."""
         if cls.client:
             cls.client.close()
+            cls.client = None
             logger.info("MongoDB connection closed")
     
+    @classmethod
+    def _get_lock(cls) -> asyncio.Lock:
+        """Connection lock for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if cls._lock is None or cls._lock_loop is not loop:
+            cls._lock = asyncio.Lock()
+            cls._lock_loop = loop
+        return cls._lock
+    
     @classmethod
     async def get_database(cls):
-        """Get database instance. Auto-connects if not connected."""
-        if not cls.client:
-            logger.info("Database not connected, connecting now...")
-            try:
-                await cls.connect_db()
-            except Exception as e:
-                logger.error(f"Failed to connect to database: {e}")
-                # Return None or raise based on criticality
-                # For serverless, we'll try to connect on each request
-                cls.client = AsyncIOMotorClient(settings.mongodb_url)
+        """
+        Get database instance. Auto-connects if not connected.
+        
+        Concurrent first requests wait on one connection attempt instead of
+        each building a client. A failed attempt leaves no client behind, so
+        the next request retries.
+        """
+        if cls.client is None:
+            async with cls._get_lock():
+                if cls.client is None:
+                    logger.info("Database not connected, connecting now...")
+                    await cls.connect_db()
         return cls.client[settings.database_name]
+    
+    @classmethod
+    def get_pool_stats(cls) -> Dict[str, Any]:
+        """Connection pool statistics and configuration for this process."""
+        return {
+            "connected": cls.client is not None,
+            "options": cls.client_options(),
+            # No pool counters until a client has been created
+            **(cls.pool_stats.snapshot() if cls.pool_stats is not None else {})
+        }
 
 
 async def get_db():
     """Dependency to get database instance."""
-    return await Database.get_database()
+    from pymongo.errors import ConnectionFailure
+    
+    try:
+        return await Database.get_database()
+    except ConnectionFailure as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Database unavailable: {str(e)}"
+        )
+
+
+class MemoryStore:
+    """Process-wide in-memory recipe store, used when storage_backend is "memory"."""
+    
+    store: Optional[InMemoryRecipeStore] = None
+    
+    @classmethod
+    def get_store(cls) -> InMemoryRecipeStore:
+        """Get the store, loading the configured snapshot on first use."""
+        if cls.store is None:
+            if settings.memory_snapshot_path:
+                cls.store = InMemoryRecipeStore.from_snapshot(
+                    settings.memory_snapshot_path,
+                    read_only=settings.read_only
+                )
+            else:
+                cls.store = InMemoryRecipeStore(read_only=settings.read_only)
+            logger.info("Using in-memory recipe storage (%s recipes)", len(cls.store))
+        return cls.store
+
+
+class ColumnarStore:
+    """Process-wide columnar snapshot store, used when storage_backend is "columnar"."""
+    
+    store = None
+    
+    @classmethod
+    def get_store(cls):
+        """Get the store, mapping the snapshot on first use and swapping in newer ones."""
+        if cls.store is None:
+            if not settings.columnar_snapshot_path:
+                raise RuntimeError("STORAGE_BACKEND=columnar requires COLUMNAR_SNAPSHOT_PATH")
+            # numpy is optional, so only import the columnar store when it's configured
+            from storage.columnar_store import ColumnarRecipeStore
+            cls.store = ColumnarRecipeStore(
+                settings.columnar_snapshot_path,
+                refresh_interval_s=settings.columnar_refresh_interval_s
+            )
+        elif cls.store.refresh():
+            # Any recipe may have changed in the new snapshot
+            recipe_cache.clear()
+            facets_cache.clear()
+        return cls.store
+
+
+async def get_recipe_store() -> RecipeStore:
+    """Dependency to get the configured recipe store."""
+    if settings.storage_backend == "memory":
+        return MemoryStore.get_store()
+    if settings.storage_backend == "columnar":
+        return ColumnarStore.get_store()
+    
+    from storage.mongo_store import MongoRecipeStore
+    
+    db = await get_db()
+    # Started on first use (no lifespan on serverless); a no-op once watching
+    await change_feed.start(db)
+    store = MongoRecipeStore(db, outbox=change_feed.outbox)
+    store.read_only = settings.read_only
+    return store
@@ -0,0 +1,48 @@
+"""
+Export the recipes collection to a snapshot file.
+
+The default JSON snapshot can be served without a database by setting
+STORAGE_BACKEND=memory and MEMORY_SNAPSHOT_PATH to the output file
+(add READ_ONLY=true for edge deployments).
+
+With --format columnar the snapshot is written in the memory-mapped
+columnar format instead, for STORAGE_BACKEND=columnar and
+COLUMNAR_SNAPSHOT_PATH. The file is replaced atomically, so re-running the
+export against a live path makes running workers swap to the new catalog.
+
+Usage:
+    python export_snapshot.py [output_path] [--format json|columnar]
+"""
+import argparse
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from config import settings
+from storage.memory_store import InMemoryRecipeStore
+
+DEFAULT_SNAPSHOT_PATHS = {"json": "recipes_snapshot.json", "columnar": "recipes_snapshot.col"}
+
+
+async def export_snapshot(path: str, snapshot_format: str = "json"):
+    """Copy every recipe from MongoDB into a snapshot file."""
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    db = client[settings.database_name]
+    
+    recipes = await db.recipes.find().to_list(length=None)
+    if snapshot_format == "columnar":
+        from storage.columnar_store import write_columnar_snapshot
+        count = write_columnar_snapshot(recipes, path)
+    else:
+        store = InMemoryRecipeStore(recipes)
+        store.save_snapshot(path)
+        count = len(store)
+    
+    client.close()
+    print(f"Exported {count} recipes to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_path", nargs="?", help="Snapshot file (default depends on --format)")
+    parser.add_argument("--format", choices=sorted(DEFAULT_SNAPSHOT_PATHS), default="json", dest="snapshot_format")
+    args = parser.parse_args()
+    asyncio.run(export_snapshot(args.output_path or DEFAULT_SNAPSHOT_PATHS[args.snapshot_format], args.snapshot_format))
@@ -0,0 +1,297 @@
+"""
+Logging setup for the API.
+Log records are put on a bounded queue by a QueueHandler and written by a
+background listener thread, so request handlers never block on stdout.
+Messages are formatted (and JSON-encoded) on the listener thread, which
+also keeps %-style arguments lazy: pass them as logger.info("... %s", value)
+rather than pre-formatting with an f-string.
+
+Each record carries the id of the request that logged it, taken from the
+X-Request-ID header or generated by RequestIdMiddleware. High-volume info
+lines can be sampled per logger with LOG_SAMPLE_RATES; warnings and errors
+are always kept.
+"""
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import uuid
+
+import orjson
+
+from metrics import LOG_RECORDS_DROPPED
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Longest client-supplied request id we propagate
+MAX_REQUEST_ID_LENGTH = 128
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "logger=rate,..." (e.g. "services.recipe_service=0.1") into a dict."""
+    rates = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of INFO-and-below records from selected loggers.
+    
+    Rates apply to the named logger and its children; the most specific
+    name wins. Kept records get a sample_rate attribute so consumers can
+    scale counts back up.
+    """
+    
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, Optional[float]] = {}
+    
+    def _rate(self, name: str) -> Optional[float]:
+        rate = self._resolved.get(name, -1.0)
+        if rate == -1.0:
+            rate, prefix = None, name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id, in the thread that logged them."""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and extras."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None)
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class StdoutHandler(logging.StreamHandler):
+    """StreamHandler writing to whatever sys.stdout is at write time."""
+    
+    def __init__(self):
+        logging.Handler.__init__(self)
+    
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that defers formatting to the listener and never blocks.
+    
+    The stock handler formats the message in the calling thread; here the
+    record is enqueued with its arguments, and dropped (and counted) if the
+    queue is full rather than stalling the request. Drops are exported as
+    log_records_dropped_total.
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_metric = LOG_RECORDS_DROPPED.labels()
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tracebacks must be rendered before the frames change
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._dropped_metric.inc()
+
+
+class BatchingQueueListener:
+    """
+    Writes queued records from a background thread, draining the queue
+    every flush_interval_s.
+    
+    logging.handlers.QueueListener blocks on the queue and wakes for every
+    record; each wake-up is a GIL handoff that the event loop thread pays
+    for, which costs more than a fast stdout write. Waking on a timer
+    batches that cost at the price of up to flush_interval_s log delay.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, handler: logging.Handler, flush_interval_s: float = 0.05):
+        self.queue = log_queue
+        self.handler = handler
+        self.flush_interval_s = flush_interval_s
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Write everything queued so far and stop the thread."""
+        self._stop_event.set()
+        self._thread.join()
+    
+    def _drain(self) -> None:
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.handler.handle(record)
+        self.handler.flush()
+    
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval_s):
+            self._drain()
+        self._drain()
+
+
+_listener: Optional[BatchingQueueListener] = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    log_format: str = "json",
+    use_queue: bool = True,
+    queue_size: int = 10000,
+    sample_rates: str = "",
+    stream=None
+) -> logging.Handler:
+    """
+    Configure the root logger; returns the handler attached to it.
+    
+    Replaces handlers from any earlier call. With use_queue=False records
+    are written synchronously, which is simpler to debug.
+    """
+    global _listener
+    shutdown_logging()
+    
+    output = logging.StreamHandler(stream) if stream is not None else StdoutHandler()
+    if log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    
+    if use_queue:
+        handler: logging.Handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = BatchingQueueListener(handler.queue, output)
+        _listener.start()
+    else:
+        handler = output
+    
+    # Sample first, so dropped records cost as little as possible
+    rates = parse_sample_rates(sample_rates)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    handler.addFilter(RequestIdFilter())
+    
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving each request an id for log correlation.
+    
+    Uses the client's X-Request-ID when present (e.g. from a proxy),
+    otherwise generates one, and echoes it in the response.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                if 0 < len(value) <= MAX_REQUEST_ID_LENGTH and value.isascii():
+                    request_id = value.decode()
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER, request_id.encode())
+        
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+        
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,19 +1,28 @@
 """
 Main FastAPI application - Serverless compatible version for Vercel.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 import logging
 import os
 
 from config import settings
-from routes import recipe_routes, ai_routes
+from database import Database
+from logging_config import RequestIdMiddleware, setup_logging
+from admission import AdmissionControlMiddleware, parse_group_limits
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from profiling import ProfilingMiddleware, profile_store, profiling_enabled
+from routes import recipe_routes, ai_routes, plan_routes, admin_routes, batch_routes
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+setup_logging(
+    level=settings.log_level,
+    log_format=settings.log_format,
+    use_queue=settings.log_async,
+    queue_size=settings.log_queue_size,
+    sample_rates=settings.log_sample_rates
 )
 logger = logging.getLogger(__name__)
 
@@ -26,6 +35,18 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Inside CORS, so rejections still carry CORS headers
+if settings.admission_control_enabled:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        concurrency_limits=parse_group_limits(settings.concurrency_limits),
+        rate_limits=parse_group_limits(settings.rate_limits),
+        queue_timeout_s=settings.admission_queue_timeout_ms / 1000,
+        retry_after_s=settings.admission_retry_after_s,
+        api_keys=tuple(key.strip() for key in settings.api_keys.split(",") if key.strip()),
+        trust_forwarded_for=settings.trust_forwarded_for
+    )
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -35,9 +56,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality
+    )
+
+# Only installed when configured, so unprofiled deployments pay nothing
+if profiling_enabled():
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        token=settings.profiling_token,
+        sample_rate=settings.profile_sample_rate,
+        interval_s=settings.profile_interval_ms / 1000
+    )
+
+# Outside CORS and profiling, so recorded latency covers them too
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Sets the request id before anything else logs
+app.add_middleware(RequestIdMiddleware)
+
+# Include routers. They're imported up front because FastAPI matches requests
+# against the full route table; what they import is cheap until first use
+# (the Gemini SDK loads on the first AI call, Motor on the first MongoDB one)
 app.include_router(recipe_routes.router)
 app.include_router(ai_routes.router)
+app.include_router(plan_routes.router)
+app.include_router(admin_routes.router)
+app.include_router(batch_routes.router)
 
 
 @app.get("/", tags=["Health"])
@@ -67,19 +118,36 @@ async def health_check():
     return {
         "status": "healthy",
         "message": "API is running",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "database": settings.storage_backend,
+        "read_only": settings.read_only,
+        # Whether clients may subscribe to GET /api/recipes/stream
+        "streaming": settings.recipe_stream_enabled
     }
 
 
+@app.get("/api/health/db", tags=["Health"])
+async def database_pool_stats():
+    """Connection pool utilization and wait-queue stats for this process."""
+    return Database.get_pool_stats()
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this process."""
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    return Response(content=render_metrics(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
 # Vercel serverless function handler with Mangum
 handler = Mangum(app, lifespan="off")
 
 if __name__ == "__main__":
     import uvicorn
-    from database import Database
     
     # Only for local development
-    logger.info(f"Starting server on {settings.api_host}:{settings.api_port}")
+    logger.info("Starting server on %s:%s", settings.api_host, settings.api_port)
     uvicorn.run(
         "main:app",
         host=settings.api_host,
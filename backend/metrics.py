@@ -0,0 +1,346 @@
+"""
+Prometheus metrics for the API.
+Defines the application's counters, gauges and histograms, renders them in
+the Prometheus text format for GET /metrics, and records per-route request
+metrics with MetricsMiddleware.
+
+Updates are cheap enough to leave on in production: each metric child keeps
+one value cell per thread, so recording never takes a lock (only the owning
+thread writes a cell; a scrape sums them), and label lookups are done once
+and reused rather than on every update.
+"""
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import math
+import threading
+
+_get_ident = threading.get_ident
+
+# Request / query latency buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# AI calls are dominated by network round trips to the model
+AI_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prompt/answer sizes in tokens, and model time per generated token
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400)
+SECONDS_PER_TOKEN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# Jaccard similarity, 0-1
+SIMILARITY_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.99)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (sample suffix, label values, value)
+Sample = Tuple[str, Tuple[str, ...], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _CounterChild:
+    """One labelled counter value, kept as a cell per writing thread."""
+    
+    __slots__ = ("_cells",)
+    
+    def __init__(self):
+        self._cells: Dict[int, List[float]] = {}
+    
+    def inc(self, amount: float = 1.0) -> None:
+        cell = self._cells.get(_get_ident())
+        if cell is None:
+            cell = self._cells[_get_ident()] = [0.0]
+        cell[0] += amount
+    
+    def get(self) -> float:
+        return sum(cell[0] for cell in list(self._cells.values()))
+
+
+class _GaugeChild(_CounterChild):
+    """One labelled gauge value; inc and dec may happen on different threads."""
+    
+    __slots__ = ()
+    
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    """One labelled histogram: per-thread bucket counts followed by the sum."""
+    
+    __slots__ = ("_upper_bounds", "_cells")
+    
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        self._cells: Dict[int, List[float]] = {}
+    
+    def observe(self, value: float) -> None:
+        cell = self._cells.get(_get_ident())
+        if cell is None:
+            cell = self._cells[_get_ident()] = [0] * len(self._upper_bounds) + [0.0]
+        cell[bisect_left(self._upper_bounds, value)] += 1
+        cell[-1] += value
+    
+    def get(self) -> Tuple[List[int], float]:
+        """Cumulative bucket counts and the sum of observations."""
+        counts = [0] * len(self._upper_bounds)
+        total = 0.0
+        for cell in list(self._cells.values()):
+            for index in range(len(counts)):
+                counts[index] += cell[index]
+            total += cell[-1]
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class Metric:
+    """A metric family: a name, help text, label names and one child per label set."""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional[List["Metric"]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        (REGISTRY if registry is None else registry).append(self)
+    
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+    
+    def labels(self, *values: Any) -> Any:
+        """Get the child for a label set; bind it once and reuse it on hot paths."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+    
+    def samples(self) -> Iterator[Sample]:
+        for key, child in list(self._children.items()):
+            yield "", key, child.get()
+    
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for suffix, values, value in self.samples():
+            names = self.labelnames + (("le",) if suffix == "_bucket" else ())
+            labels = ",".join(f'{name}="{_escape(label)}"' for name, label in zip(names, values))
+            yield f"{self.name}{suffix}{{{labels}}} {_format_value(value)}" if labels else f"{self.name}{suffix} {_format_value(value)}"
+
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional[List[Metric]] = None):
+        self.upper_bounds = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+    
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.upper_bounds)
+    
+    def samples(self) -> Iterator[Sample]:
+        for key, child in list(self._children.items()):
+            cumulative, total = child.get()
+            for bound, count in zip(self.upper_bounds, cumulative):
+                yield "_bucket", key + (_format_value(bound),), count
+            yield "_count", key, cumulative[-1]
+            yield "_sum", key, total
+
+
+class CallbackGauge(Metric):
+    """Gauge whose samples are computed at scrape time."""
+    
+    kind = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Tuple[str, ...], float]], registry: Optional[List[Metric]] = None):
+        self.callback = callback
+        super().__init__(name, documentation, labelnames, registry)
+    
+    def samples(self) -> Iterator[Sample]:
+        for key, value in self.callback().items():
+            yield "", key, value
+
+
+REGISTRY: List[Metric] = []
+
+
+def render(registry: Optional[List[Metric]] = None) -> bytes:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route"]
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+HTTP_REQUESTS_IN_FLIGHT_VALUE = HTTP_REQUESTS_IN_FLIGHT.labels()
+
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Requests admitted and in progress by route group.", ["group"])
+ADMISSION_QUEUED = Gauge("admission_queued", "Requests waiting for admission by route group.", ["group"])
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total", "Requests shed by route group and reason (rate_limited, queue_full, queue_timeout).",
+    ["group", "reason"]
+)
+
+MONGODB_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command.",
+    ["collection", "command", "outcome"]
+)
+RECIPE_SEARCH_DURATION = Histogram(
+    "recipe_search_duration_seconds", "Recipe search latency by filter shape (filter fields in use).", ["shape"]
+)
+
+AI_MODEL_CALL_DURATION = Histogram(
+    "ai_model_call_duration_seconds", "Gemini API call latency by outcome (success, empty, error).",
+    ["outcome"], buckets=AI_LATENCY_BUCKETS
+)
+AI_RESPONSES = Counter(
+    "ai_responses_total", "AI feature responses by whether the model, the AI cache or the fallback answered.", ["feature", "source"]
+)
+AI_RESPONSE_DURATION = Histogram(
+    "ai_response_duration_seconds", "AI feature latency by response source.",
+    ["feature", "source"], buckets=AI_LATENCY_BUCKETS
+)
+
+AI_TOKENS = Counter(
+    "ai_tokens_total", "Gemini tokens by feature and kind (prompt, output); estimated when the API reports none.",
+    ["feature", "kind"]
+)
+AI_CALL_TOKENS = Histogram(
+    "ai_call_tokens", "Tokens per Gemini call by feature and kind (prompt, output).",
+    ["feature", "kind"], buckets=TOKEN_BUCKETS
+)
+AI_SECONDS_PER_OUTPUT_TOKEN = Histogram(
+    "ai_seconds_per_output_token", "Gemini call latency divided by output tokens, by feature.",
+    ["feature"], buckets=SECONDS_PER_TOKEN_BUCKETS
+)
+AI_PROMPT_TRUNCATIONS = Counter(
+    "ai_prompt_truncations_total", "Prompts whose embedded recipe text was cut to the token budget, by feature.", ["feature"]
+)
+
+AI_SEMANTIC_CACHE_LOOKUPS = Counter(
+    "ai_semantic_cache_lookups_total", "Similarity cache lookups by cache and result (exact, similar, miss).", ["cache", "result"]
+)
+AI_SEMANTIC_CACHE_SIMILARITY = Histogram(
+    "ai_semantic_cache_similarity", "Jaccard similarity of the closest cached request per lookup (1 for exact hits).",
+    ["cache"], buckets=SIMILARITY_BUCKETS
+)
+
+RECIPE_CHANGE_EVENTS = Counter(
+    "recipe_change_events_total", "Recipe change events delivered by source (change_stream, outbox) and op.", ["source", "op"]
+)
+
+POPULARITY_HITS = Counter(
+    "popularity_hits_total", "Recipe popularity hits by outcome (flushed, dropped, failed).", ["outcome"]
+)
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full.")
+
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result (hit, miss).", ["cache", "result"])
+
+
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    lookups: Dict[str, List[float]] = {}
+    for (cache, result), child in list(CACHE_REQUESTS._children.items()):
+        lookups.setdefault(cache, [0.0, 0.0])[0 if result == "hit" else 1] += child.get()
+    return {(cache,): hits / (hits + misses) for cache, (hits, misses) in lookups.items() if hits + misses}
+
+
+CACHE_HIT_RATIO = CallbackGauge("cache_hit_ratio", "Share of cache lookups that were hits since start.", ["cache"], _cache_hit_ratios)
+
+
+class CacheMetrics:
+    """Pre-bound hit/miss counters for one named cache."""
+    
+    __slots__ = ("hits", "misses")
+    
+    def __init__(self, cache: str):
+        self.hits = CACHE_REQUESTS.labels(cache, "hit")
+        self.misses = CACHE_REQUESTS.labels(cache, "miss")
+    
+    def record(self, hit: bool) -> None:
+        (self.hits if hit else self.misses).inc()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests.
+    
+    Requests are labelled with the matched route template (e.g.
+    /api/recipes/{recipe_id}) so IDs don't create new series; requests
+    that match no route are labelled "unmatched".
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        # (method, route, status) -> pre-bound (counter, histogram) children
+        self._bound: Dict[Tuple[str, str, int], Tuple[_CounterChild, _HistogramChild]] = {}
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        HTTP_REQUESTS_IN_FLIGHT_VALUE.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT_VALUE.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            key = (scope["method"], route, status_code)
+            bound = self._bound.get(key)
+            if bound is None:
+                bound = self._bound[key] = (
+                    HTTP_REQUESTS.labels(scope["method"], route, status_code),
+                    HTTP_REQUEST_DURATION.labels(scope["method"], route)
+                )
+            bound[0].inc()
+            bound[1].observe(elapsed)
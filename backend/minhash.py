@@ -0,0 +1,127 @@
+"""
+MinHash signatures for near-duplicate recipe detection.
+A recipe's signature is SIGNATURE_SIZE 32-bit minimum hashes: the first
+half over its ingredient set, the second over 3-word shingles of its
+instructions. The share of positions two signatures agree on estimates the
+Jaccard similarity of those sets, so recipes with the same ingredients and
+slightly reworded instructions score high without comparing their text.
+
+For lookup, each half is cut into bands of BAND_ROWS values and every band
+hashed to one key (lsh_bands). Recipes sharing any key are candidates; with
+4-row bands a pair at similarity 0.8 shares one with probability ~0.98 and
+a pair at 0.3 with ~0.06, so a lookup reads a handful of indexed candidates
+instead of the whole catalog.
+
+Hashes use a fixed seed and blake2b, never Python's per-process hash(), so
+signatures stored by one process match those computed by another.
+set_signature() and lsh_bands() work on any token set too (the AI
+suggestion cache indexes ingredient sets with them).
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+from hashlib import blake2b
+import base64
+import random
+import re
+import struct
+
+# Minimum hashes per signature, half for ingredients and half for instructions
+SIGNATURE_SIZE = 64
+BAND_ROWS = 4
+SHINGLE_WORDS = 3
+
+_HALF = SIGNATURE_SIZE // 2
+_PRIME = (1 << 61) - 1
+_MASK = 0xFFFFFFFF
+# Minimum of an empty set; bands made only of it are not indexed
+_EMPTY = _MASK
+_PERMUTATIONS = [
+    (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+    for rng in [random.Random(20240611)] for _ in range(SIGNATURE_SIZE)
+]
+_SIGNATURE = struct.Struct(f"<{SIGNATURE_SIZE}I")
+_WORD = re.compile(r"[a-z]+|\d+")
+_LETTERS = re.compile(r"[a-z]+")
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(blake2b(token.encode(), digest_size=8).digest(), "little")
+
+
+def _minimums(tokens: Set[str], permutations: List[tuple]) -> List[int]:
+    hashes = [_token_hash(token) for token in tokens]
+    if not hashes:
+        return [_EMPTY] * len(permutations)
+    return [min((a * x + b) % _PRIME for x in hashes) & _MASK for a, b in permutations]
+
+
+def set_signature(tokens: Set[str], size: int = SIGNATURE_SIZE) -> List[int]:
+    """MinHash signature of any token set, up to SIGNATURE_SIZE values."""
+    return _minimums(tokens, _PERMUTATIONS[:size])
+
+
+def ingredient_tokens(ingredients: Iterable[str]) -> Set[str]:
+    """Ingredients lowercased to their words, so "2 Tomatoes," and "tomatoes" match."""
+    tokens = set()
+    for ingredient in ingredients:
+        words = _LETTERS.findall(str(ingredient).lower())
+        if words:
+            tokens.add(" ".join(words))
+    return tokens
+
+
+def instruction_shingles(instructions: str) -> Set[str]:
+    """Overlapping SHINGLE_WORDS-word sequences of the instructions."""
+    words = _WORD.findall(instructions.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(recipe: Dict[str, Any]) -> List[int]:
+    """MinHash signature of a recipe's ingredients and instructions."""
+    ingredients = ingredient_tokens(recipe.get("ingredients") or [])
+    shingles = instruction_shingles(str(recipe.get("instructions") or ""))
+    return _minimums(ingredients, _PERMUTATIONS[:_HALF]) + _minimums(shingles, _PERMUTATIONS[_HALF:])
+
+
+def encode_signature(values: List[int]) -> str:
+    """Compact string form stored on recipe documents (works in JSON, BSON and snapshots)."""
+    return base64.b64encode(_SIGNATURE.pack(*values)).decode()
+
+
+def decode_signature(encoded: str) -> Optional[List[int]]:
+    """Reverse encode_signature; None for a missing or malformed value."""
+    try:
+        return list(_SIGNATURE.unpack(base64.b64decode(encoded)))
+    except (TypeError, ValueError, struct.error):
+        return None
+
+
+def lsh_bands(values: List[int], rows_per_band: int = BAND_ROWS) -> List[int]:
+    """LSH keys of a signature: one non-negative 63-bit int per band with any non-empty value."""
+    bands = []
+    band_format = f"<B{rows_per_band}I"
+    for band, start in enumerate(range(0, len(values), rows_per_band)):
+        rows = values[start:start + rows_per_band]
+        if len(rows) < rows_per_band or all(value == _EMPTY for value in rows):
+            continue
+        digest = blake2b(struct.pack(band_format, band, *rows), digest_size=8).digest()
+        bands.append(int.from_bytes(digest, "little") >> 1)
+    return bands
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated similarity: the mean of the ingredient and instruction Jaccard estimates."""
+    estimates = []
+    for start in (0, _HALF):
+        left, right = a[start:start + _HALF], b[start:start + _HALF]
+        if all(value == _EMPTY for value in left) and all(value == _EMPTY for value in right):
+            continue
+        estimates.append(sum(x == y for x, y in zip(left, right)) / _HALF)
+    return sum(estimates) / len(estimates) if estimates else 0.0
+
+
+def fingerprint(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """The "minhash" and "lsh_bands" fields to store on a recipe document."""
+    values = signature(recipe)
+    return {"minhash": encode_signature(values), "lsh_bands": lsh_bands(values)}
@@ -2,10 +2,26 @@
 Data models for Recipe Explorer application.
 Defines Pydantic models for request/response validation and MongoDB documents.
 """
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+# Maximum number of ids accepted by a single batch-get request
+MAX_BATCH_GET_IDS = 100
+
+# Maximum number of recipes in a single shopping list
+MAX_SHOPPING_LIST_RECIPES = 200
+
+# Maximum number of sub-requests in a single POST /api/batch
+MAX_BATCH_REQUESTS = 20
+
+# Methods and paths a batch may not run: nested batches and endless streams
+BATCH_METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+BATCH_EXCLUDED_PATHS = ['/api/batch', '/api/recipes/stream']
+
+# Allowed recipe difficulty levels, easiest first
+DIFFICULTY_LEVELS = ['easy', 'medium', 'hard']
+
 
 class RecipeBase(BaseModel):
     """Base recipe model with common fields."""
@@ -13,27 +29,30 @@ class RecipeBase(BaseModel):
     cuisine: str = Field(..., min_length=1, max_length=100, description="Cuisine type")
     is_vegetarian: bool = Field(default=True, description="Vegetarian flag")
     prep_time_minutes: int = Field(..., gt=0, description="Preparation time in minutes")
-    ingredients: List[str] = Field(..., min_items=1, description="List of ingredients")
+    ingredients: List[str] = Field(..., min_length=1, description="List of ingredients")
     difficulty: str = Field(..., description="Difficulty level")
     instructions: str = Field(..., min_length=10, description="Cooking instructions")
     tags: List[str] = Field(default=[], description="Recipe tags")
     
-    @validator('difficulty')
+    @field_validator('difficulty')
+    @classmethod
     def validate_difficulty(cls, v):
         """Validate difficulty level."""
-        allowed = ['easy', 'medium', 'hard']
+        allowed = DIFFICULTY_LEVELS
         if v.lower() not in allowed:
             raise ValueError(f'Difficulty must be one of: {", ".join(allowed)}')
         return v.lower()
     
-    @validator('ingredients')
+    @field_validator('ingredients')
+    @classmethod
     def validate_ingredients(cls, v):
         """Ensure ingredients are not empty strings."""
         if any(not ingredient.strip() for ingredient in v):
             raise ValueError('Ingredients cannot be empty strings')
         return [ingredient.strip().lower() for ingredient in v]
     
-    @validator('tags')
+    @field_validator('tags')
+    @classmethod
     def validate_tags(cls, v):
         """Normalize tags to lowercase."""
         return [tag.strip().lower() for tag in v if tag.strip()]
@@ -50,7 +69,7 @@ class RecipeUpdate(BaseModel):
     cuisine: Optional[str] = Field(None, min_length=1, max_length=100)
     is_vegetarian: Optional[bool] = None
     prep_time_minutes: Optional[int] = Field(None, gt=0)
-    ingredients: Optional[List[str]] = Field(None, min_items=1)
+    ingredients: Optional[List[str]] = Field(None, min_length=1)
     difficulty: Optional[str] = None
     instructions: Optional[str] = Field(None, min_length=10)
     tags: Optional[List[str]] = None
@@ -62,9 +81,9 @@ class RecipeResponse(RecipeBase):
     created_at: datetime = Field(..., description="Creation timestamp")
     updated_at: datetime = Field(..., description="Last update timestamp")
     
-    class Config:
-        populate_by_name = True
-        json_schema_extra = {
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_schema_extra={
             "example": {
                 "_id": "rec_101",
                 "name": "Paneer Butter Masala",
@@ -79,6 +98,7 @@ class RecipeResponse(RecipeBase):
                 "updated_at": "2025-12-19T10:00:00"
             }
         }
+    )
 
 
 class RecipeSearchFilters(BaseModel):
@@ -92,11 +112,165 @@ class RecipeSearchFilters(BaseModel):
     search_query: Optional[str] = Field(None, description="Search in name or ingredients")
 
 
+class RecipeFacets(BaseModel):
+    """Response model for faceted recipe counts."""
+    total: int = Field(..., description="Number of matching recipes")
+    cuisine: Dict[str, int] = Field(default={}, description="Recipe count per cuisine")
+    difficulty: Dict[str, int] = Field(default={}, description="Recipe count per difficulty level")
+    is_vegetarian: Dict[str, int] = Field(default={}, description="Recipe count per vegetarian flag")
+    tags: Dict[str, int] = Field(default={}, description="Recipe count per tag")
+    prep_time: Dict[str, int] = Field(default={}, description="Recipe count per prep-time bucket")
+
+
+class RecipeBatchGetRequest(BaseModel):
+    """Request model for fetching several recipes by ID."""
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_GET_IDS, description="Recipe IDs to fetch")
+
+
+class RecipeBatchGetResponse(BaseModel):
+    """Response model for batch recipe fetches."""
+    recipes: List[Optional[RecipeResponse]] = Field(..., description="Recipes in request order, null where not found")
+    missing: List[str] = Field(default=[], description="Requested IDs that were not found")
+
+
+class BatchSubRequest(BaseModel):
+    """One API call inside a batch."""
+    method: str = Field(..., description="HTTP method: GET, POST, PUT or DELETE")
+    path: str = Field(..., description="API path with any query string, e.g. /api/recipes/?limit=20")
+    body: Optional[Any] = Field(None, description="JSON body for POST/PUT")
+    
+    @field_validator('method')
+    @classmethod
+    def validate_method(cls, v):
+        """Validate the HTTP method."""
+        if v.upper() not in BATCH_METHODS:
+            raise ValueError(f'Method must be one of: {", ".join(BATCH_METHODS)}')
+        return v.upper()
+    
+    @field_validator('path')
+    @classmethod
+    def validate_path(cls, v):
+        """Only API routes, and not ones that can't be batched."""
+        if not v.startswith('/api/'):
+            raise ValueError('Path must start with /api/')
+        if v.partition('?')[0].rstrip('/') in BATCH_EXCLUDED_PATHS:
+            raise ValueError(f'{v} cannot be called from a batch')
+        return v
+
+
+class BatchRequest(BaseModel):
+    """Request model for running several API calls in one round trip."""
+    requests: List[BatchSubRequest] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_REQUESTS, description="Sub-requests, run concurrently"
+    )
+
+
+class BatchSubResponse(BaseModel):
+    """The outcome of one sub-request."""
+    status: int = Field(..., description="HTTP status code of the sub-request")
+    body: Optional[Any] = Field(None, description="Decoded JSON body (text for other content types)")
+
+
+class BatchResponse(BaseModel):
+    """Response model for batches."""
+    responses: List[BatchSubResponse] = Field(..., description="One response per sub-request, in request order")
+
+
+class ShoppingListRequest(BaseModel):
+    """Request model for building a shopping list from several recipes."""
+    recipe_ids: List[str] = Field(
+        ..., min_length=1, max_length=MAX_SHOPPING_LIST_RECIPES,
+        description="Recipe IDs in the plan (repeat an ID to cook it more than once)"
+    )
+    servings_multiplier: float = Field(default=1.0, gt=0, le=100, description="Scale factor for ingredient amounts")
+
+
+class ShoppingListItem(BaseModel):
+    """A single merged ingredient in a shopping list."""
+    name: str = Field(..., description="Canonical ingredient name")
+    recipe_count: int = Field(..., description="Number of recipes needing this ingredient")
+    recipes: List[str] = Field(..., description="Names of recipes needing this ingredient")
+    amounts: Dict[str, float] = Field(default={}, description="Scaled total amount per unit, when quantities are given")
+
+
+class ShoppingListGroup(BaseModel):
+    """Shopping list items needed by the same number of recipes."""
+    recipe_count: int
+    items: List[ShoppingListItem]
+
+
+class ShoppingListResponse(BaseModel):
+    """Response model for shopping lists."""
+    recipe_count: int = Field(..., description="Number of recipes found and merged")
+    servings_multiplier: float
+    missing: List[str] = Field(default=[], description="Requested IDs that were not found")
+    total_items: int
+    groups: List[ShoppingListGroup]
+
+
+class MealPlanRequest(BaseModel):
+    """Request model for generating a meal plan."""
+    recipe_count: int = Field(..., ge=1, le=21, description="Number of recipes to pick")
+    max_total_prep_minutes: Optional[int] = Field(None, gt=0, description="Budget for the summed prep time")
+    min_vegetarian_ratio: float = Field(default=0.0, ge=0, le=1, description="Minimum share of vegetarian recipes")
+    max_per_cuisine: Optional[int] = Field(None, ge=1, description="Maximum recipes from any one cuisine")
+    max_difficulty: Optional[str] = Field(None, description="Hardest difficulty level allowed")
+    difficulty_caps: Dict[str, int] = Field(default={}, description="Maximum recipes per difficulty level")
+    time_budget_ms: int = Field(default=300, ge=10, le=5000, description="Optimizer latency budget in milliseconds")
+    
+    @field_validator('max_difficulty')
+    @classmethod
+    def validate_max_difficulty(cls, v):
+        """Validate difficulty level."""
+        if v is not None and v.lower() not in DIFFICULTY_LEVELS:
+            raise ValueError(f'Difficulty must be one of: {", ".join(DIFFICULTY_LEVELS)}')
+        return v.lower() if v else v
+    
+    @field_validator('difficulty_caps')
+    @classmethod
+    def validate_difficulty_caps(cls, v):
+        """Validate difficulty levels used as cap keys."""
+        caps = {}
+        for level, cap in v.items():
+            if level.lower() not in DIFFICULTY_LEVELS:
+                raise ValueError(f'Difficulty must be one of: {", ".join(DIFFICULTY_LEVELS)}')
+            if cap < 0:
+                raise ValueError('Difficulty caps cannot be negative')
+            caps[level.lower()] = cap
+        return caps
+
+
+class MealPlanRecipe(BaseModel):
+    """Summary of a recipe picked for a meal plan."""
+    id: str = Field(..., alias="_id", description="Recipe ID")
+    name: str
+    cuisine: str
+    is_vegetarian: bool
+    prep_time_minutes: int
+    difficulty: str
+    
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class MealPlanResponse(BaseModel):
+    """Response model for generated meal plans."""
+    recipes: List[MealPlanRecipe] = Field(..., description="Picked recipes")
+    feasible: bool = Field(..., description="Whether every constraint is met")
+    total_prep_minutes: int
+    vegetarian_count: int
+    cuisines: Dict[str, int] = Field(default={}, description="Picked recipes per cuisine")
+    distinct_ingredients: int = Field(..., description="Size of the merged shopping list")
+    candidates_considered: int
+    timed_out: bool = Field(..., description="Whether the latency budget cut the search short")
+    elapsed_ms: float
+
+
 class AIRecipeSuggestionRequest(BaseModel):
     """Request model for AI recipe suggestions."""
-    ingredients: List[str] = Field(..., min_items=1, description="Available ingredients")
+    ingredients: List[str] = Field(..., min_length=1, description="Available ingredients")
     
-    @validator('ingredients')
+    @field_validator('ingredients')
+    @classmethod
     def validate_ingredients(cls, v):
         """Ensure ingredients are not empty strings."""
         if any(not ingredient.strip() for ingredient in v):
@@ -0,0 +1,135 @@
+"""
+MongoDB driver event listeners.
+PoolStatsListener tracks connection pool utilization and
+CommandMetricsListener records command durations. They subclass pymongo's
+listener types, so they live apart from database.py and are only imported
+(with pymongo and Motor) once a MongoDB client is created.
+"""
+from pymongo.monitoring import ConnectionPoolListener, CommandListener
+from metrics import MONGODB_COMMAND_DURATION
+from typing import Any, Dict, Tuple
+import threading
+
+
+class PoolStatsListener(ConnectionPoolListener):
+    """
+    Tracks connection pool utilization from pymongo CMAP events.
+    
+    Callbacks run on driver threads, so counters are updated under a lock.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.created_total = 0
+        self.checkouts_total = 0
+        self.checkout_failures_total = 0
+        self.pool_clears_total = 0
+        self.servers: Dict[str, Dict[str, int]] = {}
+    
+    def _server(self, address) -> Dict[str, int]:
+        key = f"{address[0]}:{address[1]}"
+        if key not in self.servers:
+            self.servers[key] = {"open": 0, "in_use": 0}
+        return self.servers[key]
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears_total += 1
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self.created_total += 1
+            self._server(event.address)["open"] += 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+            self._server(event.address)["open"] -= 1
+    
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures_total += 1
+    
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.checkouts_total += 1
+            self._server(event.address)["in_use"] += 1
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+            self._server(event.address)["in_use"] -= 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current pool statistics."""
+        with self._lock:
+            return {
+                "open_connections": self.open,
+                "in_use": self.in_use,
+                "wait_queue": self.waiting,
+                "max_wait_queue": self.max_waiting,
+                "connections_created_total": self.created_total,
+                "checkouts_total": self.checkouts_total,
+                "checkout_failures_total": self.checkout_failures_total,
+                "pool_clears_total": self.pool_clears_total,
+                "servers": {address: dict(counts) for address, counts in self.servers.items()}
+            }
+
+
+class CommandMetricsListener(CommandListener):
+    """
+    Records MongoDB command durations per collection and command.
+    
+    The collection name is only present on the started event, so it is kept
+    by request ID until the matching succeeded/failed event arrives.
+    """
+    
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+        # (collection, command, outcome) -> histogram child
+        self._bound: Dict[Tuple[str, str, str], Any] = {}
+    
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+    
+    def succeeded(self, event):
+        self._record(event, "success")
+    
+    def failed(self, event):
+        self._record(event, "failure")
+    
+    def _record(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        key = (collection, event.command_name, outcome)
+        histogram = self._bound.get(key)
+        if histogram is None:
+            histogram = self._bound[key] = MONGODB_COMMAND_DURATION.labels(*key)
+        histogram.observe(event.duration_micros / 1_000_000)
@@ -2,7 +2,7 @@
 OPTIONAL SCRIPT: Sample recipe data for TESTING purposes only.
 
 ⚠️  IMPORTANT: This script is NOT required for the assignment!
-    
+
 Assignment Requirements State:
 ✅ Recipes are managed through the FRONTEND interface
 ✅ Users create/add recipes via the web UI
@@ -25,6 +25,7 @@ import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timezone
 from config import settings
+from minhash import fingerprint
 
 # Sample recipes for TESTING ONLY (matching assignment requirements)
 SAMPLE_RECIPES = [
@@ -102,15 +103,19 @@ async def populate_sample_data():
         await collection.delete_many({})
         print("Cleared existing recipes.")
     
-    # Add timestamps to sample recipes
+    # Add timestamps and near-duplicate fingerprints to sample recipes
     for recipe in SAMPLE_RECIPES:
         recipe["created_at"] = datetime.now(timezone.utc)
         recipe["updated_at"] = datetime.now(timezone.utc)
+        recipe.update(fingerprint(recipe))
     
     # Insert sample recipes
     result = await collection.insert_many(SAMPLE_RECIPES)
     print(f"\nSuccessfully added {len(result.inserted_ids)} sample recipes!")
     
+    # Drop materialized facet counts so the API rebuilds them from the new data
+    await db.recipe_stats.delete_many({})
+    
     # Display added recipes
     print("\nAdded recipes:")
     for i, recipe in enumerate(SAMPLE_RECIPES, 1):
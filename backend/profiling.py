@@ -0,0 +1,305 @@
+"""
+On-demand per-request profiling.
+ProfilingMiddleware runs selected requests under a sampling profiler and
+saves each profile as a speedscope file (https://www.speedscope.app) that
+can also be downloaded as collapsed stacks for flamegraph.pl.
+
+A request is profiled when it carries X-Profile-Token matching the
+configured token, or when it is randomly sampled at profile_sample_rate.
+Unprofiled requests only pay for that check, and the middleware isn't
+installed at all unless one of the two is configured.
+
+Samples are taken from a background thread, and only while the profiled
+request's task is the one running on the event loop, so concurrent
+requests don't leak into its profile. Time the request spends suspended
+(awaiting MongoDB, the network, ...) is recorded as an "(awaiting)" frame.
+Work handed to thread pools is not sampled. While the loop is busy the
+sampler waits for the GIL, so resolution is roughly the interpreter switch
+interval (5ms) at best; profiles are meant for slow requests.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from datetime import datetime
+from time import perf_counter
+import asyncio
+import json
+import logging
+import os
+import random
+import secrets
+import sys
+import tempfile
+import threading
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Deepest stack recorded per sample
+MAX_STACK_DEPTH = 128
+
+AWAITING_FRAME = ("(awaiting)", "", 0)
+
+# (name, file, line) of a function
+Frame = Tuple[str, str, int]
+
+
+def default_profile_dir() -> str:
+    """Profiles go to the temp dir by default, the only writable path on serverless hosts."""
+    return os.path.join(tempfile.gettempdir(), "recipe_explorer_profiles")
+
+
+class ProfileSession:
+    """Samples collected for one profiled request."""
+    
+    __slots__ = ("task", "loop", "thread_id", "root_code", "stacks", "sample_count", "last_sample")
+    
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop, root_code):
+        self.task = task
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.root_code = root_code
+        # stack (root first) -> sampled seconds
+        self.stacks: Counter = Counter()
+        self.sample_count = 0
+        self.last_sample = perf_counter()
+
+
+class Sampler:
+    """
+    Background thread sampling the stacks of active profile sessions.
+    
+    The thread only runs while at least one request is being profiled.
+    Each sample is weighted by the time since the previous one, since the
+    GIL can delay the sampler past its interval while the loop is busy.
+    """
+    
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        # Set to stop the running sampler thread; each thread gets its own
+        self._stop_event: Optional[threading.Event] = None
+    
+    def start(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._sessions.append(session)
+            if self._stop_event is None:
+                self._stop_event = threading.Event()
+                threading.Thread(
+                    target=self._run, args=(self._stop_event,), name="request-profiler", daemon=True
+                ).start()
+    
+    def stop(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._sessions.remove(session)
+            if not self._sessions:
+                self._stop_event.set()
+                self._stop_event = None
+    
+    def _run(self, stop_event: threading.Event) -> None:
+        while not stop_event.wait(self.interval_s):
+            with self._lock:
+                if not self._sessions:
+                    return
+                frames = sys._current_frames()
+                now = perf_counter()
+                for session in self._sessions:
+                    self._take(session, frames.get(session.thread_id), now)
+    
+    @staticmethod
+    def _take(session: ProfileSession, frame, now: float) -> None:
+        """Record one sample for a session (caller holds the lock)."""
+        weight = now - session.last_sample
+        session.last_sample = now
+        if weight <= 0:
+            return
+        
+        if frame is None or asyncio.current_task(session.loop) is not session.task:
+            session.stacks[(AWAITING_FRAME,)] += weight
+            session.sample_count += 1
+            return
+        
+        stack: List[Frame] = []
+        while frame is not None and frame.f_code is not session.root_code and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            # co_qualname is Python 3.11+; older interpreters get the bare function name
+            stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()
+        session.stacks[tuple(stack)] += weight
+        session.sample_count += 1
+
+
+def to_speedscope(name: str, stacks: Dict[Tuple[Frame, ...], float]) -> Dict[str, Any]:
+    """A sampled speedscope profile with weights in milliseconds."""
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[Frame, int] = {}
+    samples, weights = [], []
+    for stack, seconds in stacks.items():
+        sample = []
+        for frame in stack:
+            index = frame_index.get(frame)
+            if index is None:
+                index = frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]} if frame[1] else {"name": frame[0]})
+            sample.append(index)
+        samples.append(sample)
+        weights.append(round(seconds * 1000, 3))
+    
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "recipe-explorer-profiler",
+        "name": name,
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sum(weights), 3),
+            "samples": samples,
+            "weights": weights
+        }]
+    }
+
+
+def speedscope_to_collapsed(profile: Dict[str, Any], root: Optional[str] = None) -> str:
+    """Collapsed stacks ("a;b;c <microseconds>" per line) from a speedscope file."""
+    frames = profile["shared"]["frames"]
+    totals: Counter = Counter()
+    for sampled in profile["profiles"]:
+        for sample, weight in zip(sampled["samples"], sampled["weights"]):
+            names = [frames[index]["name"].replace(";", ":") for index in sample]
+            if root:
+                names.insert(0, root)
+            totals[";".join(names)] += weight
+    return "".join(f"{stack} {round(ms * 1000)}\n" for stack, ms in totals.items() if round(ms * 1000))
+
+
+class ProfileStore:
+    """Profiles on disk: <id>.speedscope.json plus a small <id>.meta.json for listing."""
+    
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+    
+    def _path(self, profile_id: str, kind: str) -> str:
+        if not profile_id or os.path.basename(profile_id) != profile_id or profile_id.startswith("."):
+            raise KeyError(profile_id)
+        return os.path.join(self.directory, f"{profile_id}.{kind}.json")
+    
+    def save(self, meta: Dict[str, Any], profile: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(meta["id"], "speedscope"), "w", encoding="utf-8") as file:
+            json.dump(profile, file, separators=(",", ":"))
+        # Meta last, so listed profiles are always complete
+        with open(self._path(meta["id"], "meta"), "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        self._prune()
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """Profile metadata, newest first."""
+        try:
+            names = sorted((name for name in os.listdir(self.directory) if name.endswith(".meta.json")), reverse=True)
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as file:
+                    profiles.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return profiles
+    
+    def load(self, profile_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Metadata and speedscope profile; KeyError if there is no such profile."""
+        try:
+            with open(self._path(profile_id, "meta"), encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(self._path(profile_id, "speedscope"), encoding="utf-8") as file:
+                return meta, json.load(file)
+        except FileNotFoundError:
+            raise KeyError(profile_id)
+    
+    def _prune(self) -> None:
+        for meta in self.list()[self.max_profiles:]:
+            for kind in ("meta", "speedscope"):
+                try:
+                    os.remove(self._path(meta["id"], kind))
+                except OSError:
+                    pass
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests selected by token header or random sampling."""
+    
+    def __init__(self, app, store: ProfileStore, token: Optional[str] = None,
+                 sample_rate: float = 0.0, interval_s: float = 0.005):
+        self.app = app
+        self.store = store
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.sampler = Sampler(interval_s)
+    
+    def _selected(self, scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_TOKEN_HEADER:
+                    return secrets.compare_digest(value, self.token)
+        return False
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{secrets.token_hex(3)}"
+        status_code = 500
+        
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+        
+        session = ProfileSession(asyncio.current_task(), asyncio.get_running_loop(), ProfilingMiddleware.__call__.__code__)
+        start = perf_counter()
+        self.sampler.start(session)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.sampler.stop(session)
+            duration_ms = (perf_counter() - start) * 1000
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            meta = {
+                "id": profile_id,
+                "created_at": datetime.utcnow().isoformat(),
+                "method": scope["method"],
+                "route": route,
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(duration_ms, 3),
+                "samples": session.sample_count
+            }
+            name = f"{scope['method']} {route} ({status_code}, {duration_ms:.1f}ms)"
+            try:
+                await asyncio.to_thread(self.store.save, meta, to_speedscope(name, session.stacks))
+            except Exception as e:
+                logger.error("Error saving profile %s: %s", profile_id, e)
+
+
+# Profiles shared by the middleware and the admin routes
+profile_store = ProfileStore(settings.profile_dir or default_profile_dir(), settings.profile_max_files)
+
+
+def profiling_enabled() -> bool:
+    return bool(settings.profiling_token or settings.profile_sample_rate)
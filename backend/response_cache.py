@@ -0,0 +1,151 @@
+"""
+In-process cache of encoded JSON response bodies.
+Hot read endpoints (recipe detail, facets) keep the serialized body and,
+once requested, its gzip/brotli forms, so a cache hit skips both the
+database read and re-compression. Entries expire after a TTL and are
+invalidated on writes: locally by the writing request, and in every other
+process by the recipe change feed (change_feed.py), or once their entry
+expires when the feed is off.
+
+With shared_cache_path set, bodies are also kept in the host-wide SQLite
+cache (shared_cache.SQLiteCache), so a body built by one worker is served
+by all of them, and invalidation clears it host-wide.
+"""
+from typing import Dict, Hashable, Optional
+from collections import OrderedDict
+import time
+
+from fastapi.responses import Response
+
+from change_feed import ChangeEvent, RESET, change_feed
+from compression import compress, negotiate_encoding
+from config import settings
+from metrics import CacheMetrics
+from shared_cache import SQLiteCache
+
+
+class CachedBody:
+    """A serialized body plus its compressed forms, built on demand."""
+    
+    __slots__ = ("body", "expires_at", "encoded")
+    
+    def __init__(self, body: bytes, expires_at: float):
+        self.body = body
+        self.expires_at = expires_at
+        # encoding -> compressed body
+        self.encoded: Dict[str, bytes] = {}
+    
+    def variant(self, encoding: str) -> bytes:
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = self.encoded[encoding] = compress(self.body, encoding)
+        return data
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of CachedBody entries.
+    
+    With a `shared` cache, local misses are looked up there (keys must then
+    be strings) and puts, invalidations and clears go to both tiers. get()
+    and put() are coroutines so shared-tier calls run off the event loop.
+    """
+    
+    def __init__(self, name: str, max_entries: int, ttl_s: float, shared: Optional[SQLiteCache] = None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._metrics = CacheMetrics(name)
+    
+    async def get(self, key: Hashable) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None and self.shared is not None:
+            body = await self.shared.get_async(key)
+            if body is not None:
+                entry = self._keep(key, body)
+        self._metrics.record(entry is not None)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    async def put(self, key: Hashable, body: bytes) -> CachedBody:
+        if self.shared is not None:
+            await self.shared.put_async(key, body)
+        return self._keep(key, body)
+    
+    def _keep(self, key: Hashable, body: bytes) -> CachedBody:
+        """Store a body in the local tier."""
+        entry = CachedBody(body, time.monotonic() + self.ttl_s)
+        if self.ttl_s > 0:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+    
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.invalidate(key)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def cached_response(entry: CachedBody, accept_encoding: Optional[str], media_type: str = "application/json") -> Response:
+    """
+    Response for a cache entry, pre-compressed when the client accepts it.
+    
+    Setting Content-Encoding here makes CompressionMiddleware pass the body
+    through rather than compress it again.
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if settings.compression_enabled else None
+    if encoding is None or len(entry.body) < settings.compression_minimum_size:
+        return Response(entry.body, media_type=media_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(entry.variant(encoding), media_type=media_type, headers=headers)
+
+
+def _response_cache(name: str) -> ResponseCache:
+    shared = None
+    if settings.shared_cache_path:
+        shared = SQLiteCache(
+            f"{name}_shared", settings.shared_cache_path, settings.shared_cache_size, settings.response_cache_ttl_s
+        )
+    return ResponseCache(name, settings.response_cache_size, settings.response_cache_ttl_s, shared)
+
+
+# Serialized recipes by ID, for GET /api/recipes/{recipe_id}
+recipe_cache = _response_cache("recipe_response")
+
+# Facet counts by normalized filters, for GET /api/recipes/facets
+facets_cache = _response_cache("facets_response")
+
+
+def invalidate_recipe(recipe_id: Optional[str] = None) -> None:
+    """Drop cached responses affected by a write to a recipe (or a new recipe)."""
+    if recipe_id is not None:
+        recipe_cache.invalidate(recipe_id)
+    facets_cache.clear()
+
+
+def _on_recipe_change(event: ChangeEvent) -> None:
+    """Drop cached responses for a write made by any instance."""
+    if event.op == RESET:
+        recipe_cache.clear()
+        facets_cache.clear()
+    else:
+        invalidate_recipe(event.recipe_id)
+
+
+change_feed.subscribe(_on_recipe_change)
@@ -0,0 +1,60 @@
+"""
+Fast JSON responses for recipe documents.
+Encodes documents read from our own collection directly with orjson,
+skipping the per-item response_model validation FastAPI would otherwise run.
+"""
+from fastapi.responses import Response
+from bson import ObjectId
+from typing import Any, Dict, Iterable
+import orjson
+
+from models import RecipeResponse
+
+
+def _response_fields() -> Dict[str, Any]:
+    """Map each serialized RecipeResponse key to its default value (None if required)."""
+    fields = {}
+    for name, field in RecipeResponse.model_fields.items():
+        key = field.alias or name
+        fields[key] = None if field.is_required() else field.get_default(call_default_factory=True)
+    return fields
+
+
+# Output keys of RecipeResponse in declaration order, with defaults for optional fields
+RECIPE_RESPONSE_FIELDS = _response_fields()
+
+def _default(obj: Any) -> Any:
+    """Encode types orjson does not handle natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_response_dict(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a stored recipe document onto the RecipeResponse shape."""
+    return {key: recipe.get(key, default) for key, default in RECIPE_RESPONSE_FIELDS.items()}
+
+
+def encode_recipes(recipes: Iterable[Dict[str, Any]]) -> bytes:
+    """Serialize trusted recipe documents to JSON bytes."""
+    return orjson.dumps([to_response_dict(recipe) for recipe in recipes], default=_default)
+
+
+def encode_recipe(recipe: Dict[str, Any]) -> bytes:
+    """Serialize a single trusted recipe document to JSON bytes."""
+    return orjson.dumps(to_response_dict(recipe), default=_default)
+
+
+class RecipeJSONResponse(Response):
+    """
+    JSON response for recipe documents that come straight from the database.
+    
+    Documents are written through validated models, so they are encoded
+    as-is instead of being validated again against the response model.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, dict):
+            return encode_recipe(content)
+        return encode_recipes(content)
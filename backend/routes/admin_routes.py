@@ -0,0 +1,205 @@
+"""
+Admin API routes.
+Operational endpoints: the recipe search slow-query log, request profiles,
+the recipe change feed, popularity counters, the AI suggestion cache, the
+near-duplicate report and facet-count repair.
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Optional
+import secrets
+
+from change_feed import change_feed
+from config import settings
+from database import get_recipe_store
+from profiling import profile_store, profiling_enabled, speedscope_to_collapsed
+from response_cache import invalidate_recipe
+from services.ai_service import suggestion_cache
+from services.dedupe_service import DedupeService
+from services.popularity import popularity
+from storage.base import ReadOnlyStoreError
+from services.slow_query_log import slow_query_log
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Dependency checking X-Admin-Token; admin routes are closed when no token is configured."""
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API disabled: set ADMIN_TOKEN to enable it"
+        )
+    if not secrets.compare_digest(x_admin_token or "", settings.admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or missing admin token"
+        )
+
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/slow-queries")
+async def get_slow_queries():
+    """
+    Recipe search latency per query shape and recently captured slow searches.
+    
+    - **shapes**: Per filter-shape count, average/max latency, results and docs examined (most total time first)
+    - **recent**: Slow searches with their explain() plan, newest first
+    
+    A shape is the set of filter fields used, e.g. "cuisine,max_prep_time".
+    """
+    return slow_query_log.snapshot()
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries():
+    """Clear the slow-query log and per-shape statistics."""
+    slow_query_log.reset()
+
+
+@router.get("/change-feed")
+async def get_change_feed():
+    """
+    Recipe change feed status for this process.
+    
+    - **source**: "change_stream" or "outbox" (null until the first MongoDB request starts it)
+    - **events_total**: Change events delivered to this process's subscribers
+    - **resume_token**: Feed position the watcher resumes from after an error
+    """
+    return change_feed.snapshot()
+
+
+@router.get("/popularity")
+async def get_popularity():
+    """
+    Popularity counter status for this process.
+    
+    - **pending_recipes**: Recipes with hits not yet written (lost if the process dies now)
+    - **flushes_total**: Bulk counter writes made
+    - **dropped_total**: Hits dropped because popularity_max_pending recipes were pending
+    """
+    return popularity.snapshot()
+
+
+@router.get("/ai-cache")
+async def get_ai_cache():
+    """
+    AI suggestion cache statistics for this process.
+    
+    - **lookups**: Lookups answered by an identical ingredient set ("exact"), a similar one ("similar") or neither ("miss")
+    - **mean_similarity**: Mean similarity of the closest cached set per lookup
+    
+    The full similarity distribution is the ai_semantic_cache_similarity histogram at /metrics.
+    """
+    return suggestion_cache.snapshot()
+
+
+@router.get("/dedupe")
+async def get_duplicate_report(
+    limit: int = Query(100, ge=1, le=1000),
+    threshold: Optional[float] = Query(None, gt=0, le=1),
+    store=Depends(get_recipe_store)
+):
+    """
+    Groups of near-duplicate recipes, largest first.
+    
+    - **limit**: Maximum number of groups (default: 100)
+    - **threshold**: Minimum estimated similarity, 0-1 (default: NEAR_DUPLICATE_THRESHOLD)
+    
+    Each recipe in a group carries its highest **similarity** to another
+    member. Recipes without a fingerprint are not included; see
+    POST /api/admin/dedupe/backfill.
+    """
+    try:
+        return await DedupeService(store, threshold).report(limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building duplicate report: {str(e)}"
+        )
+
+
+@router.post("/dedupe/backfill")
+async def backfill_fingerprints(store=Depends(get_recipe_store)):
+    """
+    Fingerprint recipes stored without one, e.g. imported by populate_data.py.
+    
+    Returns **updated**, the number of recipes fingerprinted.
+    """
+    try:
+        return {"updated": await DedupeService(store).backfill()}
+    except ReadOnlyStoreError as e:
+        raise HTTPException(
+            status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error backfilling fingerprints: {str(e)}"
+        )
+
+
+@router.post("/facets/rebuild")
+async def rebuild_facet_counts(store=Depends(get_recipe_store)):
+    """
+    Recompute the unfiltered facet counts from the stored recipes.
+    
+    Repairs materialized counts that drifted from the collection (MongoDB);
+    returns the rebuilt facets.
+    """
+    try:
+        facets = await store.rebuild_facet_counts()
+        invalidate_recipe()
+        return facets
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error rebuilding facet counts: {str(e)}"
+        )
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """
+    List saved request profiles, newest first.
+    
+    Each entry has the profile **id**, method, route, status, duration and
+    sample count. Send X-Profile-Token to profile a request on demand; the
+    response carries its id in X-Profile-Id.
+    """
+    return {
+        "profiling_enabled": profiling_enabled(),
+        "sample_rate": settings.profile_sample_rate,
+        "profiles": profile_store.list()
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$")
+):
+    """
+    Download a request profile.
+    
+    - **format**: "speedscope" (open at https://www.speedscope.app) or
+      "collapsed" stacks with microsecond weights for flamegraph.pl
+    """
+    try:
+        meta, profile = profile_store.load(profile_id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+    
+    if format == "collapsed":
+        return PlainTextResponse(
+            speedscope_to_collapsed(profile, root=f"{meta['method']} {meta['route']}"),
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.collapsed.txt"'}
+        )
+    return JSONResponse(
+        profile,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
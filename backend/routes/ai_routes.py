@@ -4,9 +4,9 @@ Handles AI-powered recipe suggestions and simplification.
 """
 from fastapi import APIRouter, HTTPException, status, Depends
 from models import AIRecipeSuggestionRequest, AIRecipeSimplifyRequest, AIResponse
-from services.ai_service import AIService
+from services.ai_service import AIService, GEMINI_MODEL_NAME
 from services.recipe_service import RecipeService
-from database import get_db
+from database import get_recipe_store
 
 router = APIRouter(prefix="/api/ai", tags=["AI Features"])
 
@@ -16,9 +16,9 @@ async def get_ai_service() -> AIService:
     return AIService()
 
 
-async def get_recipe_service(db=Depends(get_db)) -> RecipeService:
+async def get_recipe_service(store=Depends(get_recipe_store)) -> RecipeService:
     """Dependency to get recipe service instance."""
-    return RecipeService(db)
+    return RecipeService(store)
 
 
 @router.post("/suggest-recipe", response_model=AIResponse)
@@ -85,6 +85,7 @@ async def simplify_recipe(
         )
         
         if simplified:
+            recipe_service.record_simplification(request.recipe_id)
             return AIResponse(
                 success=True,
                 data=simplified,
@@ -119,7 +120,7 @@ async def ai_health_check(ai_service: AIService = Depends(get_ai_service)):
         "configured": has_api_key,
         "available": is_available,
         "service": "Google Gemini API",
-        "model": "gemini-2.5-flash",
+        "model": GEMINI_MODEL_NAME,
         "free_tier": "60 requests/minute",
         "get_key_from": "https://makersuite.google.com/app/apikey",
         "message": "✅ AI service is configured and ready" if is_available else "⚠️ AI service will use fallback responses. Configure GEMINI_API_KEY in .env for full AI functionality."
@@ -0,0 +1,33 @@
+"""
+Batch API routes.
+Runs several API calls in one round trip.
+"""
+from fastapi import APIRouter, HTTPException, status, Request
+from fastapi.responses import Response
+from models import BatchRequest, BatchResponse
+from services.batch_service import BatchService, encode_batch_response
+
+router = APIRouter(prefix="/api", tags=["Batch"])
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def run_batch(batch: BatchRequest, request: Request):
+    """
+    Run several independent API calls in one request.
+    
+    - **requests**: Up to 20 sub-requests, each with a **method**,
+      a **path** (including any query string) and an optional JSON **body**
+    
+    Sub-requests run concurrently, each through the same checks (admission
+    control, rate limits) as a separate request, and with this request's
+    headers. **responses** holds each one's **status** and **body** in
+    request order; a failing sub-request doesn't fail the batch.
+    """
+    try:
+        responses = await BatchService(request.app).run(batch.requests, request.scope)
+        return Response(encode_batch_response(responses), media_type="application/json")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error running batch: {str(e)}"
+        )
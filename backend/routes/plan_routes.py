@@ -0,0 +1,44 @@
+"""
+Meal plan API routes.
+Handles generating meal plans from the recipe catalog.
+"""
+from fastapi import APIRouter, HTTPException, status, Depends
+from models import MealPlanRequest, MealPlanResponse
+from services.meal_plan_service import MealPlanService
+from database import get_recipe_store
+
+router = APIRouter(prefix="/api/plans", tags=["Meal Plans"])
+
+
+async def get_meal_plan_service(store=Depends(get_recipe_store)) -> MealPlanService:
+    """Dependency to get meal plan service instance."""
+    return MealPlanService(store)
+
+
+@router.post("/generate", response_model=MealPlanResponse)
+async def generate_meal_plan(
+    request: MealPlanRequest,
+    service: MealPlanService = Depends(get_meal_plan_service)
+):
+    """
+    Generate a meal plan that satisfies the given constraints.
+    
+    - **recipe_count**: Number of recipes to pick (1-21)
+    - **max_total_prep_minutes**: Budget for the summed prep time (optional)
+    - **min_vegetarian_ratio**: Minimum share of vegetarian recipes, 0-1 (default: 0)
+    - **max_per_cuisine**: Maximum recipes from any one cuisine (optional)
+    - **max_difficulty**: Hardest difficulty level allowed (optional)
+    - **difficulty_caps**: Maximum recipes per difficulty level, e.g. {"hard": 1}
+    - **time_budget_ms**: Optimizer latency budget (default: 300)
+    
+    Among plans meeting the constraints, recipes that share ingredients are
+    preferred so the shopping list stays short. If the latency budget runs
+    out, the best plan found so far is returned with **timed_out** set.
+    """
+    try:
+        return await service.generate_plan(request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating meal plan: {str(e)}"
+        )
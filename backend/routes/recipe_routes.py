@@ -2,18 +2,30 @@
 Recipe API routes.
 Handles all recipe-related endpoints including CRUD and search operations.
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from models import RecipeCreate, RecipeUpdate, RecipeResponse, RecipeSearchFilters
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from models import (
+    RecipeCreate, RecipeUpdate, RecipeResponse, RecipeSearchFilters, RecipeFacets,
+    RecipeBatchGetRequest, RecipeBatchGetResponse, ShoppingListRequest, ShoppingListResponse
+)
 from services.recipe_service import RecipeService
-from database import get_db
-from typing import List
+from services.dedupe_service import DuplicateRecipeError
+from services.recipe_events import recipe_events, TooManyClientsError
+from services.shopping_list_service import ShoppingListService
+from responses import RecipeJSONResponse, to_response_dict, encode_recipe
+from response_cache import recipe_cache, facets_cache, cached_response, invalidate_recipe
+from storage.base import ReadOnlyStoreError
+from config import settings
+from database import get_recipe_store
+from typing import List, Optional
+import orjson
 
 router = APIRouter(prefix="/api/recipes", tags=["Recipes"])
 
 
-async def get_recipe_service(db=Depends(get_db)) -> RecipeService:
+async def get_recipe_service(store=Depends(get_recipe_store)) -> RecipeService:
     """Dependency to get recipe service instance."""
-    return RecipeService(db)
+    return RecipeService(store)
 
 
 @router.post("/", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
@@ -32,10 +44,28 @@ async def create_recipe(
     - **difficulty**: Difficulty level - easy/medium/hard (required)
     - **instructions**: Cooking instructions (required)
     - **tags**: List of tags (optional)
+    
+    When near-duplicate checks are on, a recipe nearly duplicating an
+    existing one is rejected with 409 listing the **duplicates**, or merged
+    into the closest one, which is returned with 200 and X-Duplicate-Of.
     """
     try:
         created_recipe = await service.create_recipe(recipe)
+        invalidate_recipe()
         return created_recipe
+    except DuplicateRecipeError as e:
+        if e.merged is not None:
+            invalidate_recipe(e.merged["_id"])
+            return RecipeJSONResponse(e.merged, headers={"X-Duplicate-Of": e.merged["_id"]})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "duplicates": e.duplicates}
+        )
+    except ReadOnlyStoreError as e:
+        raise HTTPException(
+            status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -47,6 +77,7 @@ async def create_recipe(
 async def get_all_recipes(
     skip: int = 0,
     limit: int = 100,
+    sort: Optional[str] = Query(None, pattern="^trending$"),
     service: RecipeService = Depends(get_recipe_service)
 ):
     """
@@ -54,10 +85,12 @@ async def get_all_recipes(
     
     - **skip**: Number of recipes to skip (default: 0)
     - **limit**: Maximum number of recipes to return (default: 100)
+    - **sort**: "trending" for the most viewed and simplified recipes of late
+      first (optional; default storage order)
     """
     try:
-        recipes = await service.get_all_recipes(skip=skip, limit=limit)
-        return recipes
+        recipes = await service.get_all_recipes(skip=skip, limit=limit, sort=sort)
+        return RecipeJSONResponse(recipes)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -78,9 +111,162 @@ async def get_recipes_count(service: RecipeService = Depends(get_recipe_service)
         )
 
 
+@router.get("/facets", response_model=RecipeFacets)
+async def get_recipe_facets(
+    cuisine: Optional[str] = None,
+    is_vegetarian: Optional[bool] = None,
+    max_prep_time: Optional[int] = Query(None, gt=0),
+    difficulty: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    ingredients: Optional[List[str]] = Query(None),
+    search_query: Optional[str] = None,
+    accept_encoding: Optional[str] = Header(None),
+    service: RecipeService = Depends(get_recipe_service)
+):
+    """
+    Get recipe counts per cuisine, difficulty, vegetarian flag, tag and prep-time bucket.
+    
+    Accepts the same optional filters as the search endpoint as query parameters
+    (repeat **tags** / **ingredients** for multiple values). Without filters the
+    counts cover the whole catalog.
+    """
+    try:
+        filters = RecipeSearchFilters(
+            cuisine=cuisine,
+            is_vegetarian=is_vegetarian,
+            max_prep_time=max_prep_time,
+            difficulty=difficulty,
+            tags=tags,
+            ingredients=ingredients,
+            search_query=search_query
+        )
+        cache_key = filters.model_dump_json(exclude_none=True)
+        cached = await facets_cache.get(cache_key)
+        if cached is None:
+            facets = RecipeFacets.model_validate(await service.get_facets(filters))
+            cached = await facets_cache.put(cache_key, facets.model_dump_json().encode())
+        return cached_response(cached, accept_encoding)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting recipe facets: {str(e)}"
+        )
+
+
+@router.post("/batch-get", response_model=RecipeBatchGetResponse)
+async def batch_get_recipes(
+    request: RecipeBatchGetRequest,
+    service: RecipeService = Depends(get_recipe_service)
+):
+    """
+    Get several recipes by ID in one request.
+    
+    - **ids**: Recipe IDs to fetch (up to 100)
+    
+    Recipes are returned in request order; IDs that don't exist are null in
+    **recipes** and listed in **missing**.
+    """
+    try:
+        recipes = await service.get_recipes_by_ids(request.ids)
+        return ORJSONResponse({
+            "recipes": [to_response_dict(recipe) if recipe else None for recipe in recipes],
+            "missing": [recipe_id for recipe_id, recipe in zip(request.ids, recipes) if not recipe]
+        })
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching recipes: {str(e)}"
+        )
+
+
+async def require_streaming():
+    """Dependency rejecting stream requests when RECIPE_STREAM_ENABLED is off."""
+    if not settings.recipe_stream_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipe change stream is disabled on this deployment"
+        )
+
+
+# Checked before the store dependency, so a disabled stream never connects to the database
+@router.get("/stream", dependencies=[Depends(require_streaming)])
+async def stream_recipe_changes(
+    last_event_id: Optional[str] = Header(None),
+    # Starts the change feed, so writes by other instances are streamed too
+    store=Depends(get_recipe_store)
+):
+    """
+    Live recipe changes as Server-Sent Events, for patching a loaded list in place.
+    
+    Each event's data is JSON with:
+    - **op**: "create", "update" or "delete"; "resync" means reload the list
+    - **id**: Recipe ID
+    - **recipe**: The recipe after a create/update (absent when only the ID is
+      known; fetch GET /api/recipes/{id} then)
+    
+    Reconnecting EventSource clients send Last-Event-ID and are sent the events
+    they missed, or "resync".
+    """
+    try:
+        queue = recipe_events.connect(last_event_id)
+    except TooManyClientsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    return StreamingResponse(
+        recipe_events.stream(queue),
+        media_type="text/event-stream",
+        # Tell proxies (nginx) not to buffer events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/shopping-list", response_model=ShoppingListResponse)
+async def get_shopping_list(
+    request: ShoppingListRequest,
+    accept: Optional[str] = Header(None),
+    service: RecipeService = Depends(get_recipe_service)
+):
+    """
+    Build a merged shopping list for a set of recipes.
+    
+    - **recipe_ids**: Recipe IDs in the plan (up to 200)
+    - **servings_multiplier**: Scale factor for ingredient amounts (default: 1)
+    
+    Ingredients are deduplicated by canonical name and grouped by how many
+    recipes need them. Send `Accept: application/x-ndjson` to stream a summary
+    line followed by one line per item instead.
+    """
+    try:
+        shopping_service = ShoppingListService(service)
+        shopping_list = await shopping_service.build_shopping_list(
+            request.recipe_ids,
+            request.servings_multiplier
+        )
+        
+        if accept and "application/x-ndjson" in accept:
+            lines = (
+                orjson.dumps(line) + b"\n"
+                for line in shopping_service.iter_ndjson_lines(shopping_list)
+            )
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
+        items = shopping_list.pop("items")
+        shopping_list["groups"] = shopping_service.group_by_recipe_count(items)
+        return ORJSONResponse(shopping_list)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building shopping list: {str(e)}"
+        )
+
+
 @router.get("/{recipe_id}", response_model=RecipeResponse)
 async def get_recipe(
     recipe_id: str,
+    accept_encoding: Optional[str] = Header(None),
     service: RecipeService = Depends(get_recipe_service)
 ):
     """
@@ -89,13 +275,17 @@ async def get_recipe(
     - **recipe_id**: Recipe ID
     """
     try:
-        recipe = await service.get_recipe_by_id(recipe_id)
-        if not recipe:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Recipe with ID '{recipe_id}' not found"
-            )
-        return recipe
+        cached = await recipe_cache.get(recipe_id)
+        if cached is None:
+            recipe = await service.get_recipe_by_id(recipe_id)
+            if not recipe:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Recipe with ID '{recipe_id}' not found"
+                )
+            cached = await recipe_cache.put(recipe_id, encode_recipe(recipe))
+        service.record_view(recipe_id)
+        return cached_response(cached, accept_encoding)
     except HTTPException:
         raise
     except Exception as e:
@@ -119,6 +309,7 @@ async def update_recipe(
     """
     try:
         updated_recipe = await service.update_recipe(recipe_id, recipe_update)
+        invalidate_recipe(recipe_id)
         if not updated_recipe:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -127,6 +318,11 @@ async def update_recipe(
         return updated_recipe
     except HTTPException:
         raise
+    except ReadOnlyStoreError as e:
+        raise HTTPException(
+            status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -146,6 +342,7 @@ async def delete_recipe(
     """
     try:
         deleted = await service.delete_recipe(recipe_id)
+        invalidate_recipe(recipe_id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -153,6 +350,11 @@ async def delete_recipe(
             )
     except HTTPException:
         raise
+    except ReadOnlyStoreError as e:
+        raise HTTPException(
+            status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -180,7 +382,7 @@ async def search_recipes(
     """
     try:
         recipes = await service.search_recipes(filters)
-        return recipes
+        return RecipeJSONResponse(recipes)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,138 @@
+"""
+Near-neighbour lookups for cached AI answers.
+SemanticCache indexes the token set (e.g. canonical ingredients) behind
+each cached answer, so a request whose set is close enough to an earlier
+one, by Jaccard similarity, reuses that answer: "tomato, onion, paneer" and
+"paneer, onion, tomato, salt" (similarity 0.75) share one model call.
+
+Candidates come from MinHash LSH bands (minhash.py) over each set, so a
+lookup touches only the few sets sharing a band; the exact Jaccard
+similarity of those is then computed from the sets themselves. The answers
+stay in the byte cache passed in (and expire with it); this index only
+maps sets to its keys. The index is per process: with a shared cache,
+another worker's answer is only reused for near matches once this process
+has seen its exact key.
+"""
+from metrics import AI_SEMANTIC_CACHE_LOOKUPS, AI_SEMANTIC_CACHE_SIMILARITY
+from minhash import lsh_bands, set_signature
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+
+# MinHash values per set and rows per LSH band: sets at similarity 0.7 share
+# a band with probability ~0.99998, at 0.3 with ~0.78 (candidates are checked)
+SIGNATURE_SIZE = 32
+BAND_ROWS = 2
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """|a & b| / |a | b|; 1.0 for two empty sets."""
+    union = len(a | b)
+    return len(a & b) / union if union else 1.0
+
+
+class SemanticCache:
+    """
+    Index of cached answers by token set, most recently used first.
+    
+    get() returns the answer for key if cached, else the answer of the most
+    similar indexed set at or above threshold (1 disables near matches).
+    """
+    
+    def __init__(self, name: str, cache: Any, max_entries: int, threshold: float):
+        self.cache = cache
+        self.max_entries = max_entries
+        self.threshold = threshold
+        # key -> (token set, LSH bands)
+        self._entries: "OrderedDict[str, Tuple[FrozenSet[str], List[int]]]" = OrderedDict()
+        self._by_band: Dict[int, Set[str]] = {}
+        self._lookups = {result: AI_SEMANTIC_CACHE_LOOKUPS.labels(name, result) for result in ("exact", "similar", "miss")}
+        self._similarity = AI_SEMANTIC_CACHE_SIMILARITY.labels(name)
+        self.similarity_total = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    async def get(self, key: str, tokens: Iterable[str]) -> Optional[Tuple[bytes, float]]:
+        """(answer, similarity of its set to tokens), or None on a miss."""
+        tokens = frozenset(tokens)
+        value = await self.cache.get_async(key)
+        if value is not None:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Cached by another worker sharing the cache
+                self._index(key, tokens)
+            self._lookups["exact"].inc()
+            self._similarity.observe(1.0)
+            self.similarity_total += 1.0
+            return value, 1.0
+        
+        best_similarity = 0.0
+        if self.threshold < 1:
+            for similarity, candidate in self._candidates(tokens):
+                best_similarity = max(best_similarity, similarity)
+                if similarity < self.threshold:
+                    break
+                value = await self.cache.get_async(candidate)
+                if value is None:
+                    # Expired or evicted from the answer cache
+                    self._remove(candidate)
+                    continue
+                self._entries.move_to_end(candidate)
+                self._lookups["similar"].inc()
+                self._similarity.observe(similarity)
+                self.similarity_total += similarity
+                return value, similarity
+        
+        self._lookups["miss"].inc()
+        self._similarity.observe(best_similarity)
+        self.similarity_total += best_similarity
+        return None
+    
+    async def put(self, key: str, tokens: Iterable[str], value: bytes) -> None:
+        """Cache an answer and index its token set."""
+        await self.cache.put_async(key, value)
+        self._index(key, frozenset(tokens))
+    
+    def _index(self, key: str, tokens: FrozenSet[str]) -> None:
+        self._remove(key)
+        bands = lsh_bands(set_signature(tokens, SIGNATURE_SIZE), BAND_ROWS)
+        self._entries[key] = (tokens, bands)
+        for band in bands:
+            self._by_band.setdefault(band, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_band.clear()
+    
+    def _candidates(self, tokens: FrozenSet[str]) -> List[Tuple[float, str]]:
+        """Indexed sets sharing a band with tokens, most similar first."""
+        keys = set()
+        for band in lsh_bands(set_signature(tokens, SIGNATURE_SIZE), BAND_ROWS):
+            keys.update(self._by_band.get(band, ()))
+        return sorted(((jaccard(tokens, self._entries[key][0]), key) for key in keys), reverse=True)
+    
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in entry[1]:
+            keys = self._by_band.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_band[band]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Index size and lookup counts for this process."""
+        lookups = {result: child.get() for result, child in self._lookups.items()}
+        total = sum(lookups.values())
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "lookups": lookups,
+            "hit_ratio": round((lookups["exact"] + lookups["similar"]) / total, 4) if total else None,
+            "mean_similarity": round(self.similarity_total / total, 4) if total else None
+        }
@@ -2,55 +2,186 @@
 AI service integration for recipe suggestions and simplification.
 Uses Google Gemini API (Free tier with 60 requests/minute).
 Get your free API key from: https://makersuite.google.com/app/apikey
+
+The Gemini SDK (grpc, protobuf, google-auth) is imported on first AI use
+rather than at module import, so cold starts that never touch AI routes
+don't pay for it.
+
+Successful model answers are cached by normalized request (host-wide when
+shared_cache_path is set); fallback answers are not cached. Suggestions are
+also reused for similar ingredient sets (semantic_cache.py), so adding
+"salt" or reordering ingredients doesn't cost another model call.
+
+Prompts come from services/prompts.py, and every model call runs with its
+feature's generation limits and records prompt/output tokens and time per
+output token.
 """
-import google.generativeai as genai
 from config import settings
-from typing import List, Optional
+from metrics import (
+    AI_MODEL_CALL_DURATION, AI_RESPONSES, AI_RESPONSE_DURATION,
+    AI_TOKENS, AI_CALL_TOKENS, AI_SECONDS_PER_OUTPUT_TOKEN, AI_PROMPT_TRUNCATIONS
+)
+from semantic_cache import SemanticCache
+from services.prompts import estimate_tokens, fit_to_budget, render_prompt
+from services.shopping_list_service import canonical_ingredient
+from shared_cache import build_cache
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Gemini model used for all AI features
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+
+# Metric children bound once at import: model call outcome -> histogram,
+# (feature, source) -> (counter, histogram)
+_MODEL_CALL_METRICS = {outcome: AI_MODEL_CALL_DURATION.labels(outcome) for outcome in ("success", "empty", "error")}
+_RESPONSE_METRICS = {
+    (feature, source): (AI_RESPONSES.labels(feature, source), AI_RESPONSE_DURATION.labels(feature, source))
+    for feature in ("suggest", "simplify")
+    for source in ("ai", "cache", "fallback")
+}
+# feature -> token kind -> (total counter, per-call histogram), and seconds per output token
+_TOKEN_METRICS = {
+    feature: {kind: (AI_TOKENS.labels(feature, kind), AI_CALL_TOKENS.labels(feature, kind)) for kind in ("prompt", "output")}
+    for feature in ("suggest", "simplify")
+}
+_PER_TOKEN_METRICS = {feature: AI_SECONDS_PER_OUTPUT_TOKEN.labels(feature) for feature in ("suggest", "simplify")}
+
+
+def _generation_config(max_output_tokens: int, temperature: Optional[float]) -> Dict[str, Any]:
+    """Gemini generation_config with the output token limit and, when set, the temperature."""
+    config: Dict[str, Any] = {"max_output_tokens": max_output_tokens}
+    if temperature is not None:
+        config["temperature"] = temperature
+    return config
+
+
+# Gemini generation limits per feature
+GENERATION_CONFIGS = {
+    "suggest": _generation_config(settings.ai_suggest_max_output_tokens, settings.ai_suggest_temperature),
+    "simplify": _generation_config(settings.ai_simplify_max_output_tokens, settings.ai_simplify_temperature),
+}
+
+# Model answers by cache_key()
+ai_cache = build_cache("ai_response", settings.ai_cache_size, settings.ai_cache_ttl_s)
+# Suggestion answers in ai_cache, indexed by canonical ingredient set
+suggestion_cache = SemanticCache("suggest", ai_cache, settings.ai_cache_size, settings.ai_similarity_threshold)
+
+
+def cache_key(feature: str, *parts: str) -> str:
+    """Cache key for a feature's request parts."""
+    return f"{feature}:" + hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _record_tokens(feature: str, prompt_tokens: int, output_tokens: int, elapsed_s: float) -> None:
+    """Count a model call's tokens and its latency per output token."""
+    for kind, tokens in (("prompt", prompt_tokens), ("output", output_tokens)):
+        counter, histogram = _TOKEN_METRICS[feature][kind]
+        counter.inc(tokens)
+        histogram.observe(tokens)
+    if output_tokens:
+        _PER_TOKEN_METRICS[feature].observe(elapsed_s / output_tokens)
+
+
+def _record_response(feature: str, source: str, started: float) -> None:
+    """Count an AI feature response and its latency by source (ai or fallback)."""
+    counter, histogram = _RESPONSE_METRICS[(feature, source)]
+    counter.inc()
+    histogram.observe(time.perf_counter() - started)
+
 
 class AIService:
     """Service class for AI operations using Google Gemini."""
     
+    # Configured model shared by all instances in the process; built on first use
+    _model: Any = None
+    _model_lock = threading.Lock()
+    _model_failed = False
+    
     def __init__(self):
         self.api_key = settings.gemini_api_key
-        self.api_available = False
+        self.api_available = bool(self.api_key) and not AIService._model_failed
         
-        if self.api_key:
-            try:
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel('gemini-2.5-flash')
-                self.api_available = True
-                logger.info("✅ Google Gemini API configured successfully (gemini-2.5-flash)")
-            except Exception as e:
-                logger.error(f"❌ Failed to configure Gemini API: {e}")
-                logger.warning("Using intelligent fallback system")
-        else:
+        if not self.api_key:
             logger.warning("No Gemini API key found. Using fallback responses.")
             logger.info("Get free API key from: https://makersuite.google.com/app/apikey")
     
-    def _query_model(self, prompt: str) -> Optional[str]:
+    @property
+    def model(self) -> Any:
+        """Gemini model, importing and configuring the SDK on first access."""
+        if not self.api_key:
+            return None
+        if AIService._model is None and not AIService._model_failed:
+            with AIService._model_lock:
+                if AIService._model is None and not AIService._model_failed:
+                    try:
+                        import google.generativeai as genai
+                        
+                        if settings.gemini_api_endpoint:
+                            genai.configure(
+                                api_key=self.api_key,
+                                transport="rest",
+                                client_options={"api_endpoint": settings.gemini_api_endpoint}
+                            )
+                        else:
+                            genai.configure(api_key=self.api_key)
+                        AIService._model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+                        logger.info("✅ Google Gemini API configured successfully (%s)", GEMINI_MODEL_NAME)
+                    except Exception as e:
+                        AIService._model_failed = True
+                        logger.error("❌ Failed to configure Gemini API: %s", e)
+                        logger.warning("Using intelligent fallback system")
+        
+        if AIService._model is None:
+            self.api_available = False
+        return AIService._model
+    
+    async def _query_model(self, prompt: str, feature: str) -> Optional[str]:
         """
         Query Google Gemini AI model with error handling.
         
+        The SDK call blocks for the whole model round trip, and the first
+        one also imports the SDK, so both run on a worker thread to keep
+        other requests moving.
+        
         Args:
             prompt: The prompt to send to the AI model
+            feature: AI feature ("suggest" or "simplify"), selecting its
+                generation config and token metrics
             
         Returns:
             AI response text or None if error
         """
-        if not self.api_available:
+        model = AIService._model
+        if model is None and self.api_available:
+            model = await asyncio.to_thread(lambda: self.model)
+        if not self.api_available or model is None:
             return None
         
+        started = time.perf_counter()
         try:
-            response = self.model.generate_content(prompt)
+            response = await asyncio.to_thread(model.generate_content, prompt, generation_config=GENERATION_CONFIGS[feature])
             if response and response.text:
+                elapsed = time.perf_counter() - started
+                _MODEL_CALL_METRICS["success"].observe(elapsed)
+                usage = getattr(response, "usage_metadata", None)
+                _record_tokens(
+                    feature,
+                    getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt),
+                    getattr(usage, "candidates_token_count", 0) or estimate_tokens(response.text),
+                    elapsed
+                )
                 return response.text.strip()
+            _MODEL_CALL_METRICS["empty"].observe(time.perf_counter() - started)
             return None
         except Exception as e:
-            logger.error(f"Error querying Gemini API: {e}")
+            _MODEL_CALL_METRICS["error"].observe(time.perf_counter() - started)
+            logger.error("Error querying Gemini API: %s", e)
             return None
     
     async def suggest_recipe(self, ingredients: List[str]) -> Optional[str]:
@@ -63,35 +194,39 @@ class AIService:
         Returns:
             Recipe suggestion as text or fallback if API unavailable
         """
+        started = time.perf_counter()
         try:
-            ingredients_str = ", ".join(ingredients)
+            # The same ingredients in any order, case or plural get the cached
+            # answer, and a similar enough set gets its closest one's
+            canonical = sorted({canonical_ingredient(ingredient) for ingredient in ingredients} - {""})
+            key = cache_key("suggest", *canonical)
+            cached = await suggestion_cache.get(key, canonical)
+            if cached is not None:
+                answer, similarity = cached
+                if similarity < 1:
+                    logger.info("Reusing suggestion for a similar ingredient set (similarity %.2f)", similarity)
+                _record_response("suggest", "cache", started)
+                return answer.decode()
             
-            prompt = f"""You are a helpful cooking assistant. Based on the following ingredients, suggest ONE simple and delicious recipe.
-
-Available ingredients: {ingredients_str}
-
-Please provide:
-1. Recipe name (catchy and descriptive)
-2. Brief description (1-2 sentences)
-3. Additional ingredients needed (if any)
-4. Simple step-by-step instructions (maximum 6 steps)
-5. Estimated prep and cook time
-6. Difficulty level (Easy/Medium/Hard)
-
-Keep the response well-formatted, concise, and practical for home cooking."""
+            ingredients_str = ", ".join(ingredients)
+            prompt = render_prompt("suggest", ingredients=ingredients_str)
             
-            logger.info(f"Generating recipe suggestion for ingredients: {ingredients_str}")
-            result = self._query_model(prompt)
+            logger.info("Generating recipe suggestion for ingredients: %s", ingredients_str)
+            result = await self._query_model(prompt, "suggest")
             
             if result:
                 logger.info("✅ Successfully generated AI recipe suggestion")
+                await suggestion_cache.put(key, canonical, result.encode())
+                _record_response("suggest", "ai", started)
                 return result
             else:
                 logger.warning("AI API unavailable, using fallback")
+                _record_response("suggest", "fallback", started)
                 return self._fallback_suggestion(ingredients)
                 
         except Exception as e:
-            logger.error(f"Error in suggest_recipe: {e}")
+            logger.error("Error in suggest_recipe: %s", e)
+            _record_response("suggest", "fallback", started)
             return self._fallback_suggestion(ingredients)
     
     async def simplify_recipe(self, recipe_name: str, instructions: str) -> Optional[str]:
@@ -105,35 +240,37 @@ Keep the response well-formatted, concise, and practical for home cooking."""
         Returns:
             Simplified instructions or fallback if API unavailable
         """
+        started = time.perf_counter()
         try:
-            prompt = f"""You are a friendly cooking teacher helping a complete beginner. Simplify these recipe instructions in an encouraging way.
-
-Recipe: {recipe_name}
-
-Original Instructions:
-{instructions}
-
-Please provide:
-1. Simplified, beginner-friendly instructions with clear, simple language
-2. Exact timing and measurements explained
-3. Helpful tips and common mistakes to avoid
-4. What to look for (visual and sensory cues)
-5. Maximum 6 easy-to-follow steps
-
-Make it encouraging and build confidence. Format clearly with proper structure."""
+            key = cache_key("simplify", recipe_name, instructions)
+            cached = await ai_cache.get_async(key)
+            if cached is not None:
+                _record_response("simplify", "cache", started)
+                return cached.decode()
+            
+            # Long instructions are cut to the budget; the cache key keeps the full text
+            compacted, truncated = fit_to_budget(instructions, settings.ai_simplify_instruction_budget)
+            if truncated:
+                AI_PROMPT_TRUNCATIONS.labels("simplify").inc()
+                logger.info("Cut instructions of %s to %d tokens", recipe_name, settings.ai_simplify_instruction_budget)
+            prompt = render_prompt("simplify", recipe_name=recipe_name, instructions=compacted)
             
-            logger.info(f"Simplifying recipe: {recipe_name}")
-            result = self._query_model(prompt)
+            logger.info("Simplifying recipe: %s", recipe_name)
+            result = await self._query_model(prompt, "simplify")
             
             if result:
                 logger.info("✅ Successfully simplified recipe with AI")
+                await ai_cache.put_async(key, result.encode())
+                _record_response("simplify", "ai", started)
                 return result
             else:
                 logger.warning("AI API unavailable, using fallback")
+                _record_response("simplify", "fallback", started)
                 return self._fallback_simplification(recipe_name, instructions)
                 
         except Exception as e:
-            logger.error(f"Error in simplify_recipe: {e}")
+            logger.error("Error in simplify_recipe: %s", e)
+            _record_response("simplify", "fallback", started)
             return self._fallback_simplification(recipe_name, instructions)
     
     def _fallback_suggestion(self, ingredients: List[str]) -> str:
@@ -0,0 +1,104 @@
+"""
+Request batching for POST /api/batch.
+Runs each sub-request through the ASGI app in-process and concurrently, so
+a page that needs several independent calls (list, count, AI health) pays
+for one round trip instead of one per call. Sub-requests pass through the
+whole middleware stack, so admission control, rate limits and metrics
+apply to each as if it had been sent on its own, and they share the
+process's database client and connection pool.
+"""
+from models import BatchSubRequest
+from typing import Any, Dict, List, Tuple
+import asyncio
+import logging
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Longest a single sub-request may run before it is answered with 504
+SUB_REQUEST_TIMEOUT_S = 30
+
+# Parent headers not passed on: they describe the batch body, or would get
+# sub-responses compressed only to be embedded in the batch response
+_DROPPED_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"transfer-encoding", b"expect"}
+
+# (status, content type, body)
+SubResponse = Tuple[int, bytes, bytes]
+
+
+class BatchService:
+    """Service running batched sub-requests against an ASGI app."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def run(self, requests: List[BatchSubRequest], parent_scope: Dict[str, Any]) -> List[SubResponse]:
+        """Run sub-requests concurrently; responses are in request order."""
+        headers = [(name, value) for name, value in parent_scope["headers"] if name not in _DROPPED_HEADERS]
+        return await asyncio.gather(*(self._call(request, parent_scope, headers) for request in requests))
+    
+    async def _call(self, request: BatchSubRequest, parent_scope: Dict[str, Any], headers: list) -> SubResponse:
+        path, _, query = request.path.partition("?")
+        body = b"" if request.body is None else orjson.dumps(request.body)
+        if body:
+            headers = headers + [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        scope = {
+            "type": "http",
+            "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+            "http_version": parent_scope.get("http_version", "1.1"),
+            "method": request.method,
+            "scheme": parent_scope.get("scheme", "http"),
+            "server": parent_scope.get("server"),
+            "client": parent_scope.get("client"),
+            "root_path": parent_scope.get("root_path", ""),
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": headers,
+        }
+        
+        body_sent = False
+        
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The sub-client never disconnects; streamed responses stop waiting once done
+            await asyncio.Event().wait()
+        
+        status_code, content_type, chunks = 500, b"", []
+        
+        async def send(message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    if name == b"content-type":
+                        content_type = value
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+        
+        try:
+            await asyncio.wait_for(self.app(scope, receive, send), SUB_REQUEST_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            return 504, b"application/json", b'{"detail":"Sub-request timed out"}'
+        except Exception as e:
+            # The app has already answered 500; the rest of the batch goes on
+            logger.error("Error in batched %s %s: %s", request.method, path, e)
+        return status_code, content_type, b"".join(chunks)
+
+
+def encode_batch_response(responses: List[SubResponse]) -> bytes:
+    """BatchResponse JSON, embedding JSON sub-response bodies as-is rather than re-encoding them."""
+    items = []
+    for status_code, content_type, body in responses:
+        item = b'{"status":' + str(status_code).encode()
+        if body:
+            if content_type.startswith(b"application/json"):
+                item += b',"body":' + body
+            else:
+                item += b',"body":' + orjson.dumps(body.decode("utf-8", "replace"))
+        items.append(item + b"}")
+    return b'{"responses":[' + b",".join(items) + b"]}"
@@ -0,0 +1,166 @@
+"""
+Near-duplicate recipe detection.
+Every recipe is stored with a MinHash fingerprint (minhash.py): its
+signature and LSH band keys. A new recipe is checked by reading only the
+recipes sharing one of its bands through the store's band index, then
+comparing signatures, so the check costs a few indexed reads whatever the
+catalog size. The duplicate report groups recipes from the same index.
+"""
+from config import settings
+from minhash import decode_signature, fingerprint, lsh_bands, signature, similarity
+from storage.base import RecipeStore
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Candidates read per lookup; near-duplicates of one recipe are rarely more
+CANDIDATE_LIMIT = 200
+# Band buckets examined by the report, and members compared per bucket
+REPORT_BUCKET_LIMIT = 5000
+REPORT_BUCKET_SIZE = 50
+# Recipes fingerprinted per page by backfill()
+BACKFILL_BATCH_SIZE = 500
+
+
+class DuplicateRecipeError(Exception):
+    """
+    Raised by RecipeService.create_recipe when a new recipe nearly duplicates
+    existing ones. merged is the existing recipe it was folded into, when
+    NEAR_DUPLICATE_MODE is "merge".
+    """
+    
+    def __init__(self, duplicates: List[Dict[str, Any]], merged: Optional[Dict[str, Any]] = None):
+        super().__init__(f"Recipe nearly duplicates {len(duplicates)} existing recipe(s)")
+        self.duplicates = duplicates
+        self.merged = merged
+
+
+class _Clusters:
+    """Union-find over recipe IDs."""
+    
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+    
+    def find(self, recipe_id: str) -> str:
+        root = self.parent.setdefault(recipe_id, recipe_id)
+        while root != self.parent[root]:
+            self.parent[root] = self.parent[self.parent[root]]
+            root = self.parent[root]
+        return root
+    
+    def union(self, a: str, b: str) -> None:
+        self.parent[self.find(a)] = self.find(b)
+
+
+class DedupeService:
+    """Service class for finding near-duplicate recipes."""
+    
+    def __init__(self, store: RecipeStore, threshold: Optional[float] = None):
+        self.store = store
+        self.threshold = settings.near_duplicate_threshold if threshold is None else threshold
+    
+    async def find_duplicates(
+        self,
+        recipe: Dict[str, Any],
+        limit: int = 5,
+        exclude_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Existing recipes at least threshold similar to recipe, most similar first."""
+        try:
+            values = decode_signature(recipe.get("minhash")) or signature(recipe)
+            candidates = await self.store.find_by_lsh_bands(lsh_bands(values), CANDIDATE_LIMIT)
+            
+            duplicates = []
+            for candidate in candidates:
+                other = decode_signature(candidate.get("minhash"))
+                if candidate["_id"] == exclude_id or other is None:
+                    continue
+                score = similarity(values, other)
+                if score >= self.threshold:
+                    duplicates.append({"_id": candidate["_id"], "name": candidate.get("name"), "similarity": round(score, 3)})
+            duplicates.sort(key=lambda duplicate: -duplicate["similarity"])
+            return duplicates[:limit]
+        except Exception as e:
+            logger.error("Error finding duplicate recipes: %s", e)
+            raise
+    
+    async def report(self, limit: int = 100) -> Dict[str, Any]:
+        """
+        Groups of near-duplicate recipes across the catalog.
+        
+        Recipes sharing an LSH band are compared pairwise and pairs at or
+        above threshold joined into groups, largest first.
+        """
+        try:
+            buckets = await self.store.lsh_buckets(REPORT_BUCKET_LIMIT)
+            recipe_ids = list(dict.fromkeys(recipe_id for bucket in buckets for recipe_id in bucket[:REPORT_BUCKET_SIZE]))
+            recipes = {}
+            for start in range(0, len(recipe_ids), BACKFILL_BATCH_SIZE):
+                for recipe in await self.store.get_many(recipe_ids[start:start + BACKFILL_BATCH_SIZE], ["name", "minhash"]):
+                    values = decode_signature(recipe.get("minhash")) if recipe else None
+                    if values is not None:
+                        recipes[recipe["_id"]] = (recipe.get("name"), values)
+            
+            clusters = _Clusters()
+            scores: Dict[str, float] = {}
+            compared = set()
+            for bucket in buckets:
+                members = [recipe_id for recipe_id in bucket[:REPORT_BUCKET_SIZE] if recipe_id in recipes]
+                for i, a in enumerate(members):
+                    for b in members[i + 1:]:
+                        pair = (a, b) if a < b else (b, a)
+                        if pair in compared:
+                            continue
+                        compared.add(pair)
+                        score = similarity(recipes[a][1], recipes[b][1])
+                        if score >= self.threshold:
+                            clusters.union(a, b)
+                            for recipe_id in pair:
+                                scores[recipe_id] = max(scores.get(recipe_id, 0.0), score)
+            
+            groups: Dict[str, List[str]] = {}
+            for recipe_id in scores:
+                groups.setdefault(clusters.find(recipe_id), []).append(recipe_id)
+            ordered = sorted(groups.values(), key=len, reverse=True)[:limit]
+            return {
+                "threshold": self.threshold,
+                "buckets_examined": len(buckets),
+                "pairs_compared": len(compared),
+                "groups": [
+                    {
+                        "size": len(group),
+                        "recipes": [
+                            {"_id": recipe_id, "name": recipes[recipe_id][0], "similarity": round(scores[recipe_id], 3)}
+                            for recipe_id in group
+                        ]
+                    }
+                    for group in ordered
+                ]
+            }
+        except Exception as e:
+            logger.error("Error building duplicate report: %s", e)
+            raise
+    
+    async def backfill(self) -> int:
+        """
+        Fingerprint stored recipes that have none (e.g. imported directly); returns how many.
+        
+        Pages continue from the last recipe ID rather than skipping, and each
+        page is written in one bulk update.
+        """
+        try:
+            updated = 0
+            after_id = None
+            while True:
+                page = await self.store.find_unfingerprinted(after_id, BACKFILL_BATCH_SIZE)
+                if page:
+                    updated += await self.store.set_fingerprints({recipe["_id"]: fingerprint(recipe) for recipe in page})
+                    after_id = page[-1]["_id"]
+                if len(page) < BACKFILL_BATCH_SIZE:
+                    break
+            logger.info("Fingerprinted %s recipes for near-duplicate detection", updated)
+            return updated
+        except Exception as e:
+            logger.error("Error backfilling recipe fingerprints: %s", e)
+            raise
@@ -0,0 +1,371 @@
+"""
+Meal plan service.
+Picks a set of recipes that satisfies prep-time, vegetarian, cuisine and
+difficulty constraints while maximizing ingredient reuse.
+"""
+from models import MealPlanRequest, DIFFICULTY_LEVELS
+from services.shopping_list_service import canonical_ingredient
+from storage.base import RecipeStore
+from typing import List, Optional, Dict, Any, Tuple
+from collections import Counter
+import asyncio
+import itertools
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of candidate recipes loaded for one plan
+CANDIDATE_LIMIT = 2000
+
+# Maximum number of greedy restarts before switching to local search
+MAX_GREEDY_STARTS = 64
+
+# Share of the latency budget spent on greedy restarts; the rest goes to local search
+GREEDY_BUDGET_SHARE = 0.4
+
+# Candidates scanned between deadline checks in the optimizer's inner loops
+DEADLINE_CHECK_INTERVAL = 256
+
+CANDIDATE_FIELDS = ["name", "cuisine", "is_vegetarian", "prep_time_minutes", "difficulty", "ingredients"]
+
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:
+    def _popcount(value: int) -> int:
+        """Count set bits (int.bit_count needs Python 3.10)."""
+        return bin(value).count("1")
+
+
+class MealPlanOptimizer:
+    """
+    Constraint-aware optimizer over a fixed list of candidate recipes.
+    
+    Each candidate's ingredients are encoded as an int bitset so the size of
+    a plan's merged shopping list is a popcount of OR-ed masks. Plans are
+    compared by (constraint violations, prep-time overrun, distinct
+    ingredients, total prep time), lower being better. The search runs
+    greedy constructions from several seeds, then improves the best plan
+    with single-recipe swaps until no swap helps or the deadline passes.
+    When the deadline passes mid-construction, the plan is filled with the
+    first unused candidates (fastest first) so a full-size plan comes back.
+    """
+    
+    def __init__(self, candidates: List[Dict[str, Any]], request: MealPlanRequest):
+        self.candidates = candidates
+        self.recipe_count = request.recipe_count
+        self.size = min(request.recipe_count, len(candidates))
+        self.budget = request.max_total_prep_minutes
+        self.veg_needed = math.ceil(request.min_vegetarian_ratio * request.recipe_count - 1e-9)
+        self.cuisine_cap = request.max_per_cuisine
+        self.difficulty_caps = request.difficulty_caps
+        
+        # Raw ingredient strings repeat across candidates; parse each once
+        ingredient_bits: Dict[str, int] = {}
+        raw_masks: Dict[str, int] = {}
+        self.masks: List[int] = []
+        for candidate in candidates:
+            mask = 0
+            for ingredient in candidate.get("ingredients") or []:
+                bit_mask = raw_masks.get(ingredient)
+                if bit_mask is None:
+                    bit = ingredient_bits.setdefault(canonical_ingredient(ingredient), len(ingredient_bits))
+                    bit_mask = raw_masks[ingredient] = 1 << bit
+                mask |= bit_mask
+            self.masks.append(mask)
+        
+        self.prep = [candidate.get("prep_time_minutes") or 0 for candidate in candidates]
+        self.veg = [bool(candidate.get("is_vegetarian")) for candidate in candidates]
+        self.cuisine = [str(candidate.get("cuisine", "")).lower() for candidate in candidates]
+        self.difficulty = [candidate.get("difficulty") for candidate in candidates]
+        self.min_prep = min(self.prep) if self.prep else 0
+    
+    def optimize(self, deadline: float) -> Tuple[List[int], bool]:
+        """
+        Search for the best plan before the perf_counter() deadline.
+        
+        Returns the indices of the picked candidates and whether the
+        deadline cut the search short.
+        """
+        if self.size == 0:
+            return [], False
+        
+        start = time.perf_counter()
+        greedy_deadline = start + max(0.0, deadline - start) * GREEDY_BUDGET_SHARE
+        
+        best_plan: Optional[List[int]] = None
+        best_score = None
+        for seed in self._seed_order(deadline)[:MAX_GREEDY_STARTS]:
+            # The first construction may use the whole budget; later restarts only the greedy share
+            plan, complete = self._greedy(seed, deadline if best_plan is None else greedy_deadline)
+            if not complete:
+                if best_plan is None:
+                    return self._fill(plan), True
+                break
+            score = self._score(plan)
+            if best_score is None or score < best_score:
+                best_plan, best_score = plan, score
+            if time.perf_counter() >= greedy_deadline:
+                break
+        
+        return self._local_search(best_plan, best_score, deadline)
+    
+    def score_plan(self, plan: List[int]) -> Dict[str, Any]:
+        """Summarize a plan for the API response; plans short of recipe_count are infeasible."""
+        violations, overrun, distinct, total_prep = self._score(plan)
+        return {
+            "feasible": violations == 0 and overrun == 0 and len(plan) == self.recipe_count,
+            "total_prep_minutes": total_prep,
+            "vegetarian_count": sum(self.veg[i] for i in plan),
+            "cuisines": dict(Counter(self.candidates[i].get("cuisine") for i in plan)),
+            "distinct_ingredients": distinct
+        }
+    
+    def _seed_order(self, deadline: float) -> List[int]:
+        """
+        Order candidates so recipes built from common ingredients are tried first.
+        
+        Falls back to load order (fastest first) when the deadline passes.
+        """
+        frequency: Counter = Counter()
+        for position, mask in enumerate(self.masks):
+            if position % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline:
+                return list(range(len(self.candidates)))
+            while mask:
+                low = mask & -mask
+                frequency[low] += 1
+                mask ^= low
+        
+        def commonness(index: int) -> float:
+            mask = self.masks[index]
+            total = count = 0
+            while mask:
+                low = mask & -mask
+                total += frequency[low]
+                count += 1
+                mask ^= low
+            return total / count if count else 0
+        
+        return sorted(range(len(self.candidates)), key=lambda i: (-commonness(i), self.prep[i]))
+    
+    def _cap_excess(self, counts: Counter, key: Any, cap: Optional[int]) -> int:
+        """Extra violations caused by adding one more recipe under a capped key."""
+        return 1 if cap is not None and counts[key] >= cap else 0
+    
+    def _greedy(self, seed: int, deadline: float) -> Tuple[List[int], bool]:
+        """
+        Build a plan from a seed by repeatedly adding the cheapest feasible recipe.
+        
+        Returns the plan and whether it was completed before the deadline.
+        """
+        plan = [seed]
+        in_plan = {seed}
+        union = self.masks[seed]
+        prep = self.prep[seed]
+        veg = int(self.veg[seed])
+        cuisines = Counter([self.cuisine[seed]])
+        difficulties = Counter([self.difficulty[seed]])
+        
+        while len(plan) < self.size:
+            slots_left = self.size - len(plan) - 1
+            best = None
+            best_key = None
+            for index in range(len(self.candidates)):
+                if index % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline:
+                    return plan, False
+                if index in in_plan:
+                    continue
+                
+                violations = (
+                    self._cap_excess(cuisines, self.cuisine[index], self.cuisine_cap)
+                    + self._cap_excess(difficulties, self.difficulty[index], self.difficulty_caps.get(self.difficulty[index]))
+                    + max(0, self.veg_needed - veg - self.veg[index] - slots_left)
+                )
+                overrun = 0
+                if self.budget is not None:
+                    overrun = max(0, prep + self.prep[index] + slots_left * self.min_prep - self.budget)
+                key = (violations, overrun, _popcount(self.masks[index] & ~union), self.prep[index])
+                if best_key is None or key < best_key:
+                    best, best_key = index, key
+                    if key[:3] == (0, 0, 0):
+                        break
+            
+            plan.append(best)
+            in_plan.add(best)
+            union |= self.masks[best]
+            prep += self.prep[best]
+            veg += self.veg[best]
+            cuisines[self.cuisine[best]] += 1
+            difficulties[self.difficulty[best]] += 1
+        
+        return plan, True
+    
+    def _fill(self, plan: List[int]) -> List[int]:
+        """Complete a partial plan with the first candidates not already in it."""
+        in_plan = set(plan)
+        filler = (index for index in range(len(self.candidates)) if index not in in_plan)
+        return plan + list(itertools.islice(filler, self.size - len(plan)))
+    
+    def _score(self, plan: List[int]) -> Tuple[int, int, int, int]:
+        """Score a complete plan; lower tuples are better."""
+        union = 0
+        for index in plan:
+            union |= self.masks[index]
+        total_prep = sum(self.prep[index] for index in plan)
+        cuisines = Counter(self.cuisine[index] for index in plan)
+        difficulties = Counter(self.difficulty[index] for index in plan)
+        
+        violations = max(0, self.veg_needed - sum(self.veg[index] for index in plan))
+        if self.cuisine_cap is not None:
+            violations += sum(max(0, count - self.cuisine_cap) for count in cuisines.values())
+        for level, cap in self.difficulty_caps.items():
+            violations += max(0, difficulties[level] - cap)
+        overrun = max(0, total_prep - self.budget) if self.budget is not None else 0
+        
+        return violations, overrun, _popcount(union), total_prep
+    
+    def _local_search(self, plan: List[int], score: Tuple, deadline: float) -> Tuple[List[int], bool]:
+        """
+        Improve a plan with single-recipe swaps until a local optimum or the deadline.
+        
+        For each position the rest of the plan is summarized once, so every
+        replacement candidate is scored in constant time.
+        """
+        plan = list(plan)
+        improved = True
+        while improved:
+            improved = False
+            for position in range(len(plan)):
+                if time.perf_counter() >= deadline:
+                    return plan, True
+                
+                others = plan[:position] + plan[position + 1:]
+                union = 0
+                for index in others:
+                    union |= self.masks[index]
+                prep = sum(self.prep[index] for index in others)
+                veg = sum(self.veg[index] for index in others)
+                cuisines = Counter(self.cuisine[index] for index in others)
+                difficulties = Counter(self.difficulty[index] for index in others)
+                
+                base_violations = 0
+                if self.cuisine_cap is not None:
+                    base_violations += sum(max(0, count - self.cuisine_cap) for count in cuisines.values())
+                for level, cap in self.difficulty_caps.items():
+                    base_violations += max(0, difficulties[level] - cap)
+                
+                in_plan = set(plan)
+                best = None
+                for index in range(len(self.candidates)):
+                    if index in in_plan:
+                        continue
+                    violations = (
+                        base_violations
+                        + self._cap_excess(cuisines, self.cuisine[index], self.cuisine_cap)
+                        + self._cap_excess(difficulties, self.difficulty[index], self.difficulty_caps.get(self.difficulty[index]))
+                        + max(0, self.veg_needed - veg - self.veg[index])
+                    )
+                    total_prep = prep + self.prep[index]
+                    overrun = max(0, total_prep - self.budget) if self.budget is not None else 0
+                    candidate_score = (violations, overrun, _popcount(union | self.masks[index]), total_prep)
+                    if candidate_score < score:
+                        best, score = index, candidate_score
+                
+                if best is not None:
+                    plan[position] = best
+                    improved = True
+        return plan, False
+
+
+class MealPlanService:
+    """Service class for meal plan generation."""
+    
+    def __init__(self, store: RecipeStore):
+        self.store = store
+    
+    async def generate_plan(self, request: MealPlanRequest) -> Dict[str, Any]:
+        """Generate a meal plan within the request's latency budget."""
+        try:
+            start = time.perf_counter()
+            deadline = start + request.time_budget_ms / 1000
+            
+            candidates = await self._fetch_candidates(request)
+            
+            # Encoding and search are CPU-bound; keep both off the event loop and within the budget
+            loop = asyncio.get_running_loop()
+            optimizer, plan, timed_out = await loop.run_in_executor(None, self._optimize, candidates, request, deadline)
+            
+            result = optimizer.score_plan(plan)
+            result.update({
+                "recipes": [self._summary(candidates[index]) for index in plan],
+                "candidates_considered": len(candidates),
+                "timed_out": timed_out,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+            })
+            
+            logger.info(
+                "Generated meal plan with %d recipes from %d candidates in %sms",
+                len(plan), len(candidates), result["elapsed_ms"]
+            )
+            return result
+        except Exception as e:
+            logger.error("Error generating meal plan: %s", e)
+            raise
+    
+    @staticmethod
+    def _optimize(
+        candidates: List[Dict[str, Any]],
+        request: MealPlanRequest,
+        deadline: float
+    ) -> Tuple[MealPlanOptimizer, List[int], bool]:
+        """Build the optimizer and search, both counted against the deadline."""
+        optimizer = MealPlanOptimizer(candidates, request)
+        plan, timed_out = optimizer.optimize(deadline)
+        return optimizer, plan, timed_out
+    
+    async def _fetch_candidates(self, request: MealPlanRequest) -> List[Dict[str, Any]]:
+        """
+        Load candidate recipes with indexed filters.
+        
+        A recipe can't fit if it alone exceeds the prep budget left after
+        giving every other slot at least one minute, and levels above
+        max_difficulty or capped at zero are excluded. Candidates are read
+        in prep-time order; when a vegetarian share is required, vegetarian
+        and other recipes are loaded separately so both are represented.
+        """
+        max_prep_time = None
+        if request.max_total_prep_minutes is not None:
+            max_prep_time = request.max_total_prep_minutes - (request.recipe_count - 1)
+        
+        levels = DIFFICULTY_LEVELS
+        if request.max_difficulty:
+            levels = levels[:levels.index(request.max_difficulty) + 1]
+        levels = [level for level in levels if request.difficulty_caps.get(level, 1) > 0]
+        difficulties = levels if len(levels) < len(DIFFICULTY_LEVELS) else None
+        
+        if request.min_vegetarian_ratio >= 1:
+            return await self._find_candidates(max_prep_time, difficulties, True, CANDIDATE_LIMIT)
+        if request.min_vegetarian_ratio > 0:
+            vegetarian, other = await asyncio.gather(
+                self._find_candidates(max_prep_time, difficulties, True, CANDIDATE_LIMIT // 2),
+                self._find_candidates(max_prep_time, difficulties, False, CANDIDATE_LIMIT // 2)
+            )
+            return vegetarian + other
+        return await self._find_candidates(max_prep_time, difficulties, None, CANDIDATE_LIMIT)
+    
+    async def _find_candidates(
+        self,
+        max_prep_time: Optional[int],
+        difficulties: Optional[List[str]],
+        is_vegetarian: Optional[bool],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Run one candidate query, fastest recipes first."""
+        return await self.store.find_plan_candidates(max_prep_time, difficulties, is_vegetarian, CANDIDATE_FIELDS, limit)
+    
+    @staticmethod
+    def _summary(recipe: Dict[str, Any]) -> Dict[str, Any]:
+        """Recipe fields returned in a meal plan."""
+        return {key: recipe.get(key) for key in ["_id", "name", "cuisine", "is_vegetarian", "prep_time_minutes", "difficulty"]}
@@ -0,0 +1,183 @@
+"""
+Buffered recipe popularity counters.
+Recipe views and simplifications are summed in process memory and written
+every flush_interval_s as one bulk update of $inc operations, so a busy
+recipe costs one write per interval instead of one per hit, and a hit
+never waits on the database.
+
+Each flush also adds to the recipe's trending_score: every hit is worth
+its weight times 2 ** ((now - epoch) / half_life), so newer hits count for
+exponentially more and ordering by the stored score ranks recipes by hits
+decayed with that half-life, without rewriting every score as time
+passes. ?sort=trending is then an indexed read. When the multiplier grows
+large the epoch is moved forward and all scores scaled down once
+(RecipeStore.rebase_trending), by whichever instance gets there first.
+Flushes hold their counts while a rebase is in progress, and a flush that
+read the epoch just before one only adds to scores still on that epoch
+(RecipeStore.add_popularity), so a rebase never leaves a score on the wrong
+scale. A rebase unfinished after REBASE_TIMEOUT_S is finished by the next
+flush.
+
+Loss bounds: counts are held in memory until flushed, so a crash (or a
+serverless host freezing the process) loses at most the last
+flush_interval_s of hits of that process, and at most max_pending recipes'
+worth. A failed flush keeps its counts for the next one. Counts are
+approximate by design; the counters are never read back here.
+"""
+from config import settings
+from metrics import POPULARITY_HITS
+from storage.base import RecipeStore
+from typing import Any, Dict, List, Optional, Set
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# trending_score weight of one hit
+VIEW_WEIGHT = 1.0
+SIMPLIFICATION_WEIGHT = 3.0
+# Move the epoch forward once hits are worth 2 ** this; well within float range
+REBASE_AFTER_HALF_LIVES = 64
+# A rebase still in progress after this long is taken to have stopped and is finished by a flush
+REBASE_TIMEOUT_S = 600
+
+
+def _utcnow_ms() -> datetime:
+    """The current UTC time at millisecond precision, as MongoDB stores it, so epochs compare equal when read back."""
+    now = datetime.utcnow()
+    return now - timedelta(microseconds=now.microsecond % 1000)
+
+
+class PopularityCounters:
+    """
+    Per-process hit counters for recipes, flushed periodically to the store.
+    
+    A flush is scheduled by the first hit after the previous one, so an idle
+    process runs no timer.
+    """
+    
+    def __init__(self, flush_interval_s: float = 10, half_life_s: float = 86400, max_pending: int = 10000):
+        self.flush_interval_s = flush_interval_s
+        self.half_life_s = half_life_s
+        self.max_pending = max_pending
+        # recipe ID -> [views, simplifications] since the last flush
+        self._pending: Dict[str, List[int]] = {}
+        self._store: Optional[RecipeStore] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.flushes_total = 0
+        self.dropped_total = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval_s > 0
+    
+    def record_view(self, store: RecipeStore, recipe_id: str) -> None:
+        self._record(store, recipe_id, 0)
+    
+    def record_simplification(self, store: RecipeStore, recipe_id: str) -> None:
+        self._record(store, recipe_id, 1)
+    
+    def _record(self, store: RecipeStore, recipe_id: str, index: int) -> None:
+        if not self.enabled or store.read_only:
+            return
+        counts = self._pending.get(recipe_id)
+        if counts is None:
+            if len(self._pending) >= self.max_pending:
+                self.dropped_total += 1
+                POPULARITY_HITS.labels("dropped").inc()
+                return
+            counts = self._pending[recipe_id] = [0, 0]
+        counts[index] += 1
+        self._store = store
+        self._schedule()
+    
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval_s, self._start_flush)
+    
+    def _start_flush(self) -> None:
+        self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def flush(self) -> int:
+        """Write pending counts now; returns how many recipes were updated."""
+        pending, self._pending = self._pending, {}
+        store = self._store
+        if not pending or store is None:
+            return 0
+        
+        try:
+            now = _utcnow_ms()
+            epoch = await self._trending_epoch(store, now)
+            if epoch is None:
+                # Another instance is rescaling scores; flush once it's done
+                self._requeue(pending)
+                return 0
+            multiplier = 2 ** ((now - epoch).total_seconds() / self.half_life_s)
+            increments = {}
+            for recipe_id, (views, simplifications) in pending.items():
+                counts: Dict[str, float] = {
+                    "trending_score": (views * VIEW_WEIGHT + simplifications * SIMPLIFICATION_WEIGHT) * multiplier
+                }
+                if views:
+                    counts["views"] = views
+                if simplifications:
+                    counts["simplifications"] = simplifications
+                increments[recipe_id] = counts
+            await store.add_popularity(increments, epoch)
+        except Exception as e:
+            logger.error("Error flushing popularity counters: %s", e)
+            POPULARITY_HITS.labels("failed").inc(sum(map(sum, pending.values())))
+            self._requeue(pending)
+            return 0
+        
+        self.flushes_total += 1
+        POPULARITY_HITS.labels("flushed").inc(sum(map(sum, pending.values())))
+        return len(increments)
+    
+    def _requeue(self, pending: Dict[str, List[int]]) -> None:
+        """Keep unflushed counts for the next flush, merged with hits since."""
+        for recipe_id, (views, simplifications) in pending.items():
+            counts = self._pending.setdefault(recipe_id, [0, 0])
+            counts[0] += views
+            counts[1] += simplifications
+        self._schedule()
+    
+    async def _trending_epoch(self, store: RecipeStore, now: datetime) -> Optional[datetime]:
+        """The store's trending epoch, rebasing it when it's old; None while another instance rebases."""
+        state = await store.trending_state()
+        if state is not None and state["rebasing_since"] is not None:
+            if (now - state["rebasing_since"]).total_seconds() < REBASE_TIMEOUT_S:
+                return None
+            # Rescaling skips recipes already on the epoch, so finishing it again is safe
+            if await store.rebase_trending(state, state["epoch"], state["factor"]):
+                logger.warning("Finished trending rebase to %s started at %s", state["epoch"].isoformat(), state["rebasing_since"].isoformat())
+        elif state is None or (now - state["epoch"]).total_seconds() / self.half_life_s > REBASE_AFTER_HALF_LIVES:
+            factor = 1.0 if state is None else 2 ** (-(now - state["epoch"]).total_seconds() / self.half_life_s)
+            if await store.rebase_trending(state, now, factor):
+                logger.info("Moved trending epoch to %s", now.isoformat())
+        else:
+            return state["epoch"]
+        state = await store.trending_state()
+        return state["epoch"] if state is not None and state["rebasing_since"] is None else None
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Counter statistics for this process."""
+        return {
+            "enabled": self.enabled,
+            "pending_recipes": len(self._pending),
+            "flushes_total": self.flushes_total,
+            "dropped_total": self.dropped_total
+        }
+
+
+# Process-wide counters, fed by RecipeService
+popularity = PopularityCounters(
+    settings.popularity_flush_interval_s,
+    settings.trending_half_life_hours * 3600,
+    settings.popularity_max_pending
+)
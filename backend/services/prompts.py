@@ -0,0 +1,131 @@
+"""
+Prompt templates and token budgets for AIService.
+Each AI feature has a "verbose" template (the original wording) and a
+"compact" one asking for the same answer in far fewer prompt tokens;
+ai_prompt_style picks one. ai_prompt_templates_path may point at a JSON
+file of {feature: template} replacing the built-in ones, e.g.
+{"suggest": "Suggest one recipe using: {ingredients}"}.
+
+Long recipe instructions are cut to ai_simplify_instruction_budget tokens
+at a sentence or line boundary before they're embedded, so one very long
+recipe can't blow up prompt size and latency.
+"""
+from config import settings
+from typing import Dict, Tuple
+import logging
+import re
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Rough tokens per character for English text, used where the API doesn't
+# report counts (Gemini averages about four characters per token)
+CHARS_PER_TOKEN = 4
+TRUNCATION_NOTE = "\n[Remaining instructions omitted for length]"
+
+# Placeholders each feature's template is formatted with
+TEMPLATE_FIELDS = {
+    "suggest": ("ingredients",),
+    "simplify": ("recipe_name", "instructions"),
+}
+
+PROMPT_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "verbose": {
+        "suggest": """You are a helpful cooking assistant. Based on the following ingredients, suggest ONE simple and delicious recipe.
+
+Available ingredients: {ingredients}
+
+Please provide:
+1. Recipe name (catchy and descriptive)
+2. Brief description (1-2 sentences)
+3. Additional ingredients needed (if any)
+4. Simple step-by-step instructions (maximum 6 steps)
+5. Estimated prep and cook time
+6. Difficulty level (Easy/Medium/Hard)
+
+Keep the response well-formatted, concise, and practical for home cooking.""",
+        "simplify": """You are a friendly cooking teacher helping a complete beginner. Simplify these recipe instructions in an encouraging way.
+
+Recipe: {recipe_name}
+
+Original Instructions:
+{instructions}
+
+Please provide:
+1. Simplified, beginner-friendly instructions with clear, simple language
+2. Exact timing and measurements explained
+3. Helpful tips and common mistakes to avoid
+4. What to look for (visual and sensory cues)
+5. Maximum 6 easy-to-follow steps
+
+Make it encouraging and build confidence. Format clearly with proper structure.""",
+    },
+    "compact": {
+        "suggest": """Suggest one simple home recipe using: {ingredients}
+Give: name, 1-2 sentence description, extra ingredients needed, at most 6 steps, prep/cook time, difficulty (Easy/Medium/Hard). Be concise.""",
+        "simplify": """Rewrite this recipe for a beginner: at most 6 short steps with timings, cues to watch for, and tips on common mistakes. Be encouraging and concise.
+Recipe: {recipe_name}
+Instructions:
+{instructions}""",
+    },
+}
+
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACES = re.compile(r"[ \t]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def fit_to_budget(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Text with whitespace squeezed, cut to about max_tokens (0 = no limit).
+    
+    Returns (text, truncated). A cut ends at the last sentence or line
+    boundary in the second half of the budget, and says so.
+    """
+    text = _BLANK_LINES.sub("\n", _SPACES.sub(" ", text)).strip()
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text, False
+    limit = max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_NOTE)
+    cut = text[:limit]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary >= limit // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + TRUNCATION_NOTE, True
+
+
+def _load_templates() -> Dict[str, str]:
+    """Templates for settings.ai_prompt_style, with any overrides from ai_prompt_templates_path."""
+    templates = dict(PROMPT_TEMPLATES.get(settings.ai_prompt_style) or PROMPT_TEMPLATES["compact"])
+    if settings.ai_prompt_style not in PROMPT_TEMPLATES:
+        logger.warning("Unknown AI prompt style %r, using compact prompts", settings.ai_prompt_style)
+    if not settings.ai_prompt_templates_path:
+        return templates
+    try:
+        with open(settings.ai_prompt_templates_path, "rb") as f:
+            overrides = orjson.loads(f.read())
+        for feature, template in overrides.items():
+            fields = TEMPLATE_FIELDS.get(feature)
+            if fields is None:
+                raise ValueError(f"unknown feature {feature!r}")
+            # Fails on placeholders the feature doesn't provide
+            template.format(**{field: "" for field in fields})
+    except Exception as e:
+        logger.error("Error loading AI prompt templates from %s: %s", settings.ai_prompt_templates_path, e)
+        return templates
+    # Only applied once every override is valid
+    templates.update(overrides)
+    return templates
+
+
+# Template in use per feature
+TEMPLATES = _load_templates()
+
+
+def render_prompt(feature: str, **fields: str) -> str:
+    """The prompt for a feature's request."""
+    return TEMPLATES[feature].format(**fields)
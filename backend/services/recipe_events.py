@@ -0,0 +1,181 @@
+"""
+Live recipe change events for GET /api/recipes/stream.
+RecipeService's write methods publish a compact event for every create,
+update and delete. RecipeEventBroadcaster encodes each event once as a
+Server-Sent Events frame and hands the same bytes to every connected
+client's queue, so an idle connection costs one small queue and nothing
+is encoded per client.
+
+Each client's queue is bounded. When a client falls queue_size events
+behind, its backlog is dropped and it is sent a single "resync" event
+(reload your list), so a stalled connection never holds memory or delays
+the others. The last REPLAY_SIZE events are kept, so a client reconnecting
+with Last-Event-ID is sent what it missed, or "resync" when that is too far
+back or came from another instance.
+
+Writes by other instances arrive through the change feed (change_feed.py)
+and are published here too; the feed's echo of this process's own writes
+is skipped.
+"""
+from change_feed import ChangeEvent, RESET, change_feed
+from config import settings
+from responses import encode_recipe
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import secrets
+
+import orjson
+
+# Events kept for clients reconnecting with Last-Event-ID
+REPLAY_SIZE = 256
+# Idle connections get a comment this often, so proxies keep them open and
+# disconnected clients are noticed
+HEARTBEAT_S = 15
+# Reconnect delay EventSource clients use after the connection drops
+RECONNECT_MS = 3000
+# This process's writes awaiting their change feed echo, at most
+MAX_PENDING_ECHOES = 1024
+
+RESYNC = "resync"
+_HEARTBEAT_FRAME = b": ping\n\n"
+
+
+class TooManyClientsError(Exception):
+    """Raised when a stream is opened while max_clients are connected."""
+
+
+class RecipeEventBroadcaster:
+    """
+    Fans recipe change events out to connected stream clients.
+    
+    Event data is {"op", "id", "recipe"}: op is create/update/delete (or
+    resync, without id), and recipe is the recipe in RecipeResponse form for
+    create/update when known. Events written by another instance may come
+    without it; clients then fetch GET /api/recipes/{id}.
+    """
+    
+    def __init__(self, queue_size: int = 64, max_clients: int = 10000):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        # Event IDs are "<stream>-<seq>"; the stream tag is new for each
+        # process, so IDs from another instance or an earlier run don't match
+        self._stream = secrets.token_hex(4)
+        self._seq = 0
+        self._clients: Set[asyncio.Queue] = set()
+        self._recent: Deque[Tuple[int, bytes]] = deque(maxlen=REPLAY_SIZE)
+        # (op, recipe_id) -> writes published here that the change feed will echo
+        self._pending_echoes: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self.events_total = 0
+        self.resyncs_total = 0
+    
+    def publish(self, op: str, recipe_id: str, recipe: Optional[Dict[str, Any]] = None) -> None:
+        """Publish a write made by this process."""
+        if change_feed.source is not None:
+            key = (op, recipe_id)
+            self._pending_echoes[key] = self._pending_echoes.get(key, 0) + 1
+            while len(self._pending_echoes) > MAX_PENDING_ECHOES:
+                self._pending_echoes.popitem(last=False)
+        self._broadcast(op, recipe_id, recipe)
+    
+    def publish_change(self, event: ChangeEvent) -> None:
+        """Publish a write seen on the change feed, unless this process published it already."""
+        if event.op == RESET:
+            self._broadcast(RESYNC)
+            return
+        key = (event.op, event.recipe_id)
+        pending = self._pending_echoes.get(key)
+        if pending:
+            if pending == 1:
+                del self._pending_echoes[key]
+            else:
+                self._pending_echoes[key] = pending - 1
+            return
+        self._broadcast(event.op, event.recipe_id, event.document)
+    
+    def _broadcast(self, op: str, recipe_id: Optional[str] = None, recipe: Optional[Dict[str, Any]] = None) -> None:
+        data = b'{"op":' + orjson.dumps(op)
+        if recipe_id is not None:
+            data += b',"id":' + orjson.dumps(recipe_id)
+        if recipe is not None and op != "delete":
+            data += b',"recipe":' + encode_recipe(recipe)
+        self._seq += 1
+        frame = f"id: {self._stream}-{self._seq}\nevent: {op}\ndata: ".encode() + data + b"}\n\n"
+        self._recent.append((self._seq, frame))
+        self.events_total += 1
+        for queue in self._clients:
+            self._offer(queue, frame)
+    
+    def _offer(self, queue: asyncio.Queue, frame: bytes) -> None:
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event: drop the backlog and resync
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self._resync_frame())
+            self.resyncs_total += 1
+    
+    def _resync_frame(self) -> bytes:
+        """A resync event for one client, carrying the current event ID to resume from."""
+        return f"id: {self._stream}-{self._seq}\nevent: {RESYNC}\ndata: ".encode() + b'{"op":"resync"}\n\n'
+    
+    def _missed(self, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        """Frames after last_event_id, or None when they can't be replayed."""
+        if not last_event_id:
+            return []
+        stream, _, seq = last_event_id.rpartition("-")
+        if stream != self._stream or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        seq = int(seq)
+        if seq < self._seq - len(self._recent):
+            return None
+        return [frame for number, frame in self._recent if number > seq]
+    
+    def connect(self, last_event_id: Optional[str] = None) -> asyncio.Queue:
+        """Register a client, queueing any events it missed since last_event_id."""
+        if len(self._clients) >= self.max_clients:
+            raise TooManyClientsError(f"Too many recipe stream clients ({self.max_clients})")
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        missed = self._missed(last_event_id)
+        if missed is None or len(missed) > self.queue_size:
+            queue.put_nowait(self._resync_frame())
+        else:
+            for frame in missed:
+                queue.put_nowait(frame)
+        self._clients.add(queue)
+        return queue
+    
+    def disconnect(self, queue: asyncio.Queue) -> None:
+        self._clients.discard(queue)
+    
+    async def stream(self, queue: asyncio.Queue) -> AsyncIterator[bytes]:
+        """SSE body for one client: its queued frames, batched, with heartbeats while idle."""
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n".encode()
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    yield _HEARTBEAT_FRAME
+                    continue
+                frames = [frame]
+                while not queue.empty():
+                    frames.append(queue.get_nowait())
+                yield b"".join(frames)
+        finally:
+            self.disconnect(queue)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Broadcaster statistics for this process."""
+        return {
+            "clients": len(self._clients),
+            "events_total": self.events_total,
+            "resyncs_total": self.resyncs_total,
+            "last_event_id": f"{self._stream}-{self._seq}"
+        }
+
+
+# Process-wide broadcaster, fed by RecipeService and the change feed
+recipe_events = RecipeEventBroadcaster(settings.recipe_stream_queue_size, settings.recipe_stream_max_clients)
+change_feed.subscribe(recipe_events.publish_change)
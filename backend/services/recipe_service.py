@@ -2,70 +2,120 @@
 Recipe service layer.
 Handles business logic for recipe CRUD operations and search/filter functionality.
 """
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from config import settings
+from minhash import fingerprint
 from models import RecipeCreate, RecipeUpdate, RecipeSearchFilters
+from storage.base import RecipeStore
+from services.dedupe_service import DedupeService, DuplicateRecipeError
+from services.popularity import popularity
+from services.recipe_events import recipe_events
+from services.slow_query_log import slow_query_log
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from bson import ObjectId
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of recipes returned by a search
+SEARCH_LIMIT = 100
+
 
 class RecipeService:
     """Service class for recipe operations."""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
-        self.db = db
-        self.collection = db.recipes
+    def __init__(self, store: RecipeStore):
+        self.store = store
     
     async def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
-        """Create a new recipe."""
+        """
+        Create a new recipe.
+        
+        Raises DuplicateRecipeError when it nearly duplicates an existing
+        recipe and near-duplicate checks are on.
+        """
         try:
             recipe_dict = recipe_data.model_dump()
             recipe_dict["created_at"] = datetime.utcnow()
             recipe_dict["updated_at"] = datetime.utcnow()
+            recipe_dict.update(fingerprint(recipe_dict))
             
-            result = await self.collection.insert_one(recipe_dict)
+            if settings.near_duplicate_mode in ("reject", "merge"):
+                duplicates = await DedupeService(self.store).find_duplicates(recipe_dict)
+                if duplicates:
+                    merged = None
+                    if settings.near_duplicate_mode == "merge":
+                        merged = await self._merge_into(duplicates[0]["_id"], recipe_dict)
+                    if merged is not None or settings.near_duplicate_mode == "reject":
+                        raise DuplicateRecipeError(duplicates, merged)
             
-            created_recipe = await self.collection.find_one({"_id": result.inserted_id})
-            created_recipe["_id"] = str(created_recipe["_id"])
+            created_recipe = await self.store.insert(recipe_dict)
+            recipe_events.publish("create", created_recipe["_id"], created_recipe)
             
-            logger.info(f"Created recipe: {created_recipe['name']}")
+            logger.info("Created recipe: %s", created_recipe["name"])
             return created_recipe
+        except DuplicateRecipeError:
+            raise
         except Exception as e:
-            logger.error(f"Error creating recipe: {e}")
+            logger.error("Error creating recipe: %s", e)
             raise
     
+    async def _merge_into(self, recipe_id: str, recipe_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Add a duplicate's new tags to an existing recipe; None if it has since been deleted."""
+        existing = await self.store.get(recipe_id)
+        if existing is None:
+            return None
+        tags = list(existing.get("tags") or [])
+        new_tags = [tag for tag in recipe_dict.get("tags") or [] if tag not in tags]
+        if not new_tags:
+            return existing
+        result = await self.store.update(recipe_id, {"tags": tags + new_tags, "updated_at": datetime.utcnow()})
+        if result is None:
+            return None
+        _, merged = result
+        recipe_events.publish("update", recipe_id, merged)
+        logger.info("Merged duplicate recipe into %s", recipe_id)
+        return merged
+    
     async def get_recipe_by_id(self, recipe_id: str) -> Optional[Dict[str, Any]]:
         """Get a recipe by ID."""
         try:
-            if not ObjectId.is_valid(recipe_id):
-                # Try to find by custom ID
-                recipe = await self.collection.find_one({"_id": recipe_id})
-            else:
-                recipe = await self.collection.find_one({"_id": ObjectId(recipe_id)})
-            
-            if recipe:
-                recipe["_id"] = str(recipe["_id"])
-            
-            return recipe
+            return await self.store.get(recipe_id)
+        except Exception as e:
+            logger.error("Error getting recipe by ID: %s", e)
+            raise
+    
+    def record_view(self, recipe_id: str) -> None:
+        """Count a view of a recipe; written to the store in the next popularity flush."""
+        popularity.record_view(self.store, recipe_id)
+    
+    def record_simplification(self, recipe_id: str) -> None:
+        """Count an AI simplification of a recipe; written in the next popularity flush."""
+        popularity.record_simplification(self.store, recipe_id)
+    
+    async def get_recipes_by_ids(
+        self,
+        recipe_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Get several recipes by ID in a single query.
+        
+        Returns one entry per requested ID, in request order, with None for misses.
+        Pass fields to fetch only part of each document.
+        """
+        try:
+            return await self.store.get_many(recipe_ids, fields)
         except Exception as e:
-            logger.error(f"Error getting recipe by ID: {e}")
+            logger.error("Error getting recipes by IDs: %s", e)
             raise
     
-    async def get_all_recipes(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get all recipes with pagination."""
+    async def get_all_recipes(self, skip: int = 0, limit: int = 100, sort: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all recipes with pagination, optionally trending first."""
         try:
-            cursor = self.collection.find().skip(skip).limit(limit)
-            recipes = await cursor.to_list(length=limit)
-            
-            for recipe in recipes:
-                recipe["_id"] = str(recipe["_id"])
-            
-            return recipes
+            return await self.store.list(skip, limit, sort)
         except Exception as e:
-            logger.error(f"Error getting all recipes: {e}")
+            logger.error("Error getting all recipes: %s", e)
             raise
     
     async def update_recipe(self, recipe_id: str, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
@@ -79,92 +129,59 @@ class RecipeService:
             
             update_dict["updated_at"] = datetime.utcnow()
             
-            # Try ObjectId first, then custom ID
-            if ObjectId.is_valid(recipe_id):
-                result = await self.collection.update_one(
-                    {"_id": ObjectId(recipe_id)},
-                    {"$set": update_dict}
-                )
-            else:
-                result = await self.collection.update_one(
-                    {"_id": recipe_id},
-                    {"$set": update_dict}
-                )
+            if "ingredients" in update_dict or "instructions" in update_dict:
+                current = await self.store.get(recipe_id)
+                if current is None:
+                    return None
+                update_dict.update(fingerprint({**current, **update_dict}))
             
-            if result.matched_count == 0:
+            result = await self.store.update(recipe_id, update_dict)
+            if result is None:
                 return None
             
-            return await self.get_recipe_by_id(recipe_id)
+            _, updated_recipe = result
+            recipe_events.publish("update", recipe_id, updated_recipe)
+            return updated_recipe
         except Exception as e:
-            logger.error(f"Error updating recipe: {e}")
+            logger.error("Error updating recipe: %s", e)
             raise
     
     async def delete_recipe(self, recipe_id: str) -> bool:
         """Delete a recipe."""
         try:
-            if ObjectId.is_valid(recipe_id):
-                result = await self.collection.delete_one({"_id": ObjectId(recipe_id)})
-            else:
-                result = await self.collection.delete_one({"_id": recipe_id})
-            
-            return result.deleted_count > 0
+            if await self.store.delete(recipe_id) is None:
+                return False
+            recipe_events.publish("delete", recipe_id)
+            return True
         except Exception as e:
-            logger.error(f"Error deleting recipe: {e}")
+            logger.error("Error deleting recipe: %s", e)
             raise
     
     async def search_recipes(self, filters: RecipeSearchFilters) -> List[Dict[str, Any]]:
         """Search recipes with filters."""
         try:
-            query = {}
-            
-            # Filter by cuisine
-            if filters.cuisine:
-                query["cuisine"] = {"$regex": filters.cuisine, "$options": "i"}
-            
-            # Filter by vegetarian
-            if filters.is_vegetarian is not None:
-                query["is_vegetarian"] = filters.is_vegetarian
-            
-            # Filter by max prep time
-            if filters.max_prep_time:
-                query["prep_time_minutes"] = {"$lte": filters.max_prep_time}
-            
-            # Filter by difficulty
-            if filters.difficulty:
-                query["difficulty"] = filters.difficulty.lower()
-            
-            # Filter by tags
-            if filters.tags:
-                query["tags"] = {"$in": [tag.lower() for tag in filters.tags]}
-            
-            # Filter by ingredients
-            if filters.ingredients:
-                query["ingredients"] = {"$all": [ing.lower() for ing in filters.ingredients]}
+            start = time.perf_counter()
+            recipes = await self.store.search(filters, limit=SEARCH_LIMIT)
+            slow_query_log.record(self.store, filters, (time.perf_counter() - start) * 1000, len(recipes), SEARCH_LIMIT)
             
-            # Search query in name or ingredients
-            if filters.search_query:
-                query["$or"] = [
-                    {"name": {"$regex": filters.search_query, "$options": "i"}},
-                    {"ingredients": {"$regex": filters.search_query, "$options": "i"}}
-                ]
-            
-            cursor = self.collection.find(query)
-            recipes = await cursor.to_list(length=100)
-            
-            for recipe in recipes:
-                recipe["_id"] = str(recipe["_id"])
-            
-            logger.info(f"Search found {len(recipes)} recipes")
+            logger.info("Search found %d recipes", len(recipes))
             return recipes
         except Exception as e:
-            logger.error(f"Error searching recipes: {e}")
+            logger.error("Error searching recipes: %s", e)
             raise
     
     async def get_recipes_count(self) -> int:
         """Get total count of recipes."""
         try:
-            count = await self.collection.count_documents({})
-            return count
+            return await self.store.count()
+        except Exception as e:
+            logger.error("Error getting recipe count: %s", e)
+            raise
+    
+    async def get_facets(self, filters: Optional[RecipeSearchFilters] = None) -> Dict[str, Any]:
+        """Get recipe counts per cuisine, difficulty, vegetarian flag, tag and prep-time bucket."""
+        try:
+            return await self.store.facets(filters)
         except Exception as e:
-            logger.error(f"Error getting recipe count: {e}")
+            logger.error("Error getting recipe facets: %s", e)
             raise
@@ -0,0 +1,159 @@
+"""
+Shopping list service.
+Merges the ingredients of several recipes into one deduplicated shopping list.
+"""
+from services.recipe_service import RecipeService
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from fractions import Fraction
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Unit spellings mapped to the short form used in shopping list amounts
+UNIT_ALIASES = {
+    "g": "g", "gm": "g", "gram": "g", "grams": "g",
+    "kg": "kg", "kilogram": "kg", "kilograms": "kg",
+    "ml": "ml", "l": "l", "litre": "l", "litres": "l", "liter": "l", "liters": "l",
+    "cup": "cup", "cups": "cup",
+    "tbsp": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "pinch": "pinch", "pinches": "pinch",
+    "clove": "clove", "cloves": "clove",
+}
+
+# Plurals the simple suffix rules in singularize() get wrong
+IRREGULAR_PLURALS = {"chillies": "chilli", "cookies": "cookie", "leaves": "leaf", "loaves": "loaf"}
+
+# Optional leading quantity ("2", "1.5", "1/2") and unit, e.g. "2 cups rice"
+QUANTITY_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?|\d+/\d+)\s*([a-z]+)?\s+(.+)$")
+
+
+def singularize(word: str) -> str:
+    """Reduce simple English plurals ("tomatoes", "chillies", "spices") to singular."""
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith(("ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def parse_ingredient(ingredient: str) -> Tuple[str, Optional[float], str]:
+    """
+    Split an ingredient string into (canonical name, amount, unit).
+    
+    Amount is None when the ingredient has no leading quantity; unit is
+    an empty string for plain counts such as "2 onions".
+    """
+    text = " ".join(ingredient.lower().replace(",", " ").split())
+    amount = None
+    unit = ""
+    
+    match = QUANTITY_PATTERN.match(text)
+    if match:
+        quantity, maybe_unit, rest = match.groups()
+        amount = float(Fraction(quantity))
+        if maybe_unit in UNIT_ALIASES:
+            unit = UNIT_ALIASES[maybe_unit]
+            text = rest
+        else:
+            text = f"{maybe_unit} {rest}" if maybe_unit else rest
+        if text.startswith("of "):
+            text = text[3:]
+    
+    words = text.split()
+    if words:
+        words[-1] = singularize(words[-1])
+    return " ".join(words), amount, unit
+
+
+def canonical_ingredient(ingredient: str) -> str:
+    """Canonical name used to deduplicate ingredients across recipes."""
+    return parse_ingredient(ingredient)[0]
+
+
+class ShoppingListService:
+    """Service class for building shopping lists from recipes."""
+    
+    def __init__(self, recipe_service: RecipeService):
+        self.recipe_service = recipe_service
+    
+    async def build_shopping_list(self, recipe_ids: List[str], servings_multiplier: float = 1.0) -> Dict[str, Any]:
+        """
+        Build a merged shopping list for a set of recipes.
+        
+        Recipes are fetched in one batched query and merged in a single pass.
+        Repeating a recipe ID counts that recipe once per occurrence.
+        """
+        try:
+            recipes = await self.recipe_service.get_recipes_by_ids(recipe_ids, fields=["name", "ingredients"])
+            missing = [recipe_id for recipe_id, recipe in zip(recipe_ids, recipes) if not recipe]
+            items = self.merge_ingredients([recipe for recipe in recipes if recipe], servings_multiplier)
+            
+            logger.info("Built shopping list with %d items from %d recipes", len(items), len(recipe_ids) - len(missing))
+            return {
+                "recipe_count": len(recipe_ids) - len(missing),
+                "servings_multiplier": servings_multiplier,
+                "missing": missing,
+                "total_items": len(items),
+                "items": items
+            }
+        except Exception as e:
+            logger.error("Error building shopping list: %s", e)
+            raise
+    
+    @staticmethod
+    def merge_ingredients(recipes: List[Dict[str, Any]], servings_multiplier: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Merge recipe ingredients by canonical name.
+        
+        Items are sorted by the number of recipes that need them (most first),
+        then by name. Parsed quantities are scaled by servings_multiplier and
+        summed per unit.
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        
+        for recipe in recipes:
+            seen_in_recipe = set()
+            for ingredient in recipe.get("ingredients") or []:
+                name, amount, unit = parse_ingredient(ingredient)
+                if not name:
+                    continue
+                
+                item = merged.get(name)
+                if item is None:
+                    item = merged[name] = {"name": name, "recipe_count": 0, "recipes": [], "amounts": {}}
+                
+                if name not in seen_in_recipe:
+                    seen_in_recipe.add(name)
+                    item["recipe_count"] += 1
+                    item["recipes"].append(recipe.get("name"))
+                
+                if amount is not None:
+                    item["amounts"][unit] = item["amounts"].get(unit, 0) + amount * servings_multiplier
+        
+        return sorted(merged.values(), key=lambda item: (-item["recipe_count"], item["name"]))
+    
+    @staticmethod
+    def group_by_recipe_count(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group sorted shopping list items by how many recipes need them."""
+        groups: List[Dict[str, Any]] = []
+        for item in items:
+            if not groups or groups[-1]["recipe_count"] != item["recipe_count"]:
+                groups.append({"recipe_count": item["recipe_count"], "items": []})
+            groups[-1]["items"].append(item)
+        return groups
+    
+    @staticmethod
+    def iter_ndjson_lines(shopping_list: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield a summary record followed by one record per item, for streaming."""
+        summary = {key: value for key, value in shopping_list.items() if key != "items"}
+        yield summary
+        for item in shopping_list["items"]:
+            yield item
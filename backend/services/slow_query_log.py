@@ -0,0 +1,167 @@
+"""
+Slow-query log for recipe search.
+Aggregates search latency per filter shape and, for searches slower than
+the configured threshold, captures the store's explain() output into a
+bounded ring buffer served at GET /api/admin/slow-queries.
+"""
+from models import RecipeSearchFilters
+from storage.base import RecipeStore
+from metrics import RECIPE_SEARCH_DURATION
+from config import settings
+from typing import Dict, Any, Optional, Set
+from collections import deque
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FILTER_FIELDS = list(RecipeSearchFilters.model_fields)
+
+
+def filter_shape(filters: RecipeSearchFilters) -> str:
+    """Normalized query shape: the filter fields in use, without their values."""
+    fields = [name for name in SEARCH_FILTER_FIELDS if getattr(filters, name) not in (None, "", [])]
+    return ",".join(fields) or "(none)"
+
+
+class ShapeStats:
+    """Running totals for one filter shape."""
+    
+    __slots__ = (
+        "count", "total_ms", "max_ms", "returned", "slow_count",
+        "explained", "docs_examined", "keys_examined", "last_plan", "histogram"
+    )
+    
+    def __init__(self, shape: str):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.returned = 0
+        self.slow_count = 0
+        self.explained = 0
+        self.docs_examined = 0
+        self.keys_examined = 0
+        self.last_plan: Optional[str] = None
+        self.histogram = RECIPE_SEARCH_DURATION.labels(shape)
+    
+    def to_dict(self, shape: str) -> Dict[str, Any]:
+        return {
+            "shape": shape,
+            "count": self.count,
+            "slow_count": self.slow_count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "avg_returned": round(self.returned / self.count, 1) if self.count else 0.0,
+            "explained": self.explained,
+            # Averages over the slow searches that were explained
+            "avg_docs_examined": round(self.docs_examined / self.explained, 1) if self.explained else None,
+            "avg_keys_examined": round(self.keys_examined / self.explained, 1) if self.explained else None,
+            "last_plan": self.last_plan
+        }
+
+
+class SlowQueryLog:
+    """
+    Per-shape search statistics plus a ring buffer of explained slow searches.
+    
+    explain() runs in a background task after the response is sent, at
+    most once per shape per explain_interval_s, so a burst of slow searches
+    doesn't turn into a burst of explains.
+    """
+    
+    def __init__(self, threshold_ms: float, capacity: int, explain_interval_s: float):
+        self.threshold_ms = threshold_ms
+        self.explain_interval_s = explain_interval_s
+        self.entries: deque = deque(maxlen=capacity)
+        self.shapes: Dict[str, ShapeStats] = {}
+        self._last_explained: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def record(self, store: RecipeStore, filters: RecipeSearchFilters, elapsed_ms: float, returned: int, limit: int) -> None:
+        """Record one search; schedule an explain() capture if it was slow."""
+        shape = filter_shape(filters)
+        stats = self.shapes.get(shape)
+        if stats is None:
+            stats = self.shapes[shape] = ShapeStats(shape)
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.returned += returned
+        stats.histogram.observe(elapsed_ms / 1000)
+        
+        if elapsed_ms < self.threshold_ms:
+            return
+        
+        stats.slow_count += 1
+        logger.warning("Slow recipe search: %.1fms, shape %s, %d results", elapsed_ms, shape, returned)
+        
+        now = time.monotonic()
+        last = self._last_explained.get(shape)
+        if last is not None and now - last < self.explain_interval_s:
+            return
+        self._last_explained[shape] = now
+        
+        task = asyncio.get_running_loop().create_task(self._capture(store, filters, shape, elapsed_ms, returned, limit))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _capture(
+        self,
+        store: RecipeStore,
+        filters: RecipeSearchFilters,
+        shape: str,
+        elapsed_ms: float,
+        returned: int,
+        limit: int
+    ) -> None:
+        """Run explain() for a slow search and add it to the ring buffer."""
+        try:
+            explain = await store.explain_search(filters, limit)
+        except Exception as e:
+            logger.warning("Could not explain slow search (%s): %s", shape, e)
+            explain = {"plan": None, "error": str(e)}
+        
+        # None when reset() ran while the explain was in flight
+        stats = self.shapes.get(shape)
+        if stats is not None and explain.get("plan"):
+            stats.explained += 1
+            stats.docs_examined += explain.get("docs_examined") or 0
+            stats.keys_examined += explain.get("keys_examined") or 0
+            stats.last_plan = explain["plan"]
+        
+        self.entries.append({
+            "timestamp": datetime.utcnow().isoformat(),
+            "shape": shape,
+            "duration_ms": round(elapsed_ms, 3),
+            "returned": returned,
+            "filters": filters.model_dump(exclude_none=True),
+            **explain
+        })
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-shape stats (most total time first) and recent slow searches (newest first)."""
+        shapes = sorted(self.shapes.items(), key=lambda item: -item[1].total_ms)
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_interval_s": self.explain_interval_s,
+            "capacity": self.entries.maxlen,
+            "shapes": [stats.to_dict(shape) for shape, stats in shapes],
+            "recent": list(reversed(self.entries))
+        }
+    
+    def reset(self) -> None:
+        """Clear stats and captured plans; metric histograms are kept."""
+        self.entries.clear()
+        self.shapes.clear()
+        self._last_explained.clear()
+
+
+# Process-wide log used by RecipeService
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    capacity=settings.slow_query_log_size,
+    explain_interval_s=settings.slow_query_explain_interval_s
+)
@@ -0,0 +1,192 @@
+"""
+Byte-value caches with TTL and size-bounded eviction.
+LocalCache lives in one process. SQLiteCache keeps entries in a SQLite file
+that every worker on the host opens, so with several uvicorn/gunicorn
+workers a value is computed once per host rather than once per worker.
+Both have the same interface (get/put/invalidate/clear), and build_cache()
+returns the shared kind when shared_cache_path is configured.
+
+Put the file on local disk or tmpfs (e.g. /dev/shm), never on a network
+filesystem. Caching is best effort: if the database stays locked for
+BUSY_TIMEOUT_S, the lookup counts as a miss and the write is skipped, so
+the cache never fails a request. Request handlers use get_async() and
+put_async(), which run SQLite calls in a worker thread: a lock wait then
+delays only the request that made it, by at most BUSY_TIMEOUT_S, rather
+than stalling the event loop. invalidate() and clear() run inline (they
+follow writes, which are rare) and can hold the loop that long.
+"""
+from typing import Hashable, Optional, Union
+from collections import OrderedDict
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import settings
+from metrics import CacheMetrics
+
+logger = logging.getLogger(__name__)
+
+# Longest a cache call waits for another worker's write lock
+BUSY_TIMEOUT_S = 0.05
+# Expired and excess entries are swept every this many puts
+EVICT_EVERY_PUTS = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_expiry ON entries (namespace, expires_at);
+"""
+
+
+class LocalCache:
+    """In-process LRU + TTL cache of bytes values."""
+    
+    def __init__(self, name: str, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        # key -> (expires_at, value)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._metrics = CacheMetrics(name)
+    
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        self._metrics.record(entry is not None)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+    
+    def put(self, key: Hashable, value: bytes) -> None:
+        if self.ttl_s <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def get_async(self, key: Hashable) -> Optional[bytes]:
+        """get() for async callers; never waits, so it runs inline."""
+        return self.get(key)
+    
+    async def put_async(self, key: Hashable, value: bytes) -> None:
+        self.put(key, value)
+    
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Cache of bytes values shared by all processes using the same SQLite file.
+    
+    Each cache is a namespace within the file. Keys are strings. When more
+    than max_entries are stored, the entries closest to expiry are evicted
+    first, checked every EVICT_EVERY_PUTS puts, so a namespace may briefly
+    exceed its bound. Each process opens its own connection; the connection
+    is reopened after a fork.
+    """
+    
+    def __init__(self, name: str, path: str, max_entries: int, ttl_s: float):
+        self.name = name
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._metrics = CacheMetrics(name)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._puts = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """This process's connection, opening it (and the schema) on first use."""
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+    
+    def _execute(self, sql: str, parameters: tuple = ()) -> Optional[list]:
+        """Run a statement, returning its rows, or None if the database is unavailable."""
+        try:
+            with self._lock:
+                return self._connect().execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache %s unavailable: %s", self.name, e)
+            return None
+    
+    def get(self, key: str) -> Optional[bytes]:
+        rows = self._execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.name, key, time.time())
+        )
+        value = rows[0][0] if rows else None
+        self._metrics.record(value is not None)
+        return value
+    
+    def put(self, key: str, value: bytes) -> None:
+        if self.ttl_s <= 0:
+            return
+        self._execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (self.name, key, value, time.time() + self.ttl_s)
+        )
+        self._puts += 1
+        if self._puts % EVICT_EVERY_PUTS == 0:
+            self.evict()
+    
+    async def get_async(self, key: str) -> Optional[bytes]:
+        """get() in a worker thread, so a lock wait doesn't block the event loop."""
+        return await asyncio.to_thread(self.get, key)
+    
+    async def put_async(self, key: str, value: bytes) -> None:
+        """put() in a worker thread."""
+        await asyncio.to_thread(self.put, key, value)
+    
+    def evict(self) -> None:
+        """Drop expired entries, then the entries closest to expiry beyond max_entries."""
+        self._execute("DELETE FROM entries WHERE namespace = ? AND expires_at <= ?", (self.name, time.time()))
+        self._execute(
+            "DELETE FROM entries WHERE namespace = ? AND key IN ("
+            "SELECT key FROM entries WHERE namespace = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.name, self.name, self.max_entries)
+        )
+    
+    def invalidate(self, key: str) -> None:
+        self._execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (self.name, key))
+    
+    def clear(self) -> None:
+        self._execute("DELETE FROM entries WHERE namespace = ?", (self.name,))
+    
+    def __len__(self) -> int:
+        rows = self._execute(
+            "SELECT COUNT(*) FROM entries WHERE namespace = ? AND expires_at > ?",
+            (self.name, time.time())
+        )
+        return rows[0][0] if rows else 0
+
+
+def build_cache(name: str, max_entries: int, ttl_s: float) -> Union[LocalCache, SQLiteCache]:
+    """A host-wide cache when shared_cache_path is set, else an in-process one."""
+    if settings.shared_cache_path:
+        return SQLiteCache(name, settings.shared_cache_path, max_entries, ttl_s)
+    return LocalCache(name, max_entries, ttl_s)
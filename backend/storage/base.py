@@ -0,0 +1,192 @@
+"""
+Recipe storage interface.
+Defines the contract RecipeService relies on, plus facet helpers shared by
+the MongoDB and in-memory implementations.
+"""
+from abc import ABC, abstractmethod
+from models import RecipeSearchFilters
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
+import bisect
+
+FACET_FIELDS = ["cuisine", "difficulty", "is_vegetarian", "tags", "prep_time"]
+
+# Lower bounds of the prep-time buckets reported by the facets endpoint
+PREP_TIME_BOUNDARIES = [0, 16, 31, 61]
+PREP_TIME_LABELS = ["0-15", "16-30", "31-60", "61+"]
+
+# Popularity counters kept on recipe documents, updated by services/popularity.py;
+# trending_epoch tags the epoch a stored trending_score is scaled from
+POPULARITY_FIELDS = ["views", "simplifications", "trending_score", "trending_epoch"]
+
+# Near-duplicate fingerprint kept on recipe documents (see minhash.py)
+FINGERPRINT_FIELDS = ["minhash", "lsh_bands"]
+
+# Orders accepted by RecipeStore.list(); None is storage order
+LIST_SORTS = ["trending"]
+
+
+class ReadOnlyStoreError(Exception):
+    """Raised when a write is attempted on a read-only store."""
+
+
+def prep_time_bucket(minutes: Optional[int]) -> str:
+    """Return the facet bucket label for a prep time."""
+    if minutes is None:
+        return PREP_TIME_LABELS[-1]
+    index = bisect.bisect_right(PREP_TIME_BOUNDARIES, minutes) - 1
+    return PREP_TIME_LABELS[max(index, 0)]
+
+
+def facet_value(value: Any) -> str:
+    """String key a field value is counted under."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def facet_keys(recipe: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(facet, value) pairs a recipe is counted under."""
+    keys = [
+        ("cuisine", facet_value(recipe.get("cuisine"))),
+        ("difficulty", facet_value(recipe.get("difficulty"))),
+        ("is_vegetarian", facet_value(bool(recipe.get("is_vegetarian")))),
+        ("prep_time", prep_time_bucket(recipe.get("prep_time_minutes"))),
+    ]
+    for tag in set(recipe.get("tags") or []):
+        keys.append(("tags", facet_value(tag)))
+    return keys
+
+
+def build_facets(total: int, counts: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    """Build the facets response, dropping empty buckets and sorting by count."""
+    facets = {"total": max(total, 0)}
+    for field in FACET_FIELDS:
+        buckets = {key: count for key, count in (counts.get(field) or {}).items() if count > 0}
+        facets[field] = dict(sorted(buckets.items(), key=lambda item: (-item[1], item[0])))
+    return facets
+
+
+class RecipeStore(ABC):
+    """
+    Storage contract for recipe documents.
+    
+    Documents are plain dicts with a string "_id". Every method returns
+    documents the caller may modify.
+    """
+    
+    read_only: bool = False
+    
+    @abstractmethod
+    async def insert(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new recipe and return it with its assigned _id."""
+    
+    @abstractmethod
+    async def get(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        """Get a recipe by ID."""
+    
+    @abstractmethod
+    async def get_many(self, recipe_ids: List[str], fields: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Get recipes by ID in request order, None for misses, optionally projected to fields."""
+    
+    @abstractmethod
+    async def list(self, skip: int = 0, limit: int = 100, sort: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get recipes with pagination, in storage order or by one of LIST_SORTS (highest trending_score first)."""
+    
+    @abstractmethod
+    async def update(self, recipe_id: str, changes: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Apply changes to a recipe; return (previous, updated) or None if it doesn't exist."""
+    
+    @abstractmethod
+    async def delete(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        """Delete a recipe and return it, or None if it doesn't exist."""
+    
+    @abstractmethod
+    async def search(self, filters: RecipeSearchFilters, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get recipes matching all given filters."""
+    
+    @abstractmethod
+    async def explain_search(self, filters: RecipeSearchFilters, limit: int = 100) -> Dict[str, Any]:
+        """
+        Describe how search() runs for filters.
+        
+        Returns "plan" (a one-line summary), "indexes" used, "docs_examined",
+        "keys_examined" (None when not applicable) and "returned".
+        """
+    
+    @abstractmethod
+    async def count(self) -> int:
+        """Get the total number of recipes."""
+    
+    @abstractmethod
+    async def facets(self, filters: Optional[RecipeSearchFilters] = None) -> Dict[str, Any]:
+        """Get facet counts, for all recipes or those matching filters."""
+    
+    @abstractmethod
+    async def rebuild_facet_counts(self) -> Dict[str, Any]:
+        """Recompute the unfiltered facet counts from the stored recipes and return them."""
+    
+    @abstractmethod
+    async def find_plan_candidates(
+        self,
+        max_prep_time: Optional[int],
+        difficulties: Optional[List[str]],
+        is_vegetarian: Optional[bool],
+        fields: List[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Get up to limit recipes matching the meal-plan prefilter, fastest first."""
+    
+    @abstractmethod
+    async def find_by_lsh_bands(self, bands: List[int], limit: int) -> List[Dict[str, Any]]:
+        """Get up to limit recipes sharing any of bands, with only _id, name and minhash."""
+    
+    @abstractmethod
+    async def lsh_buckets(self, limit: int) -> List[List[str]]:
+        """Get up to limit distinct groups of two or more recipe IDs that share an LSH band."""
+    
+    @abstractmethod
+    async def find_unfingerprinted(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """
+        Get up to limit recipes with no minhash, with only _id, ingredients and
+        instructions, continuing after after_id (None for the first page).
+        """
+    
+    @abstractmethod
+    async def set_fingerprints(self, fingerprints: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Store FINGERPRINT_FIELDS on several recipes in one write, e.g.
+        {"r1": fingerprint(recipe)}; returns how many were found. Not a change
+        clients see, so it isn't recorded in the change outbox.
+        """
+    
+    @abstractmethod
+    async def add_popularity(self, increments: Dict[str, Dict[str, float]], epoch: datetime) -> None:
+        """
+        Add to recipes' POPULARITY_FIELDS, e.g. {"r1": {"views": 3, "trending_score": 4.5}},
+        with trending_score scaled from epoch. Unknown IDs are skipped, and so
+        are recipes whose score a rebase has already moved to another epoch.
+        """
+    
+    @abstractmethod
+    async def trending_state(self) -> Optional[Dict[str, Any]]:
+        """
+        The trending "epoch" scores are scaled from, the "factor" of the last
+        rebase and "rebasing_since", when a rebase started that hasn't
+        finished (else None); None before the first epoch is set.
+        """
+    
+    @abstractmethod
+    async def rebase_trending(self, previous: Optional[Dict[str, Any]], epoch: datetime, factor: float) -> bool:
+        """
+        Move the trending epoch from the previous trending_state() to epoch,
+        multiplying every trending_score by factor. Returns False, changing
+        nothing, when the state is no longer previous (another instance moved
+        it first). Called with an unfinished rebase's own epoch and factor, it
+        finishes that rebase; rescaling never applies twice to a recipe.
+        """
+    
+    def _check_writable(self) -> None:
+        """Raise ReadOnlyStoreError if this store is read-only."""
+        if self.read_only:
+            raise ReadOnlyStoreError("Recipe storage is read-only in this deployment")
@@ -0,0 +1,662 @@
+"""
+Columnar recipe snapshots.
+write_columnar_snapshot() lays the recipes collection out in one file as
+fixed-width NumPy columns (prep time, difficulty, vegetarian flag),
+dictionary-encoded cuisine/tags/ingredients, and offsets + byte heaps for
+text. ColumnarRecipeStore maps the file read-only: columns are views onto
+the mapping rather than copies, so every worker process serves from the
+same page-cache pages, and search, facet and meal-plan filters run as
+vectorized masks over whole columns.
+
+A new snapshot replaces the old one atomically (written beside it, then
+renamed over it). Each store re-checks the file every refresh_interval_s
+and swaps the new snapshot in; requests already running finish on the
+one they started with. Never rewrite a snapshot file in place: processes
+still map it.
+
+Requires numpy, an optional dependency (see requirements.txt).
+"""
+from models import RecipeSearchFilters
+from storage.base import RecipeStore, FACET_FIELDS, PREP_TIME_BOUNDARIES, PREP_TIME_LABELS, facet_value, build_facets
+from storage.memory_store import TIMESTAMP_FIELDS
+from typing import List, Optional, Dict, Any, Tuple, Iterable
+from collections import Counter
+from datetime import datetime
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RECIPCOL"
+FORMAT_VERSION = 1
+# Footer: header JSON length, then MAGIC again
+_TRAILER = struct.Struct("<Q8s")
+_ALIGNMENT = 8
+
+# Text columns: offsets + UTF-8 heap. "_id" is always present.
+TEXT_FIELDS = ("_id", "name", "instructions")
+# Single-valued dictionary-encoded columns (code -1 = absent)
+DICTIONARY_FIELDS = ("cuisine", "difficulty")
+# Multi-valued dictionary-encoded columns: per-row offsets into values
+LIST_FIELDS = ("tags", "ingredients")
+
+# Field order of returned documents; other fields follow from the row's extras
+DOCUMENT_FIELDS = (
+    "_id", "name", "cuisine", "is_vegetarian", "prep_time_minutes",
+    "ingredients", "difficulty", "instructions", "tags"
+)
+
+# Bits of the per-row "flags" column marking fields present in their column
+PRESENCE_BITS = {"name": 1, "instructions": 2, "tags": 4, "ingredients": 8}
+
+# Beyond this many codes, one pass over all list values beats per-code postings
+_MAX_POSTING_LOOKUPS = 32
+
+_INT32_MAX = 2 ** 31 - 1
+_MISSING = object()
+
+
+def _code_dtype(size: int) -> str:
+    """Smallest signed dtype holding dictionary codes 0..size-1 and -1."""
+    if size < 2 ** 7:
+        return "<i1"
+    if size < 2 ** 15:
+        return "<i2"
+    return "<i4"
+
+
+class _SnapshotBuilder:
+    """
+    Accumulates recipes into column buffers.
+    
+    Values that don't fit their column's type (e.g. a non-string name or a
+    fractional prep time) are kept verbatim in the row's JSON extras, which
+    take precedence when the document is read back.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.flags: List[int] = []
+        self.prep_time: List[int] = []
+        self.vegetarian: List[int] = []
+        # value -> code, in first-seen order
+        self.dictionaries: Dict[str, Dict[str, int]] = {field: {} for field in DICTIONARY_FIELDS + LIST_FIELDS}
+        self.codes: Dict[str, List[int]] = {field: [] for field in DICTIONARY_FIELDS}
+        self.list_values: Dict[str, List[int]] = {field: [] for field in LIST_FIELDS}
+        self.list_offsets: Dict[str, List[int]] = {field: [0] for field in LIST_FIELDS}
+        self.heaps: Dict[str, bytearray] = {field: bytearray() for field in TEXT_FIELDS + ("extras",)}
+        self.heap_offsets: Dict[str, List[int]] = {field: [0] for field in TEXT_FIELDS + ("extras",)}
+        self.ids: List[str] = []
+        self.trending: List[float] = []
+    
+    def _code(self, field: str, value: str) -> int:
+        codes = self.dictionaries[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+    
+    def _append_text(self, field: str, data: bytes) -> None:
+        self.heaps[field] += data
+        self.heap_offsets[field].append(len(self.heaps[field]))
+    
+    def add(self, recipe: Dict[str, Any]) -> None:
+        extras = {field: value for field, value in recipe.items() if field not in DOCUMENT_FIELDS}
+        flags = 0
+        
+        recipe_id = str(recipe["_id"])
+        self.ids.append(recipe_id)
+        self._append_text("_id", recipe_id.encode())
+        
+        for field in ("name", "instructions"):
+            value = recipe.get(field, _MISSING)
+            if isinstance(value, str):
+                flags |= PRESENCE_BITS[field]
+                self._append_text(field, value.encode())
+            else:
+                self._append_text(field, b"")
+                if value is not _MISSING:
+                    extras[field] = value
+        
+        for field in DICTIONARY_FIELDS:
+            value = recipe.get(field, _MISSING)
+            if isinstance(value, str):
+                self.codes[field].append(self._code(field, value))
+            else:
+                self.codes[field].append(-1)
+                if value is not _MISSING:
+                    extras[field] = value
+        
+        for field in LIST_FIELDS:
+            values = recipe.get(field, _MISSING)
+            if isinstance(values, list) and all(isinstance(value, str) for value in values):
+                flags |= PRESENCE_BITS[field]
+                self.list_values[field].extend(self._code(field, value) for value in values)
+            elif values is not _MISSING:
+                extras[field] = values
+            self.list_offsets[field].append(len(self.list_values[field]))
+        
+        prep_time = recipe.get("prep_time_minutes", _MISSING)
+        if isinstance(prep_time, int) and not isinstance(prep_time, bool) and 0 <= prep_time <= _INT32_MAX:
+            self.prep_time.append(prep_time)
+        else:
+            self.prep_time.append(-1)
+            if prep_time is not _MISSING:
+                extras["prep_time_minutes"] = prep_time
+        
+        vegetarian = recipe.get("is_vegetarian", _MISSING)
+        if vegetarian is _MISSING:
+            self.vegetarian.append(-1)
+        else:
+            self.vegetarian.append(int(bool(vegetarian)))
+            if not isinstance(vegetarian, bool):
+                extras["is_vegetarian"] = vegetarian
+        
+        self._append_text("extras", orjson.dumps(extras, default=str) if extras else b"")
+        trending_score = recipe.get("trending_score")
+        self.trending.append(trending_score if isinstance(trending_score, (int, float)) and not isinstance(trending_score, bool) else 0.0)
+        self.flags.append(flags)
+        self.count += 1
+    
+    def columns(self) -> Dict[str, np.ndarray]:
+        """All columns, by name."""
+        columns = {
+            "flags": np.array(self.flags, dtype="<u1"),
+            "prep_time_minutes": np.array(self.prep_time, dtype="<i4"),
+            "is_vegetarian": np.array(self.vegetarian, dtype="<i1"),
+        }
+        for field in DICTIONARY_FIELDS:
+            columns[field] = np.array(self.codes[field], dtype=_code_dtype(len(self.dictionaries[field])))
+        for field in LIST_FIELDS:
+            offsets = np.array(self.list_offsets[field], dtype="<u4")
+            columns[f"{field}.values"] = np.array(self.list_values[field], dtype=_code_dtype(len(self.dictionaries[field])))
+            columns[f"{field}.offsets"] = offsets
+            # Owning row of each value, and the rows having each code (postings)
+            rows = np.repeat(np.arange(self.count, dtype="<u4"), np.diff(offsets))
+            columns[f"{field}.rows"] = rows
+            values = columns[f"{field}.values"]
+            columns[f"{field}.postings"] = rows[np.argsort(values, kind="stable")]
+            per_code = np.bincount(values, minlength=len(self.dictionaries[field]))
+            columns[f"{field}.posting_offsets"] = np.concatenate(([0], np.cumsum(per_code))).astype("<u4")
+        for field, heap in self.heaps.items():
+            columns[f"{field}.offsets"] = np.array(self.heap_offsets[field], dtype="<u8")
+            columns[f"{field}.heap"] = np.frombuffer(bytes(heap), dtype="u1")
+        # Row numbers sorted by ID (binary search), by prep time (meal-plan
+        # candidates) and by trending score, highest first (list(sort="trending"))
+        columns["id_order"] = np.array(sorted(range(self.count), key=self.ids.__getitem__), dtype="<u4")
+        columns["prep_order"] = np.argsort(np.maximum(columns["prep_time_minutes"], 0), kind="stable").astype("<u4")
+        columns["trending_order"] = np.argsort(-np.array(self.trending, dtype="<f8"), kind="stable").astype("<u4")
+        return columns
+    
+    def write(self, f) -> None:
+        """Write the snapshot: MAGIC, aligned columns, header JSON, trailer."""
+        f.write(MAGIC)
+        position = len(MAGIC)
+        layout = {}
+        for name, column in self.columns().items():
+            padding = -position % _ALIGNMENT
+            f.write(b"\0" * padding)
+            position += padding
+            layout[name] = {"dtype": column.dtype.str, "offset": position, "length": len(column)}
+            f.write(column.tobytes())
+            position += column.nbytes
+        
+        header = orjson.dumps({
+            "version": FORMAT_VERSION,
+            "count": self.count,
+            "dictionaries": {field: list(codes) for field, codes in self.dictionaries.items()},
+            "columns": layout
+        })
+        f.write(header)
+        f.write(_TRAILER.pack(len(header), MAGIC))
+
+
+def write_columnar_snapshot(recipes: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Write recipes to a columnar snapshot at path and return how many were written.
+    
+    The file is built under a temporary name in the same directory and
+    renamed over path, so readers see either the old snapshot or the new
+    one, never a partial file.
+    """
+    builder = _SnapshotBuilder()
+    for recipe in recipes:
+        builder.add(recipe)
+    
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".columnar-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            builder.write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return builder.count
+
+
+class ColumnarSnapshot:
+    """One memory-mapped snapshot file; immutable once opened."""
+    
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < len(MAGIC) + _TRAILER.size:
+                raise ValueError(f"{path} is not a columnar recipe snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        
+        header_length, magic = _TRAILER.unpack(self._mmap[-_TRAILER.size:])
+        if magic != MAGIC or self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a columnar recipe snapshot")
+        header = orjson.loads(self._mmap[-_TRAILER.size - header_length:-_TRAILER.size])
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar snapshot version {header['version']} in {path}")
+        
+        self.count: int = header["count"]
+        self.dictionaries: Dict[str, List[str]] = header["dictionaries"]
+        self._codes = {field: {value: code for code, value in enumerate(values)} for field, values in self.dictionaries.items()}
+        self._heap_starts: Dict[str, int] = {}
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, spec in header["columns"].items():
+            if name.endswith(".heap"):
+                self._heap_starts[name[:-len(".heap")]] = spec["offset"]
+                continue
+            self.columns[name] = np.frombuffer(self._mmap, dtype=spec["dtype"], count=spec["length"], offset=spec["offset"])
+        
+        self._all_facets: Optional[Dict[str, Any]] = None
+        self._lsh_index: Optional[Dict[int, List[int]]] = None
+    
+    def matches(self, stat: os.stat_result) -> bool:
+        """Whether stat describes the file this snapshot was loaded from."""
+        return self.identity == (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    # Row access
+    
+    def _bytes(self, field: str, row: int) -> bytes:
+        offsets = self.columns[f"{field}.offsets"]
+        start = self._heap_starts[field]
+        return self._mmap[start + int(offsets[row]):start + int(offsets[row + 1])]
+    
+    def text(self, field: str, row: int) -> str:
+        return self._bytes(field, row).decode()
+    
+    def find(self, recipe_id: str) -> Optional[int]:
+        """Row of a recipe ID, by binary search over id_order."""
+        key = recipe_id.encode()
+        order = self.columns["id_order"]
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._bytes("_id", int(order[middle])) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            row = int(order[low])
+            if self._bytes("_id", row) == key:
+                return row
+        return None
+    
+    def _value(self, field: str, row: int, flags: int) -> Any:
+        """A field's value from its column, or _MISSING."""
+        if field == "_id":
+            return self.text("_id", row)
+        if field in ("name", "instructions"):
+            return self.text(field, row) if flags & PRESENCE_BITS[field] else _MISSING
+        if field in LIST_FIELDS:
+            if not flags & PRESENCE_BITS[field]:
+                return _MISSING
+            offsets = self.columns[f"{field}.offsets"]
+            vocabulary = self.dictionaries[field]
+            codes = self.columns[f"{field}.values"][int(offsets[row]):int(offsets[row + 1])]
+            return [vocabulary[code] for code in codes.tolist()]
+        if field in DICTIONARY_FIELDS:
+            code = int(self.columns[field][row])
+            return self.dictionaries[field][code] if code >= 0 else _MISSING
+        if field == "prep_time_minutes":
+            prep_time = int(self.columns[field][row])
+            return prep_time if prep_time >= 0 else _MISSING
+        if field == "is_vegetarian":
+            vegetarian = int(self.columns[field][row])
+            return bool(vegetarian) if vegetarian >= 0 else _MISSING
+        return _MISSING
+    
+    def document(self, row: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Rebuild a recipe document, keeping only _id and fields when given."""
+        flags = int(self.columns["flags"][row])
+        extras_bytes = self._bytes("extras", row)
+        extras = orjson.loads(extras_bytes) if extras_bytes else {}
+        for field in TIMESTAMP_FIELDS:
+            if isinstance(extras.get(field), str):
+                extras[field] = datetime.fromisoformat(extras[field])
+        
+        recipe = {}
+        for field in (["_id", *fields] if fields else DOCUMENT_FIELDS):
+            value = extras.pop(field, _MISSING)
+            if value is _MISSING:
+                value = self._value(field, row, flags)
+            if value is not _MISSING:
+                recipe[field] = value
+        if not fields:
+            recipe.update(extras)
+        return recipe
+    
+    # Vectorized filters
+    
+    def _rows_with_codes(self, field: str, codes: List[int]) -> np.ndarray:
+        """Mask of rows whose list field contains any of codes."""
+        mask = np.zeros(self.count, dtype=bool)
+        if len(codes) > _MAX_POSTING_LOOKUPS:
+            hits = np.isin(self.columns[f"{field}.values"], codes)
+            mask[self.columns[f"{field}.rows"][hits]] = True
+            return mask
+        postings = self.columns[f"{field}.postings"]
+        offsets = self.columns[f"{field}.posting_offsets"]
+        for code in codes:
+            mask[postings[offsets[code]:offsets[code + 1]]] = True
+        return mask
+    
+    def _rows_with(self, field: str, values: Iterable[str]) -> np.ndarray:
+        """Mask of rows whose list field contains any of values (exact match)."""
+        return self._rows_with_codes(field, [self._codes[field][value] for value in values if value in self._codes[field]])
+    
+    def _filter_mask(self, filters: RecipeSearchFilters) -> Tuple[np.ndarray, List[str]]:
+        """Mask of rows passing the column filters, and the columns used."""
+        mask = np.ones(self.count, dtype=bool)
+        used = []
+        
+        if filters.cuisine:
+            pattern = re.compile(filters.cuisine, re.IGNORECASE)
+            codes = [code for code, cuisine in enumerate(self.dictionaries["cuisine"]) if pattern.search(cuisine)]
+            if pattern.search(str(None)):
+                # The in-memory store matches absent cuisines as "None"
+                codes.append(-1)
+            mask &= np.isin(self.columns["cuisine"], codes)
+            used.append("cuisine")
+        if filters.is_vegetarian is not None:
+            mask &= (self.columns["is_vegetarian"] == 1) == filters.is_vegetarian
+            used.append("is_vegetarian")
+        if filters.difficulty:
+            code = self._codes["difficulty"].get(filters.difficulty.lower())
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self.columns["difficulty"] == code
+            used.append("difficulty")
+        if filters.tags:
+            mask &= self._rows_with("tags", [tag.lower() for tag in filters.tags])
+            used.append("tags")
+        if filters.ingredients:
+            for ingredient in filters.ingredients:
+                mask &= self._rows_with("ingredients", [ingredient.lower()])
+            used.append("ingredients")
+        if filters.max_prep_time:
+            # Absent prep times are stored as -1 and pass, like a prep time of 0
+            mask &= self.columns["prep_time_minutes"] <= filters.max_prep_time
+            used.append("prep_time_minutes")
+        return mask, used
+    
+    def search(self, filters: RecipeSearchFilters, limit: Optional[int] = None) -> Tuple[List[int], int, List[str]]:
+        """
+        Matching rows in storage order, up to limit.
+        
+        Returns (rows, rows examined per row, columns used). Only
+        search_query needs a per-row check, of the name, for candidates
+        not already matched through an ingredient.
+        """
+        mask, used = self._filter_mask(filters)
+        rows = np.flatnonzero(mask)
+        if not filters.search_query:
+            rows = rows[:limit].tolist()
+            return rows, len(rows), used
+        
+        pattern = re.compile(filters.search_query, re.IGNORECASE)
+        by_ingredient = self._rows_with_codes("ingredients", [
+            code for code, ingredient in enumerate(self.dictionaries["ingredients"]) if pattern.search(ingredient)
+        ])
+        
+        matched = []
+        examined = 0
+        for row, hit in zip(rows.tolist(), by_ingredient[rows].tolist()):
+            if limit is not None and len(matched) >= limit:
+                break
+            examined += 1
+            if hit or pattern.search(self.text("name", row)):
+                matched.append(row)
+        return matched, examined, used + ["name"]
+    
+    def facet_counts(self, rows: np.ndarray) -> Dict[str, Any]:
+        """Facets response for the given rows."""
+        counts: Dict[str, Counter] = {field: Counter() for field in FACET_FIELDS}
+        
+        for field in DICTIONARY_FIELDS:
+            codes = self.columns[field][rows].astype(np.int64)
+            absent = int(np.count_nonzero(codes < 0))
+            if absent:
+                counts[field][facet_value(None)] += absent
+            values = self.dictionaries[field]
+            for code, count in enumerate(np.bincount(codes[codes >= 0], minlength=len(values)).tolist()):
+                if count:
+                    counts[field][facet_value(values[code])] += count
+        
+        vegetarian = int(np.count_nonzero(self.columns["is_vegetarian"][rows] == 1))
+        counts["is_vegetarian"]["true"] = vegetarian
+        counts["is_vegetarian"]["false"] = len(rows) - vegetarian
+        
+        prep_time = self.columns["prep_time_minutes"][rows]
+        buckets = np.searchsorted(PREP_TIME_BOUNDARIES, prep_time, side="right") - 1
+        buckets[prep_time < 0] = len(PREP_TIME_LABELS) - 1
+        for label, count in zip(PREP_TIME_LABELS, np.bincount(buckets, minlength=len(PREP_TIME_LABELS)).tolist()):
+            counts["prep_time"][label] = count
+        
+        # Each tag counts once per recipe, even if repeated in its list
+        selected = np.zeros(self.count, dtype=bool)
+        selected[rows] = True
+        tag_rows = self.columns["tags.rows"]
+        in_rows = selected[tag_rows]
+        tag_count = len(self.dictionaries["tags"])
+        pairs = np.unique(tag_rows[in_rows].astype(np.int64) * tag_count + self.columns["tags.values"][in_rows])
+        tags = self.dictionaries["tags"]
+        for code, count in enumerate(np.bincount(pairs % max(tag_count, 1), minlength=tag_count).tolist()):
+            if count:
+                counts["tags"][facet_value(tags[code])] += count
+        
+        return build_facets(len(rows), counts)
+    
+    def facets(self, filters: Optional[RecipeSearchFilters] = None) -> Dict[str, Any]:
+        if filters is None or not filters.model_dump(exclude_none=True):
+            if self._all_facets is None:
+                self._all_facets = self.facet_counts(np.arange(self.count))
+            return self._all_facets
+        rows, _, _ = self.search(filters)
+        return self.facet_counts(np.array(rows, dtype=np.int64))
+    
+    def lsh_index(self) -> Dict[int, List[int]]:
+        """LSH band -> rows, built from the rows' extras on first use."""
+        if self._lsh_index is None:
+            index: Dict[int, List[int]] = {}
+            for row in range(self.count):
+                extras_bytes = self._bytes("extras", row)
+                if b"lsh_bands" not in extras_bytes:
+                    continue
+                for band in orjson.loads(extras_bytes).get("lsh_bands") or []:
+                    index.setdefault(band, []).append(row)
+            self._lsh_index = index
+        return self._lsh_index
+    
+    def plan_candidates(
+        self,
+        max_prep_time: Optional[int],
+        difficulties: Optional[List[str]],
+        is_vegetarian: Optional[bool],
+        limit: int
+    ) -> List[int]:
+        """Rows passing the meal-plan prefilter, fastest first, up to limit."""
+        mask = np.ones(self.count, dtype=bool)
+        if max_prep_time is not None:
+            mask &= self.columns["prep_time_minutes"] <= max_prep_time
+        if difficulties is not None:
+            codes = [self._codes["difficulty"][level] for level in difficulties if level in self._codes["difficulty"]]
+            mask &= np.isin(self.columns["difficulty"], codes)
+        if is_vegetarian is not None:
+            mask &= (self.columns["is_vegetarian"] == 1) == is_vegetarian
+        order = self.columns["prep_order"]
+        return order[mask[order]][:limit].tolist()
+
+
+class ColumnarRecipeStore(RecipeStore):
+    """
+    Read-only recipe storage over a memory-mapped columnar snapshot.
+    
+    Every method works on the snapshot current when it started, so a swap
+    in refresh() never changes the data under a running request.
+    """
+    
+    read_only = True
+    
+    def __init__(self, path: str, refresh_interval_s: float = 5.0):
+        self.path = path
+        self.refresh_interval_s = refresh_interval_s
+        self._snapshot = ColumnarSnapshot(path)
+        self._checked_at = time.monotonic()
+        logger.info("Mapped columnar snapshot %s (%d recipes)", path, self._snapshot.count)
+    
+    def __len__(self) -> int:
+        return self._snapshot.count
+    
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Swap in a newer snapshot file if one has replaced ours.
+        
+        Checks at most every refresh_interval_s (0 disables the periodic
+        check; force checks now). Returns True if the snapshot changed. A
+        file that can't be loaded is logged and the current snapshot kept.
+        """
+        now = time.monotonic()
+        if not force and (self.refresh_interval_s <= 0 or now - self._checked_at < self.refresh_interval_s):
+            return False
+        self._checked_at = now
+        try:
+            if self._snapshot.matches(os.stat(self.path)):
+                return False
+            snapshot = ColumnarSnapshot(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not reload columnar snapshot %s: %s", self.path, e)
+            return False
+        # The old mapping is released once the last request using it finishes
+        self._snapshot = snapshot
+        logger.info("Swapped in columnar snapshot %s (%d recipes)", self.path, snapshot.count)
+        return True
+    
+    async def insert(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        self._check_writable()
+    
+    async def get(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        snapshot = self._snapshot
+        row = snapshot.find(recipe_id)
+        return snapshot.document(row) if row is not None else None
+    
+    async def get_many(self, recipe_ids: List[str], fields: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        snapshot = self._snapshot
+        results = []
+        for recipe_id in recipe_ids:
+            row = snapshot.find(recipe_id)
+            results.append(snapshot.document(row, fields) if row is not None else None)
+        return results
+    
+    async def list(self, skip: int = 0, limit: int = 100, sort: Optional[str] = None) -> List[Dict[str, Any]]:
+        snapshot = self._snapshot
+        stop = min(skip + limit, snapshot.count) if limit else snapshot.count
+        # Snapshots written before trending_order existed list in storage order
+        order = snapshot.columns.get("trending_order") if sort == "trending" else None
+        rows = range(skip, stop) if order is None else order[skip:stop].tolist()
+        return [snapshot.document(row) for row in rows]
+    
+    async def update(self, recipe_id: str, changes: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        self._check_writable()
+    
+    async def delete(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        self._check_writable()
+    
+    async def search(self, filters: RecipeSearchFilters, limit: int = 100) -> List[Dict[str, Any]]:
+        snapshot = self._snapshot
+        rows, _, _ = snapshot.search(filters, limit)
+        return [snapshot.document(row) for row in rows]
+    
+    async def explain_search(self, filters: RecipeSearchFilters, limit: int = 100) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        rows, examined, used = snapshot.search(filters, limit)
+        return {
+            "plan": f"COLUMN_SCAN({', '.join(used)})" if used else "COLUMN_SCAN",
+            "indexes": [],
+            "docs_examined": examined,
+            "keys_examined": snapshot.count * len(used),
+            "returned": len(rows)
+        }
+    
+    async def count(self) -> int:
+        return self._snapshot.count
+    
+    async def facets(self, filters: Optional[RecipeSearchFilters] = None) -> Dict[str, Any]:
+        return self._snapshot.facets(filters)
+    
+    async def rebuild_facet_counts(self) -> Dict[str, Any]:
+        # Counted from the immutable snapshot, so there's nothing to drift
+        return self._snapshot.facets(None)
+    
+    async def find_by_lsh_bands(self, bands: List[int], limit: int) -> List[Dict[str, Any]]:
+        snapshot = self._snapshot
+        index = snapshot.lsh_index()
+        rows = sorted({row for band in bands for row in index.get(band, ())})[:limit]
+        return [snapshot.document(row, ["name", "minhash"]) for row in rows]
+    
+    async def lsh_buckets(self, limit: int) -> List[List[str]]:
+        snapshot = self._snapshot
+        buckets: Dict[Tuple[int, ...], None] = {}
+        for rows in snapshot.lsh_index().values():
+            if len(rows) > 1:
+                buckets[tuple(rows)] = None
+                if len(buckets) >= limit:
+                    break
+        return [[snapshot.text("_id", row) for row in bucket] for bucket in buckets]
+    
+    async def find_unfingerprinted(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        # Only a backfill asks, and it couldn't write what it found
+        self._check_writable()
+    
+    async def set_fingerprints(self, fingerprints: Dict[str, Dict[str, Any]]) -> int:
+        self._check_writable()
+    
+    async def add_popularity(self, increments: Dict[str, Dict[str, float]], epoch: datetime) -> None:
+        self._check_writable()
+    
+    async def trending_state(self) -> Optional[Dict[str, Any]]:
+        return None
+    
+    async def rebase_trending(self, previous: Optional[Dict[str, Any]], epoch: datetime, factor: float) -> bool:
+        self._check_writable()
+    
+    async def find_plan_candidates(
+        self,
+        max_prep_time: Optional[int],
+        difficulties: Optional[List[str]],
+        is_vegetarian: Optional[bool],
+        fields: List[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        snapshot = self._snapshot
+        rows = snapshot.plan_candidates(max_prep_time, difficulties, is_vegetarian, limit)
+        return [snapshot.document(row, fields) for row in rows]
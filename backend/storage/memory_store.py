@@ -0,0 +1,385 @@
+"""
+In-memory recipe storage.
+Keeps recipes as compact RecipeRecords in a dict by ID with secondary
+indexes for the search filters, so benchmarks and tests run without MongoDB
+and read-only edge deployments can serve a catalog snapshot.
+"""
+from models import RecipeSearchFilters
+from storage.base import RecipeStore, FACET_FIELDS, FINGERPRINT_FIELDS, facet_keys, build_facets
+from storage.records import RecipeRecord
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Set, Callable
+from collections import Counter, defaultdict
+from datetime import datetime
+from bson import ObjectId
+import bisect
+import heapq
+import itertools
+import logging
+import orjson
+import re
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FIELDS = ["created_at", "updated_at"]
+
+
+class InMemoryRecipeStore(RecipeStore):
+    """
+    Recipe storage held in process memory.
+    
+    Exact-match filters (vegetarian, difficulty, tags, ingredients) and the
+    prep-time range are answered from indexes; the smallest candidate set is
+    intersected first and the remaining filters are checked per recipe.
+    Results keep insertion order, like a MongoDB natural-order scan.
+    """
+    
+    def __init__(self, recipes: Optional[Iterable[Dict[str, Any]]] = None, read_only: bool = False):
+        self._recipes: Dict[str, RecipeRecord] = {}
+        self._sequence: Dict[str, int] = {}
+        self._next_sequence = itertools.count()
+        
+        self._by_cuisine: Dict[str, Set[str]] = defaultdict(set)
+        self._by_difficulty: Dict[str, Set[str]] = defaultdict(set)
+        self._by_vegetarian: Dict[bool, Set[str]] = defaultdict(set)
+        self._by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self._by_ingredient: Dict[str, Set[str]] = defaultdict(set)
+        # (prep_time_minutes, sequence, id), sorted
+        self._by_prep_time: List[Tuple[int, int, str]] = []
+        self._facet_counts: Dict[str, Counter] = {field: Counter() for field in FACET_FIELDS}
+        # minhash.lsh_bands key -> recipe IDs
+        self._by_lsh_band: Dict[int, Set[str]] = defaultdict(set)
+        self._trending_epoch: Optional[datetime] = None
+        self._trending_factor = 1.0
+        
+        # A bulk load appends prep-time entries and sorts once; insort per recipe is quadratic
+        self._prep_time_sorted = False
+        for recipe in recipes or []:
+            self._add(dict(recipe))
+        self._by_prep_time.sort()
+        self._prep_time_sorted = True
+        self.read_only = read_only
+    
+    @classmethod
+    def from_snapshot(cls, path: str, read_only: bool = True) -> "InMemoryRecipeStore":
+        """Load a store from a JSON snapshot written by save_snapshot or export_snapshot.py."""
+        with open(path, "rb") as f:
+            recipes = orjson.loads(f.read())
+        for recipe in recipes:
+            for field in TIMESTAMP_FIELDS:
+                if isinstance(recipe.get(field), str):
+                    recipe[field] = datetime.fromisoformat(recipe[field])
+        store = cls(recipes, read_only=read_only)
+        logger.info("Loaded %s recipes from snapshot %s", len(recipes), path)
+        return store
+    
+    def __len__(self) -> int:
+        return len(self._recipes)
+    
+    def save_snapshot(self, path: str) -> None:
+        """Write all recipes to a JSON snapshot file."""
+        with open(path, "wb") as f:
+            f.write(orjson.dumps([recipe.to_dict() for recipe in self._recipes.values()], default=str))
+    
+    async def insert(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        self._check_writable()
+        recipe = dict(recipe)
+        recipe["_id"] = str(recipe.get("_id") or ObjectId())
+        self._add(recipe)
+        return recipe
+    
+    async def get(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        recipe = self._recipes.get(recipe_id)
+        return recipe.to_dict() if recipe else None
+    
+    async def get_many(self, recipe_ids: List[str], fields: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        results = []
+        for recipe_id in recipe_ids:
+            recipe = self._recipes.get(recipe_id)
+            results.append(recipe.to_dict(fields) if recipe else None)
+        return results
+    
+    async def list(self, skip: int = 0, limit: int = 100, sort: Optional[str] = None) -> List[Dict[str, Any]]:
+        stop = skip + limit if limit else None
+        recipes: Iterable[RecipeRecord] = self._recipes.values()
+        if sort == "trending":
+            # Ties (e.g. never viewed) keep insertion order
+            key = lambda recipe: recipe.get("trending_score", 0)
+            recipes = heapq.nlargest(stop, recipes, key=key) if stop else sorted(recipes, key=key, reverse=True)
+        return [recipe.to_dict() for recipe in itertools.islice(recipes, skip, stop)]
+    
+    async def update(self, recipe_id: str, changes: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        self._check_writable()
+        previous = self._recipes.get(recipe_id)
+        if previous is None:
+            return None
+        
+        previous_dict = previous.to_dict()
+        updated = {**previous_dict, **changes, "_id": recipe_id}
+        record = RecipeRecord.from_dict(updated)
+        self._unindex(previous)
+        self._recipes[recipe_id] = record
+        self._index(record)
+        return previous_dict, updated
+    
+    async def delete(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        self._check_writable()
+        if recipe_id not in self._recipes:
+            return None
+        return self._remove(recipe_id).to_dict()
+    
+    async def find_by_lsh_bands(self, bands: List[int], limit: int) -> List[Dict[str, Any]]:
+        found: Dict[str, None] = {}
+        for band in bands:
+            for recipe_id in self._by_lsh_band.get(band, ()):
+                found[recipe_id] = None
+        recipe_ids = sorted(found, key=self._sequence.__getitem__)[:limit]
+        return [self._recipes[recipe_id].to_dict(["name", "minhash"]) for recipe_id in recipe_ids]
+    
+    async def lsh_buckets(self, limit: int) -> List[List[str]]:
+        buckets: Dict[Tuple[str, ...], None] = {}
+        for recipe_ids in self._by_lsh_band.values():
+            if len(recipe_ids) > 1:
+                buckets[tuple(sorted(recipe_ids))] = None
+                if len(buckets) >= limit:
+                    break
+        return [list(bucket) for bucket in buckets]
+    
+    async def find_unfingerprinted(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        after = self._sequence.get(after_id, -1) if after_id is not None else -1
+        recipes = (
+            recipe for recipe_id, recipe in self._recipes.items()
+            if self._sequence[recipe_id] > after and recipe.get("minhash") is None
+        )
+        return [recipe.to_dict(["ingredients", "instructions"]) for recipe in itertools.islice(recipes, limit)]
+    
+    async def set_fingerprints(self, fingerprints: Dict[str, Dict[str, Any]]) -> int:
+        self._check_writable()
+        updated = 0
+        for recipe_id, values in fingerprints.items():
+            if await self.update(recipe_id, {field: values[field] for field in FINGERPRINT_FIELDS}) is not None:
+                updated += 1
+        return updated
+    
+    async def add_popularity(self, increments: Dict[str, Dict[str, float]], epoch: datetime) -> None:
+        self._check_writable()
+        # Rebases here finish in one step, so only a whole flush can be behind one
+        if epoch != self._trending_epoch:
+            return
+        for recipe_id, counts in increments.items():
+            recipe = self._recipes.get(recipe_id)
+            if recipe is not None:
+                for field, delta in counts.items():
+                    recipe.increment(field, delta)
+    
+    async def trending_state(self) -> Optional[Dict[str, Any]]:
+        if self._trending_epoch is None:
+            return None
+        return {"epoch": self._trending_epoch, "factor": self._trending_factor, "rebasing_since": None}
+    
+    async def rebase_trending(self, previous: Optional[Dict[str, Any]], epoch: datetime, factor: float) -> bool:
+        self._check_writable()
+        if self._trending_epoch != (previous["epoch"] if previous is not None else None):
+            return False
+        self._trending_epoch = epoch
+        self._trending_factor = factor
+        for recipe in self._recipes.values():
+            recipe.scale("trending_score", factor)
+        return True
+    
+    async def search(self, filters: RecipeSearchFilters, limit: int = 100) -> List[Dict[str, Any]]:
+        return [recipe.to_dict() for recipe in itertools.islice(self._iter_matches(filters), limit)]
+    
+    async def explain_search(self, filters: RecipeSearchFilters, limit: int = 100) -> Dict[str, Any]:
+        recipes, indexes = self._plan(filters)
+        matches = self._residual_filter(filters)
+        examined = returned = 0
+        for recipe in recipes:
+            if returned >= limit:
+                break
+            examined += 1
+            returned += matches(recipe)
+        return {
+            "plan": f"INDEX_INTERSECTION({', '.join(indexes)})" if indexes else "COLLECTION_SCAN",
+            "indexes": indexes,
+            "docs_examined": examined,
+            "keys_examined": None,
+            "returned": returned
+        }
+    
+    async def count(self) -> int:
+        return len(self._recipes)
+    
+    async def facets(self, filters: Optional[RecipeSearchFilters] = None) -> Dict[str, Any]:
+        if filters is None or not filters.model_dump(exclude_none=True):
+            return build_facets(len(self._recipes), self._facet_counts)
+        
+        total = 0
+        counts: Dict[str, Counter] = {field: Counter() for field in FACET_FIELDS}
+        for recipe in self._iter_matches(filters):
+            total += 1
+            for field, value in facet_keys(recipe):
+                counts[field][value] += 1
+        return build_facets(total, counts)
+    
+    async def rebuild_facet_counts(self) -> Dict[str, Any]:
+        counts: Dict[str, Counter] = {field: Counter() for field in FACET_FIELDS}
+        for recipe in self._recipes.values():
+            for field, value in facet_keys(recipe):
+                counts[field][value] += 1
+        self._facet_counts = counts
+        return build_facets(len(self._recipes), counts)
+    
+    async def find_plan_candidates(
+        self,
+        max_prep_time: Optional[int],
+        difficulties: Optional[List[str]],
+        is_vegetarian: Optional[bool],
+        fields: List[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        allowed = set(difficulties) if difficulties is not None else None
+        candidates = []
+        for prep_time, _, recipe_id in self._by_prep_time:
+            if max_prep_time is not None and prep_time > max_prep_time or len(candidates) >= limit:
+                break
+            recipe = self._recipes[recipe_id]
+            if allowed is not None and recipe.get("difficulty") not in allowed:
+                continue
+            if is_vegetarian is not None and bool(recipe.get("is_vegetarian")) != is_vegetarian:
+                continue
+            candidates.append(recipe.to_dict(fields))
+        return candidates
+    
+    def _add(self, recipe: Dict[str, Any]) -> None:
+        """Insert a recipe and its index entries."""
+        recipe_id = recipe["_id"] = str(recipe.get("_id") or ObjectId())
+        if recipe_id in self._recipes:
+            self._remove(recipe_id)
+        
+        record = RecipeRecord.from_dict(recipe)
+        self._recipes[recipe_id] = record
+        self._sequence[recipe_id] = next(self._next_sequence)
+        self._index(record)
+    
+    def _remove(self, recipe_id: str) -> RecipeRecord:
+        """Remove a recipe and its index entries, returning it."""
+        recipe = self._recipes[recipe_id]
+        self._unindex(recipe)
+        del self._recipes[recipe_id]
+        del self._sequence[recipe_id]
+        return recipe
+    
+    def _index(self, recipe: RecipeRecord) -> None:
+        """Add a stored recipe to the secondary indexes and facet counts."""
+        recipe_id = recipe.id
+        self._by_cuisine[str(recipe.get("cuisine"))].add(recipe_id)
+        self._by_difficulty[recipe.get("difficulty")].add(recipe_id)
+        self._by_vegetarian[bool(recipe.get("is_vegetarian"))].add(recipe_id)
+        for tag in recipe.get("tags") or []:
+            self._by_tag[tag].add(recipe_id)
+        for ingredient in recipe.get("ingredients") or []:
+            self._by_ingredient[ingredient].add(recipe_id)
+        if self._prep_time_sorted:
+            bisect.insort(self._by_prep_time, self._prep_time_entry(recipe))
+        else:
+            self._by_prep_time.append(self._prep_time_entry(recipe))
+        for band in recipe.get("lsh_bands") or []:
+            self._by_lsh_band[band].add(recipe_id)
+        for field, value in facet_keys(recipe):
+            self._facet_counts[field][value] += 1
+    
+    def _unindex(self, recipe: RecipeRecord) -> None:
+        """Remove a stored recipe from the secondary indexes and facet counts."""
+        recipe_id = recipe.id
+        self._discard(self._by_cuisine, str(recipe.get("cuisine")), recipe_id)
+        self._discard(self._by_difficulty, recipe.get("difficulty"), recipe_id)
+        self._discard(self._by_vegetarian, bool(recipe.get("is_vegetarian")), recipe_id)
+        for tag in recipe.get("tags") or []:
+            self._discard(self._by_tag, tag, recipe_id)
+        for ingredient in recipe.get("ingredients") or []:
+            self._discard(self._by_ingredient, ingredient, recipe_id)
+        entry = self._prep_time_entry(recipe)
+        if self._prep_time_sorted:
+            position = bisect.bisect_left(self._by_prep_time, entry)
+            if position < len(self._by_prep_time) and self._by_prep_time[position] == entry:
+                del self._by_prep_time[position]
+        else:
+            # A repeated ID within a bulk load
+            self._by_prep_time.remove(entry)
+        for band in recipe.get("lsh_bands") or []:
+            self._discard(self._by_lsh_band, band, recipe_id)
+        for field, value in facet_keys(recipe):
+            self._facet_counts[field][value] -= 1
+    
+    def _prep_time_entry(self, recipe: RecipeRecord) -> Tuple[int, int, str]:
+        return (recipe.get("prep_time_minutes") or 0, self._sequence[recipe.id], recipe.id)
+    
+    @staticmethod
+    def _discard(index: Dict[Any, Set[str]], key: Any, recipe_id: str) -> None:
+        """Remove an ID from an index bucket, dropping the bucket when empty."""
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(recipe_id)
+            if not bucket:
+                del index[key]
+    
+    def _plan(self, filters: RecipeSearchFilters) -> Tuple[Iterable[RecipeRecord], List[str]]:
+        """Candidate recipes for filters, in insertion order, and the indexes used to find them."""
+        candidate_sets: List[Tuple[str, Set[str]]] = []
+        
+        if filters.cuisine:
+            pattern = re.compile(filters.cuisine, re.IGNORECASE)
+            matched: Set[str] = set()
+            for cuisine, ids in self._by_cuisine.items():
+                if pattern.search(cuisine):
+                    matched |= ids
+            candidate_sets.append(("cuisine", matched))
+        if filters.is_vegetarian is not None:
+            candidate_sets.append(("is_vegetarian", self._by_vegetarian.get(filters.is_vegetarian, set())))
+        if filters.difficulty:
+            candidate_sets.append(("difficulty", self._by_difficulty.get(filters.difficulty.lower(), set())))
+        if filters.tags:
+            tagged: Set[str] = set()
+            for tag in filters.tags:
+                tagged |= self._by_tag.get(tag.lower(), set())
+            candidate_sets.append(("tags", tagged))
+        if filters.ingredients:
+            for ingredient in filters.ingredients:
+                candidate_sets.append(("ingredients", self._by_ingredient.get(ingredient.lower(), set())))
+        if filters.max_prep_time and not candidate_sets:
+            end = bisect.bisect_right(self._by_prep_time, (filters.max_prep_time, float("inf"), ""))
+            candidate_sets.append(("prep_time", {recipe_id for _, _, recipe_id in self._by_prep_time[:end]}))
+        
+        if not candidate_sets:
+            return iter(self._recipes.values()), []
+        
+        candidate_sets.sort(key=lambda item: len(item[1]))
+        ids = set(candidate_sets[0][1])
+        for _, other in candidate_sets[1:]:
+            ids &= other
+            if not ids:
+                break
+        recipes = (self._recipes[recipe_id] for recipe_id in sorted(ids, key=self._sequence.__getitem__))
+        return recipes, list(dict.fromkeys(name for name, _ in candidate_sets))
+    
+    @staticmethod
+    def _residual_filter(filters: RecipeSearchFilters) -> Callable[[RecipeRecord], bool]:
+        """Predicate for the filters the indexes don't fully answer."""
+        search_pattern = re.compile(filters.search_query, re.IGNORECASE) if filters.search_query else None
+        
+        def matches(recipe: RecipeRecord) -> bool:
+            if filters.max_prep_time and (recipe.get("prep_time_minutes") or 0) > filters.max_prep_time:
+                return False
+            if search_pattern and not (
+                search_pattern.search(recipe.get("name") or "")
+                or any(search_pattern.search(ingredient) for ingredient in recipe.get("ingredients") or [])
+            ):
+                return False
+            return True
+        
+        return matches
+    
+    def _iter_matches(self, filters: RecipeSearchFilters) -> Iterable[RecipeRecord]:
+        """Yield recipes matching filters, in insertion order."""
+        recipes, _ = self._plan(filters)
+        return filter(self._residual_filter(filters), recipes)
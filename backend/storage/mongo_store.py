@@ -0,0 +1,493 @@
+"""
+MongoDB recipe storage.
+Stores recipes in the `recipes` collection and keeps materialized facet
+counts in a single `recipe_stats` document, which also holds the trending
+epoch. With an outbox, every write is also recorded there for other
+instances' change feeds.
+"""
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from models import RecipeSearchFilters
+from storage.base import (
+    RecipeStore, FACET_FIELDS, FINGERPRINT_FIELDS, PREP_TIME_BOUNDARIES, PREP_TIME_LABELS,
+    facet_keys, facet_value, build_facets
+)
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from metrics import CacheMetrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# _id of the materialized facet-count document in the recipe_stats collection
+FACETS_DOC_ID = "recipe_facets"
+# _id of the recipe_stats document holding the trending epoch
+TRENDING_DOC_ID = "trending"
+
+# Reads of the materialized facet counts; a miss rebuilds them with an aggregation
+FACET_STATS_CACHE = CacheMetrics("recipe_facets")
+
+# Aggregations tried before a bootstrap gives up storing its counts until the next read
+FACET_BOOTSTRAP_ATTEMPTS = 3
+
+
+def _encode_facet_key(value: str) -> str:
+    """Make a facet value safe to use as a MongoDB field name."""
+    return value.replace("$", "\uff04").replace(".", "\uff0e")
+
+
+def _decode_facet_key(key: str) -> str:
+    """Reverse _encode_facet_key."""
+    return key.replace("\uff04", "$").replace("\uff0e", ".")
+
+
+def query_shape(value: Any) -> Any:
+    """Replace the values in a MongoDB query with "?", keeping fields and operators."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [query_shape(item) for item in value] if any(isinstance(item, dict) for item in value) else ["?"]
+    return "?"
+
+
+def _plan_stages(stage: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten an explain() plan tree, outermost stage first."""
+    stages = [stage]
+    children = stage.get("inputStages") or ([stage["inputStage"]] if "inputStage" in stage else [])
+    for child in children:
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def _id_query_value(recipe_id: str) -> Any:
+    """ObjectId for ObjectId-shaped IDs, the raw string for custom IDs."""
+    return ObjectId(recipe_id) if ObjectId.is_valid(recipe_id) else recipe_id
+
+
+class MongoRecipeStore(RecipeStore):
+    """Recipe storage backed by a Motor database."""
+    
+    def __init__(self, db: AsyncIOMotorDatabase, outbox=None):
+        self.db = db
+        self.collection = db.recipes
+        self.stats_collection = db.recipe_stats
+        # change_feed.ChangeOutbox, when changes are polled rather than streamed
+        self.outbox = outbox
+    
+    async def _record_change(self, op: str, recipe_id: str) -> None:
+        """Append a write to the outbox; the write itself has succeeded either way."""
+        if self.outbox is None:
+            return
+        try:
+            await self.outbox.record(op, recipe_id)
+        except Exception as e:
+            # Other instances see the change once their cached copies expire
+            logger.error("Error recording recipe change in outbox: %s", e)
+    
+    async def insert(self, recipe: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self.collection.insert_one(recipe)
+        
+        created_recipe = await self.collection.find_one({"_id": result.inserted_id})
+        created_recipe["_id"] = str(created_recipe["_id"])
+        
+        await self._apply_facet_increments(self._facet_increments(recipe, 1))
+        await self._record_change("create", created_recipe["_id"])
+        return created_recipe
+    
+    async def get(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        recipe = await self.collection.find_one({"_id": _id_query_value(recipe_id)})
+        if recipe:
+            recipe["_id"] = str(recipe["_id"])
+        return recipe
+    
+    async def get_many(self, recipe_ids: List[str], fields: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        # ObjectId and custom string IDs can share one $in
+        lookup_ids = [_id_query_value(recipe_id) for recipe_id in dict.fromkeys(recipe_ids)]
+        
+        projection = {field: 1 for field in fields} if fields else None
+        cursor = self.collection.find({"_id": {"$in": lookup_ids}}, projection)
+        # Keyed by the stored _id, so "ABC..." and "abc..." both find an ObjectId
+        found = {}
+        for recipe in await cursor.to_list(length=len(lookup_ids)):
+            found[recipe["_id"]] = recipe
+            recipe["_id"] = str(recipe["_id"])
+        
+        return [found.get(_id_query_value(recipe_id)) for recipe_id in recipe_ids]
+    
+    async def list(self, skip: int = 0, limit: int = 100, sort: Optional[str] = None) -> List[Dict[str, Any]]:
+        cursor = self.collection.find()
+        if sort == "trending":
+            # Served from the "trending" index; _id keeps pages stable across ties
+            cursor = cursor.sort([("trending_score", -1), ("_id", 1)])
+        cursor = cursor.skip(skip).limit(limit)
+        recipes = await cursor.to_list(length=limit)
+        
+        for recipe in recipes:
+            recipe["_id"] = str(recipe["_id"])
+        
+        return recipes
+    
+    async def update(self, recipe_id: str, changes: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        # Fetch the previous version in the same round trip so facet counts can be adjusted
+        previous = await self.collection.find_one_and_update(
+            {"_id": _id_query_value(recipe_id)},
+            {"$set": changes},
+            return_document=ReturnDocument.BEFORE
+        )
+        
+        if previous is None:
+            return None
+        
+        updated = {**previous, **changes}
+        increments = self._facet_increments(previous, -1)
+        for key, delta in self._facet_increments(updated, 1).items():
+            increments[key] = increments.get(key, 0) + delta
+        await self._apply_facet_increments(increments)
+        
+        previous["_id"] = updated["_id"] = str(previous["_id"])
+        await self._record_change("update", updated["_id"])
+        return previous, updated
+    
+    async def delete(self, recipe_id: str) -> Optional[Dict[str, Any]]:
+        deleted = await self.collection.find_one_and_delete({"_id": _id_query_value(recipe_id)})
+        if deleted is None:
+            return None
+        
+        await self._apply_facet_increments(self._facet_increments(deleted, -1))
+        deleted["_id"] = str(deleted["_id"])
+        await self._record_change("delete", deleted["_id"])
+        return deleted
+    
+    def build_search_query(self, filters: RecipeSearchFilters) -> Dict[str, Any]:
+        """Translate search filters into a MongoDB query."""
+        query = {}
+        
+        # Filter by cuisine
+        if filters.cuisine:
+            query["cuisine"] = {"$regex": filters.cuisine, "$options": "i"}
+        
+        # Filter by vegetarian
+        if filters.is_vegetarian is not None:
+            query["is_vegetarian"] = filters.is_vegetarian
+        
+        # Filter by max prep time
+        if filters.max_prep_time:
+            query["prep_time_minutes"] = {"$lte": filters.max_prep_time}
+        
+        # Filter by difficulty
+        if filters.difficulty:
+            query["difficulty"] = filters.difficulty.lower()
+        
+        # Filter by tags
+        if filters.tags:
+            query["tags"] = {"$in": [tag.lower() for tag in filters.tags]}
+        
+        # Filter by ingredients
+        if filters.ingredients:
+            query["ingredients"] = {"$all": [ing.lower() for ing in filters.ingredients]}
+        
+        # Search query in name or ingredients
+        if filters.search_query:
+            query["$or"] = [
+                {"name": {"$regex": filters.search_query, "$options": "i"}},
+                {"ingredients": {"$regex": filters.search_query, "$options": "i"}}
+            ]
+        
+        return query
+    
+    async def search(self, filters: RecipeSearchFilters, limit: int = 100) -> List[Dict[str, Any]]:
+        cursor = self.collection.find(self.build_search_query(filters))
+        recipes = await cursor.to_list(length=limit)
+        
+        for recipe in recipes:
+            recipe["_id"] = str(recipe["_id"])
+        
+        return recipes
+    
+    async def explain_search(self, filters: RecipeSearchFilters, limit: int = 100) -> Dict[str, Any]:
+        query = self.build_search_query(filters)
+        explain = await self.db.command({
+            "explain": {"find": self.collection.name, "filter": query, "limit": limit},
+            "verbosity": "executionStats"
+        })
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        # Plans from the slot-based engine nest the classic plan under queryPlan
+        winning_plan = winning_plan.get("queryPlan", winning_plan)
+        stages = _plan_stages(winning_plan)
+        execution = explain.get("executionStats", {})
+        
+        return {
+            "plan": " > ".join(
+                f"{stage.get('stage')}({stage['indexName']})" if stage.get("indexName") else str(stage.get("stage"))
+                for stage in stages
+            ),
+            "indexes": [stage["indexName"] for stage in stages if stage.get("indexName")],
+            "docs_examined": execution.get("totalDocsExamined"),
+            "keys_examined": execution.get("totalKeysExamined"),
+            "returned": execution.get("nReturned"),
+            "query": query_shape(query)
+        }
+    
+    async def count(self) -> int:
+        stats = await self._get_facet_stats()
+        return stats.get("total", 0)
+    
+    async def facets(self, filters: Optional[RecipeSearchFilters] = None) -> Dict[str, Any]:
+        """
+        Unfiltered counts are read from the materialized stats document; filtered
+        counts are computed with a single $facet aggregation over matching recipes.
+        """
+        query = self.build_search_query(filters) if filters else {}
+        if not query:
+            return self._stats_to_facets(await self._get_facet_stats())
+        return await self._aggregate_facets(query)
+    
+    async def find_plan_candidates(
+        self,
+        max_prep_time: Optional[int],
+        difficulties: Optional[List[str]],
+        is_vegetarian: Optional[bool],
+        fields: List[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {}
+        if max_prep_time is not None:
+            query["prep_time_minutes"] = {"$lte": max_prep_time}
+        if difficulties is not None:
+            query["difficulty"] = {"$in": difficulties}
+        if is_vegetarian is not None:
+            query["is_vegetarian"] = is_vegetarian
+        
+        projection = {field: 1 for field in fields}
+        cursor = self.collection.find(query, projection).sort("prep_time_minutes", 1).limit(limit)
+        candidates = await cursor.to_list(length=limit)
+        for candidate in candidates:
+            candidate["_id"] = str(candidate["_id"])
+        return candidates
+    
+    async def find_by_lsh_bands(self, bands: List[int], limit: int) -> List[Dict[str, Any]]:
+        # Served from the multikey "lsh_bands" index
+        cursor = self.collection.find({"lsh_bands": {"$in": bands}}, {"name": 1, "minhash": 1}).limit(limit)
+        candidates = await cursor.to_list(length=limit)
+        for candidate in candidates:
+            candidate["_id"] = str(candidate["_id"])
+        return candidates
+    
+    async def lsh_buckets(self, limit: int) -> List[List[str]]:
+        pipeline = [
+            {"$match": {"lsh_bands.0": {"$exists": True}}},
+            {"$project": {"lsh_bands": 1}},
+            {"$unwind": "$lsh_bands"},
+            {"$group": {"_id": "$lsh_bands", "ids": {"$push": "$_id"}}},
+            {"$match": {"ids.1": {"$exists": True}}},
+            # Pairs usually share several bands; keep each group once
+            {"$group": {"_id": "$ids"}},
+            {"$limit": limit}
+        ]
+        cursor = self.collection.aggregate(pipeline, allowDiskUse=True)
+        return [[str(recipe_id) for recipe_id in bucket["_id"]] async for bucket in cursor]
+    
+    async def find_unfingerprinted(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """
+        Keyset pages over the _id index: ObjectIds first, then custom string
+        IDs (a range on _id only matches one BSON type), so each page reads
+        on from the last instead of skipping over earlier ones.
+        """
+        after = _id_query_value(after_id) if after_id is not None else None
+        recipes: List[Dict[str, Any]] = []
+        for id_type in ("objectId", "string"):
+            if after is not None and not isinstance(after, ObjectId) and id_type == "objectId":
+                continue
+            id_query: Dict[str, Any] = {"$type": id_type}
+            if after is not None and isinstance(after, ObjectId) == (id_type == "objectId"):
+                id_query["$gt"] = after
+            cursor = self.collection.find(
+                {"_id": id_query, "minhash": {"$exists": False}},
+                {"ingredients": 1, "instructions": 1}
+            ).sort("_id", 1).limit(limit - len(recipes))
+            recipes.extend(await cursor.to_list(length=limit - len(recipes)))
+            if len(recipes) >= limit:
+                break
+        for recipe in recipes:
+            recipe["_id"] = str(recipe["_id"])
+        return recipes
+    
+    async def set_fingerprints(self, fingerprints: Dict[str, Dict[str, Any]]) -> int:
+        """One unordered bulk_write with a $set per recipe; not recorded in the outbox."""
+        operations = [
+            UpdateOne({"_id": _id_query_value(recipe_id)}, {"$set": {field: values[field] for field in FINGERPRINT_FIELDS}})
+            for recipe_id, values in fingerprints.items()
+        ]
+        if not operations:
+            return 0
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return result.matched_count
+    
+    async def add_popularity(self, increments: Dict[str, Dict[str, float]], epoch: datetime) -> None:
+        """
+        One unordered bulk_write with an $inc per recipe; not recorded in the outbox.
+        
+        Each update only matches a recipe tagged with epoch (or not yet
+        tagged), so a flush that read the epoch before a rebase can't add its
+        large increments to a score the rebase already scaled down.
+        """
+        operations = [
+            UpdateOne(
+                {"_id": _id_query_value(recipe_id), "trending_epoch": {"$in": [epoch, None]}},
+                {"$inc": counts, "$set": {"trending_epoch": epoch}}
+            )
+            for recipe_id, counts in increments.items() if counts
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+    
+    async def trending_state(self) -> Optional[Dict[str, Any]]:
+        stats = await self.stats_collection.find_one({"_id": TRENDING_DOC_ID})
+        if stats is None:
+            return None
+        return {"epoch": stats["epoch"], "factor": stats.get("factor", 1.0), "rebasing_since": stats.get("rebasing_since")}
+    
+    async def rebase_trending(self, previous: Optional[Dict[str, Any]], epoch: datetime, factor: float) -> bool:
+        """
+        Compare-and-set on the trending document, so only one instance
+        rescales; rebasing_since is set until every recipe is rescaled and
+        tagged with the new epoch, and flushes hold off meanwhile.
+        """
+        if previous is None:
+            try:
+                await self.stats_collection.insert_one({"_id": TRENDING_DOC_ID, "epoch": epoch, "factor": 1.0, "rebasing_since": None})
+            except DuplicateKeyError:
+                return False
+            return True
+        
+        result = await self.stats_collection.update_one(
+            {"_id": TRENDING_DOC_ID, "epoch": previous["epoch"], "rebasing_since": previous["rebasing_since"]},
+            {"$set": {"epoch": epoch, "factor": factor, "rebasing_since": datetime.utcnow()}}
+        )
+        if result.matched_count == 0:
+            return False
+        # Every recipe is tagged, so a late flush on the previous epoch matches none of them
+        await self.collection.update_many(
+            {"trending_epoch": {"$ne": epoch}},
+            {"$mul": {"trending_score": factor}, "$set": {"trending_epoch": epoch}}
+        )
+        await self.stats_collection.update_one({"_id": TRENDING_DOC_ID, "epoch": epoch}, {"$set": {"rebasing_since": None}})
+        return True
+    
+    async def rebuild_facet_counts(self) -> Dict[str, Any]:
+        """Mark the materialized counts stale and bootstrap them again from the recipes collection."""
+        await self.stats_collection.update_one({"_id": FACETS_DOC_ID}, {"$set": {"built": False}})
+        facets = self._stats_to_facets(await self._get_facet_stats())
+        logger.info("Rebuilt facet counts for %s recipes", facets["total"])
+        return facets
+    
+    async def _get_facet_stats(self) -> Dict[str, Any]:
+        """
+        Read the materialized facet counts, building them on first use.
+        
+        Every write bumps the document's version (creating it if needed), so
+        the aggregated counts are stored only if no write landed while they
+        were computed; otherwise the aggregation is retried. If writes keep
+        landing, the last aggregation is served unstored and the next read
+        tries again.
+        """
+        stats = await self.stats_collection.find_one({"_id": FACETS_DOC_ID})
+        FACET_STATS_CACHE.record(stats is not None and stats.get("built", False))
+        for _ in range(FACET_BOOTSTRAP_ATTEMPTS):
+            if stats is not None and stats.get("built", False):
+                return stats
+            version = stats.get("version", 0) if stats is not None else 0
+            built = {**self._facets_to_stats(await self._aggregate_facets({})), "version": version, "built": True}
+            if stats is None:
+                try:
+                    await self.stats_collection.insert_one(built)
+                    return built
+                except DuplicateKeyError:
+                    pass
+            else:
+                result = await self.stats_collection.replace_one(
+                    {"_id": FACETS_DOC_ID, "version": stats.get("version"), "built": {"$ne": True}},
+                    built
+                )
+                if result.matched_count:
+                    return built
+            stats = await self.stats_collection.find_one({"_id": FACETS_DOC_ID})
+        if stats is not None and stats.get("built", False):
+            return stats
+        logger.warning("Facet counts changed during %d bootstrap attempts; serving them unstored", FACET_BOOTSTRAP_ATTEMPTS)
+        return built
+    
+    async def _apply_facet_increments(self, increments: Dict[str, int]) -> None:
+        """Atomically adjust the materialized facet counts."""
+        increments = {key: delta for key, delta in increments.items() if delta}
+        if not increments:
+            return
+        # Upserted with a version bump so a bootstrap aggregating meanwhile sees the write and retries
+        await self.stats_collection.update_one(
+            {"_id": FACETS_DOC_ID},
+            {"$inc": {**increments, "version": 1}},
+            upsert=True
+        )
+    
+    @staticmethod
+    def _facet_increments(recipe: Dict[str, Any], delta: int) -> Dict[str, int]:
+        """Build the $inc document that adds (delta=1) or removes (delta=-1) a recipe."""
+        increments = {"total": delta}
+        for field, value in facet_keys(recipe):
+            increments[f"{field}.{_encode_facet_key(value)}"] = delta
+        return increments
+    
+    async def _aggregate_facets(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute facet counts for recipes matching a query in one $facet aggregation."""
+        pipeline = [
+            {"$match": query},
+            {"$facet": {
+                "total": [{"$count": "count"}],
+                "cuisine": [{"$group": {"_id": "$cuisine", "count": {"$sum": 1}}}],
+                "difficulty": [{"$group": {"_id": "$difficulty", "count": {"$sum": 1}}}],
+                "is_vegetarian": [{"$group": {"_id": "$is_vegetarian", "count": {"$sum": 1}}}],
+                "tags": [
+                    {"$project": {"tags": {"$setUnion": [{"$ifNull": ["$tags", []]}, []]}}},
+                    {"$unwind": "$tags"},
+                    {"$group": {"_id": "$tags", "count": {"$sum": 1}}}
+                ],
+                "prep_time": [{"$bucket": {
+                    "groupBy": "$prep_time_minutes",
+                    "boundaries": PREP_TIME_BOUNDARIES,
+                    "default": PREP_TIME_LABELS[-1]
+                }}]
+            }}
+        ]
+        results = await self.collection.aggregate(pipeline).to_list(length=1)
+        result = results[0] if results else {}
+        
+        labels = dict(zip(PREP_TIME_BOUNDARIES, PREP_TIME_LABELS))
+        total = result.get("total") or [{"count": 0}]
+        counts: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+        for field in ["cuisine", "difficulty", "is_vegetarian", "tags"]:
+            for bucket in result.get(field, []):
+                counts[field][facet_value(bucket["_id"])] = bucket["count"]
+        for bucket in result.get("prep_time", []):
+            label = labels.get(bucket["_id"], PREP_TIME_LABELS[-1])
+            counts["prep_time"][label] = counts["prep_time"].get(label, 0) + bucket["count"]
+        
+        return build_facets(total[0]["count"], counts)
+    
+    @staticmethod
+    def _stats_to_facets(stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a stats document into the facets response shape."""
+        counts = {
+            field: {_decode_facet_key(key): count for key, count in (stats.get(field) or {}).items()}
+            for field in FACET_FIELDS
+        }
+        return build_facets(stats.get("total", 0), counts)
+    
+    @staticmethod
+    def _facets_to_stats(facets: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a facets response back into a stats document."""
+        stats = {"_id": FACETS_DOC_ID, "total": facets["total"]}
+        for field in FACET_FIELDS:
+            stats[field] = {_encode_facet_key(key): count for key, count in facets[field].items()}
+        return stats
@@ -0,0 +1,152 @@
+"""
+Compact in-process recipe records.
+RecipeRecord holds a recipe in __slots__ instead of a dict, so a large
+catalog kept in process memory costs a fraction of the raw documents:
+
+- cuisine, tags and ingredients are interned, so every recipe shares one
+  string object per distinct value ("indian", "spices", "dinner");
+- difficulty is a small-int code into DIFFICULTY_LEVELS;
+- list fields are tuples;
+- created_at/updated_at are integer microseconds rather than datetimes;
+- instructions stay UTF-8 encoded until read.
+
+Fields that don't fit these shapes (and any other fields) are kept as-is in
+a per-record extras dict, so to_dict() always returns the original document.
+"""
+from models import DIFFICULTY_LEVELS
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import sys
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_DIFFICULTY_CODES = {level: code for code, level in enumerate(DIFFICULTY_LEVELS)}
+_MISSING = object()
+
+# Document field -> slot, in document order
+_FIELD_SLOTS = {
+    "_id": "id",
+    "name": "name",
+    "cuisine": "cuisine",
+    "is_vegetarian": "is_vegetarian",
+    "prep_time_minutes": "prep_time_minutes",
+    "ingredients": "ingredients",
+    "difficulty": "difficulty_code",
+    "instructions": "instructions_utf8",
+    "tags": "tags",
+    "created_at": "created_us",
+    "updated_at": "updated_us",
+}
+
+
+def _from_microseconds(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+# Slot value -> field value, for fields not stored as-is
+_READERS = {
+    "difficulty": DIFFICULTY_LEVELS.__getitem__,
+    "instructions": bytes.decode,
+    "created_at": _from_microseconds,
+    "updated_at": _from_microseconds,
+}
+# As _READERS, for to_dict(): list fields are copied back into lists
+_DECODERS = {**_READERS, "tags": list, "ingredients": list}
+
+
+def _symbols(values: Any) -> Optional[tuple]:
+    """Interned tuple for a list of strings, or None if it isn't one."""
+    if isinstance(values, list) and all(type(value) is str for value in values):
+        return tuple(sys.intern(value) for value in values)
+    return None
+
+
+class RecipeRecord:
+    """
+    A recipe document in compact form.
+    
+    get() reads a field like dict.get, without building the whole document
+    (list fields come back as tuples), so records can be filtered, indexed
+    and passed straight to responses.to_response_dict(). to_dict() rebuilds
+    the plain document.
+    """
+    
+    # Unset slots are absent fields
+    __slots__ = tuple(_FIELD_SLOTS.values()) + ("extras",)
+    
+    @classmethod
+    def from_dict(cls, recipe: Dict[str, Any]) -> "RecipeRecord":
+        record = cls.__new__(cls)
+        extras = None
+        for field, value in recipe.items():
+            slot = _FIELD_SLOTS.get(field)
+            encoded = record._encode(field, value) if slot is not None else _MISSING
+            if encoded is _MISSING:
+                if extras is None:
+                    extras = {}
+                extras[field] = value
+            else:
+                setattr(record, slot, encoded)
+        record.extras = extras
+        return record
+    
+    @staticmethod
+    def _encode(field: str, value: Any) -> Any:
+        """Compact form of a field value, or _MISSING to keep it in extras."""
+        if field in ("_id", "name"):
+            return value
+        if field == "cuisine":
+            return sys.intern(value) if type(value) is str else _MISSING
+        if field in ("tags", "ingredients"):
+            symbols = _symbols(value)
+            return _MISSING if symbols is None else symbols
+        if field == "difficulty":
+            return _DIFFICULTY_CODES.get(value, _MISSING) if type(value) is str else _MISSING
+        if field == "is_vegetarian":
+            return value if type(value) is bool else _MISSING
+        if field == "prep_time_minutes":
+            return value if type(value) is int else _MISSING
+        if field == "instructions":
+            return value.encode() if type(value) is str else _MISSING
+        # created_at / updated_at: naive datetimes, as MongoDB returns them
+        if type(value) is datetime and value.tzinfo is None:
+            return (value - _EPOCH) // _MICROSECOND
+        return _MISSING
+    
+    def get(self, field: str, default: Any = None) -> Any:
+        """A field's value, or default when absent; list fields are tuples."""
+        slot = _FIELD_SLOTS.get(field)
+        if slot is not None:
+            value = getattr(self, slot, _MISSING)
+            if value is not _MISSING:
+                reader = _READERS.get(field)
+                return value if reader is None else reader(value)
+        if self.extras is not None:
+            return self.extras.get(field, default)
+        return default
+    
+    def increment(self, field: str, delta: float) -> None:
+        """Add delta to a numeric field kept in extras (e.g. popularity counters), starting from 0."""
+        if self.extras is None:
+            self.extras = {}
+        self.extras[field] = self.extras.get(field, 0) + delta
+    
+    def scale(self, field: str, factor: float) -> None:
+        """Multiply a numeric field kept in extras, if present."""
+        if self.extras is not None and field in self.extras:
+            self.extras[field] *= factor
+    
+    def to_dict(self, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """The plain document, or just _id and fields when given."""
+        recipe = {}
+        for field in (["_id", *fields] if fields else _FIELD_SLOTS):
+            slot = _FIELD_SLOTS.get(field)
+            value = getattr(self, slot, _MISSING) if slot is not None else _MISSING
+            if value is not _MISSING:
+                decoder = _DECODERS.get(field)
+                recipe[field] = value if decoder is None else decoder(value)
+            elif self.extras is not None and field in self.extras:
+                recipe[field] = self.extras[field]
+        if not fields and self.extras is not None:
+            recipe.update(self.extras)
+        return recipe
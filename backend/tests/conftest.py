@@ -0,0 +1,11 @@
+"""
+Shared test configuration.
+Runs the API against the in-memory recipe store so tests don't need MongoDB.
+"""
+import os
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+# Write logs synchronously so pytest captures them with the test
+os.environ.setdefault("LOG_ASYNC", "false")
+# Admin routes are closed without a token
+os.environ.setdefault("ADMIN_TOKEN", "test-admin-token")
@@ -0,0 +1,92 @@
+"""
+Unit tests for admission control.
+Run with: pytest tests/test_admission.py
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from admission import AdmissionControlMiddleware, ConcurrencyLimiter, parse_group_limits, route_group
+
+
+def test_route_groups():
+    """Cheap reads, expensive reads and AI calls land in separate groups."""
+    assert route_group("GET", "/api/recipes/") == "crud"
+    assert route_group("DELETE", "/api/recipes/abc") == "crud"
+    assert route_group("POST", "/api/recipes/search") == "search"
+    assert route_group("POST", "/api/plans/generate") == "search"
+    assert route_group("POST", "/api/ai/suggest-recipe") == "ai"
+    assert route_group("GET", "/api/ai/health") is None
+    assert route_group("GET", "/api/recipes/stream") is None
+    assert route_group("OPTIONS", "/api/recipes/search") is None
+    assert route_group("GET", "/metrics") is None
+    assert parse_group_limits("search=16:32, ai=0.5") == {"search": (16.0, 32.0), "ai": (0.5, 0.0)}
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_then_sheds():
+    """Beyond the limit requests queue in order; beyond the queue they are rejected."""
+    limiter = ConcurrencyLimiter("test", limit=1, queue_size=1, queue_timeout_s=1)
+    assert await limiter.acquire() is None
+    
+    queued = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert await limiter.acquire() == "queue_full"
+    
+    limiter.release()
+    assert await queued is None and limiter.active == 1
+    
+    limiter.queue_timeout_s = 0.01
+    assert await limiter.acquire() == "queue_timeout"
+    limiter.release()
+    assert limiter.active == 0
+
+
+def _app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+    
+    @app.post("/api/recipes/search")
+    async def search():
+        await release.wait()
+        return []
+    
+    @app.get("/api/recipes/{recipe_id}")
+    async def get_recipe(recipe_id: str):
+        return {"_id": recipe_id}
+    
+    return app
+
+
+@pytest.mark.asyncio
+async def test_full_group_gets_503_while_other_groups_are_served():
+    """A saturated search group sheds with Retry-After; CRUD reads still go through."""
+    release = asyncio.Event()
+    app = AdmissionControlMiddleware(_app(release), {"search": (1, 0)}, {}, retry_after_s=2)
+    
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        slow = asyncio.ensure_future(client.post("/api/recipes/search"))
+        await asyncio.sleep(0.05)
+        
+        shed = await client.post("/api/recipes/search")
+        assert shed.status_code == 503 and shed.headers["retry-after"] == "2"
+        assert (await client.get("/api/recipes/r1")).status_code == 200
+        
+        release.set()
+        assert (await slow).status_code == 200
+        assert (await client.post("/api/recipes/search")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_api_key_or_ip():
+    """Each configured API key has its own bucket; unknown keys share the IP's."""
+    app = AdmissionControlMiddleware(_app(asyncio.Event()), {}, {"crud": (0.5, 2)}, api_keys=("key-a",))
+    
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        codes = [(await client.get("/api/recipes/r1")).status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        
+        limited = await client.get("/api/recipes/r1", headers={"X-API-Key": "made-up"})
+        assert limited.status_code == 429 and limited.headers["retry-after"] == "2"
+        assert (await client.get("/api/recipes/r1", headers={"X-API-Key": "key-a"})).status_code == 200
@@ -0,0 +1,50 @@
+"""
+Unit tests for the AI service's model calls.
+Run with: pytest tests/test_ai_service.py
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from config import settings
+from main import app
+from services.ai_service import AIService, ai_cache, suggestion_cache
+
+
+@pytest.mark.asyncio
+async def test_model_calls_do_not_block_other_requests(monkeypatch):
+    """Slow model calls run side by side while a CRUD read answers straight away."""
+    ai_cache.clear()
+    suggestion_cache.clear()
+
+    class SlowModel:
+        def generate_content(self, prompt, generation_config=None):
+            time.sleep(0.3)
+            return SimpleNamespace(text="Slow suggestion", usage_metadata=None)
+
+    monkeypatch.setattr(settings, "gemini_api_key", "test-key")
+    monkeypatch.setattr(AIService, "_model", SlowModel())
+    monkeypatch.setattr(AIService, "_model_failed", False)
+
+    ingredient_sets = [["rice", "dal"], ["pasta", "basil"], ["tofu", "soy sauce"], ["paneer", "spinach"]]
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        started = time.perf_counter()
+        suggestions = [
+            asyncio.ensure_future(client.post("/api/ai/suggest-recipe", json={"ingredients": ingredients}))
+            for ingredients in ingredient_sets
+        ]
+        await asyncio.sleep(0.05)
+
+        # Answered while every model call is still in flight
+        assert (await client.get("/api/recipes/")).status_code == 200
+        assert time.perf_counter() - started < 0.2
+
+        responses = await asyncio.gather(*suggestions)
+        assert [response.status_code for response in responses] == [200] * 4
+        assert time.perf_counter() - started < 0.3 * 3
+
+    ai_cache.clear()
+    suggestion_cache.clear()
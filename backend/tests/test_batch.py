@@ -0,0 +1,49 @@
+"""
+Unit tests for request batching (POST /api/batch).
+Run with: pytest tests/test_batch.py
+"""
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from models import MAX_BATCH_REQUESTS
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_sub_requests():
+    """Each sub-request's status and body come back in request order."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        created = (await client.post("/api/recipes/", json={
+            "name": "Batch Bread", "cuisine": "Test", "prep_time_minutes": 40, "ingredients": ["flour", "water"],
+            "difficulty": "medium", "instructions": "Knead, rise and bake."
+        })).json()
+        
+        response = await client.post("/api/batch", headers={"Accept-Encoding": "gzip"}, json={"requests": [
+            {"method": "GET", "path": "/api/recipes/count"},
+            {"method": "get", "path": f"/api/recipes/{created['_id']}"},
+            {"method": "POST", "path": "/api/recipes/search", "body": {"search_query": "batch bread"}},
+            {"method": "GET", "path": "/api/recipes/?limit=1"},
+            {"method": "GET", "path": "/api/recipes/missing-recipe-id"},
+            {"method": "POST", "path": "/api/recipes/search", "body": {"max_prep_time": "soon"}},
+        ]})
+    
+    assert response.status_code == 200
+    responses = response.json()["responses"]
+    assert [item["status"] for item in responses] == [200, 200, 200, 200, 404, 422]
+    assert responses[0]["body"]["count"] >= 1
+    assert responses[1]["body"]["name"] == "Batch Bread"
+    assert [recipe["_id"] for recipe in responses[2]["body"]] == [created["_id"]]
+    assert len(responses[3]["body"]) == 1
+    assert "not found" in responses[4]["body"]["detail"]
+
+
+@pytest.mark.asyncio
+async def test_batch_limits():
+    """Oversized batches, nested batches and streams are rejected."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        too_many = [{"method": "GET", "path": "/api/recipes/count"}] * (MAX_BATCH_REQUESTS + 1)
+        assert (await client.post("/api/batch", json={"requests": too_many})).status_code == 422
+        for path in ("/api/batch", "/api/recipes/stream", "/metrics"):
+            sub_request = {"method": "POST" if path == "/api/batch" else "GET", "path": path}
+            assert (await client.post("/api/batch", json={"requests": [sub_request]})).status_code == 422
+        assert (await client.post("/api/batch", json={"requests": [{"method": "PATCH", "path": "/api/recipes/"}]})).status_code == 422
@@ -0,0 +1,85 @@
+"""
+Unit tests for the recipe change feed.
+Run with: pytest tests/test_change_feed.py
+"""
+import asyncio
+
+from bson import ObjectId
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from change_feed import ChangeEvent, ChangeFeed, RESET, change_feed, stream_event
+from response_cache import recipe_cache, facets_cache
+from storage.mongo_store import MongoRecipeStore
+
+
+async def _wait_for(events, count, timeout_s=1.0):
+    """Wait until `count` events have arrived, failing after timeout_s."""
+    deadline = asyncio.get_running_loop().time() + timeout_s
+    while len(events) < count:
+        assert asyncio.get_running_loop().time() < deadline, f"only {events} arrived"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_outbox_delivers_other_instances_writes():
+    """Writes by one instance reach another's subscribers in order, with advancing tokens."""
+    db = mongomock_motor.AsyncMongoMockClient()["change_feed_test"]
+    writer_feed = ChangeFeed("outbox", poll_interval_s=0.02)
+    reader_feed = ChangeFeed("outbox", poll_interval_s=0.02)
+    await writer_feed.start(db)
+    events = []
+    reader_feed.subscribe(events.append)
+    await reader_feed.start(db)
+    
+    store = MongoRecipeStore(db, outbox=writer_feed.outbox)
+    created = await store.insert({"name": "Dal", "cuisine": "Indian", "tags": ["comfort"]})
+    await store.update(created["_id"], {"name": "Dal Tadka"})
+    await store.delete(created["_id"])
+    
+    await _wait_for(events, 3)
+    assert [(event.op, event.recipe_id) for event in events] == [
+        ("create", created["_id"]), ("update", created["_id"]), ("delete", created["_id"])
+    ]
+    assert events[-1].token == reader_feed.resume_token
+    
+    # Re-read overlap entries are not delivered twice, and a restart resumes from the token
+    await reader_feed.stop()
+    await store.insert({"name": "Tacos"})
+    await reader_feed.start(db)
+    await _wait_for(events, 4)
+    await asyncio.sleep(0.1)
+    assert [event.op for event in events] == ["create", "update", "delete", "create"]
+    
+    await reader_feed.stop()
+    await writer_feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_events_invalidate_cached_responses():
+    """Change events from any instance drop the affected cached responses."""
+    await recipe_cache.put("r1", b'{"_id": "r1"}')
+    await recipe_cache.put("r2", b'{"_id": "r2"}')
+    await facets_cache.put("{}", b"{}")
+    
+    change_feed.publish(ChangeEvent("update", "r1"))
+    assert await recipe_cache.get("r1") is None and await recipe_cache.get("r2") is not None
+    assert await facets_cache.get("{}") is None
+    
+    change_feed.publish(ChangeEvent(RESET, None))
+    assert len(recipe_cache) == 0
+
+
+def test_stream_event_conversion():
+    """Change stream documents map to create/update/delete; collection-wide changes to reset."""
+    recipe_id = ObjectId()
+    event = stream_event({
+        "_id": {"_data": "token"}, "operationType": "replace",
+        "documentKey": {"_id": recipe_id}, "fullDocument": {"_id": recipe_id, "name": "Dal"}
+    })
+    assert (event.op, event.recipe_id, event.document, event.token) == (
+        "update", str(recipe_id), {"_id": str(recipe_id), "name": "Dal"}, {"_data": "token"}
+    )
+    assert stream_event({"_id": {}, "operationType": "delete", "documentKey": {"_id": "r1"}}).op == "delete"
+    assert stream_event({"_id": {}, "operationType": "drop"}).op == RESET
@@ -0,0 +1,116 @@
+"""
+Unit tests for the columnar snapshot store.
+Run with: pytest tests/test_columnar_store.py
+"""
+from datetime import datetime
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from models import RecipeSearchFilters
+from storage.base import ReadOnlyStoreError
+from storage.columnar_store import ColumnarRecipeStore, write_columnar_snapshot
+from storage.memory_store import InMemoryRecipeStore
+
+
+def _recipe(recipe_id, name, cuisine, is_vegetarian, prep, difficulty, ingredients, tags):
+    return {
+        "_id": recipe_id, "name": name, "cuisine": cuisine, "is_vegetarian": is_vegetarian,
+        "prep_time_minutes": prep, "difficulty": difficulty, "ingredients": ingredients, "tags": tags,
+        "instructions": f"Cook the {name.lower()}.", "created_at": datetime(2025, 1, 1, 12, 30),
+    }
+
+
+RECIPES = [
+    _recipe("r1", "Dal Tadka", "Indian", True, 30, "easy", ["lentils", "onion", "tomato"], ["comfort"]),
+    _recipe("r2", "Butter Chicken", "Indian", False, 50, "medium", ["chicken", "butter", "tomato"], ["spicy"]),
+    _recipe("r3", "Pasta Aglio", "Italian", True, 15, "easy", ["pasta", "garlic"], ["quick"]),
+    _recipe("r4", "Tacos", "Mexican", False, 25, "medium", ["tortilla", "beef"], ["quick", "spicy", "quick"]),
+    _recipe("r5", "Indo-Chinese Noodles", "Indo-Chinese", True, 20, "easy", ["noodles", "garlic"], ["quick"]),
+    # Irregular documents: missing fields and values that don't fit a column
+    {"_id": "r6", "name": "Crêpes", "prep_time_minutes": None, "is_vegetarian": "yes", "notes": {"serves": 2}},
+    {"_id": "r7", "name": "Mystery", "cuisine": None, "tags": None, "ingredients": []},
+]
+
+FILTERS = [
+    RecipeSearchFilters(),
+    RecipeSearchFilters(cuisine="indi"),
+    RecipeSearchFilters(cuisine="non"),
+    RecipeSearchFilters(is_vegetarian=True, max_prep_time=20),
+    RecipeSearchFilters(is_vegetarian=False),
+    RecipeSearchFilters(difficulty="Medium"),
+    RecipeSearchFilters(difficulty="impossible"),
+    RecipeSearchFilters(tags=["Spicy", "comfort"]),
+    RecipeSearchFilters(ingredients=["tomato", "onion"]),
+    RecipeSearchFilters(search_query="GARLIC"),
+    RecipeSearchFilters(search_query="taco", tags=["quick"]),
+    RecipeSearchFilters(search_query="^cr"),
+]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = str(tmp_path / "recipes.col")
+    write_columnar_snapshot(RECIPES, path)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_matches_in_memory_store(snapshot_path):
+    """Documents, search results, facets and plan candidates match the in-memory store."""
+    store = ColumnarRecipeStore(snapshot_path)
+    expected = InMemoryRecipeStore(RECIPES)
+    
+    assert await store.count() == 7
+    assert await store.list(skip=1, limit=3) == await expected.list(skip=1, limit=3)
+    assert await store.get("r6") == RECIPES[5]
+    assert await store.get("missing") is None
+    assert await store.get_many(["r4", "nope", "r1"], fields=["name", "tags"]) == \
+        await expected.get_many(["r4", "nope", "r1"], fields=["name", "tags"])
+    
+    for filters in FILTERS:
+        assert await store.search(filters) == await expected.search(filters), filters
+        assert await store.facets(filters) == await expected.facets(filters), filters
+    assert await store.search(RecipeSearchFilters(tags=["quick"]), limit=2) == \
+        await expected.search(RecipeSearchFilters(tags=["quick"]), limit=2)
+    
+    for args in [(25, ["easy"], None), (None, ["easy", "medium"], False), (50, None, True)]:
+        assert await store.find_plan_candidates(*args, fields=["prep_time_minutes"], limit=3) == \
+            await expected.find_plan_candidates(*args, fields=["prep_time_minutes"], limit=3)
+
+
+@pytest.mark.asyncio
+async def test_store_is_read_only(snapshot_path):
+    """Writes are rejected."""
+    store = ColumnarRecipeStore(snapshot_path)
+    
+    with pytest.raises(ReadOnlyStoreError):
+        await store.insert({"name": "New"})
+    with pytest.raises(ReadOnlyStoreError):
+        await store.update("r1", {"name": "Changed"})
+    with pytest.raises(ReadOnlyStoreError):
+        await store.delete("r1")
+
+
+@pytest.mark.asyncio
+async def test_refresh_swaps_in_replaced_snapshot(snapshot_path, tmp_path):
+    """A replaced snapshot file is picked up; a running reader keeps the old one."""
+    store = ColumnarRecipeStore(snapshot_path, refresh_interval_s=0)
+    old_snapshot = store._snapshot
+    assert store.refresh() is False
+    assert store.refresh(force=True) is False
+    
+    write_columnar_snapshot(RECIPES[:2], snapshot_path)
+    assert store.refresh(force=True) is True
+    assert await store.count() == 2
+    assert await store.get("r5") is None
+    assert old_snapshot.document(old_snapshot.find("r5"))["name"] == "Indo-Chinese Noodles"
+    
+    # A corrupt replacement is ignored
+    (tmp_path / "corrupt").write_bytes(b"not a snapshot")
+    os.replace(tmp_path / "corrupt", snapshot_path)
+    assert store.refresh(force=True) is False
+    assert await store.count() == 2
+    assert list(tmp_path.iterdir()) == [tmp_path / "recipes.col"]
@@ -0,0 +1,87 @@
+"""
+Unit tests for response compression and the encoded response cache.
+Run with: pytest tests/test_compression.py
+"""
+import gzip
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from compression import negotiate_encoding
+from main import app
+from response_cache import recipe_cache
+
+LONG_RECIPE = {
+    "name": "Slow Cooked Dal",
+    "cuisine": "Indian",
+    "is_vegetarian": True,
+    "prep_time_minutes": 45,
+    "ingredients": ["lentils", "onion", "tomato", "garlic"],
+    "difficulty": "medium",
+    "instructions": "Rinse the lentils, simmer them until soft and finish with a tempering. " * 40,
+    "tags": ["comfort"]
+}
+
+
+def test_negotiate_encoding():
+    """q-values are honoured and q=0 refuses an encoding."""
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") == negotiate_encoding("br, gzip")
+    assert negotiate_encoding("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("br, gzip", ("br", "gzip")) == "br"
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_gzipped_small_ones_are_not():
+    """Bodies over the threshold are compressed when the client accepts gzip."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/api/recipes/", json=LONG_RECIPE)
+        
+        plain = await client.get("/api/recipes/", headers={"Accept-Encoding": "identity"})
+        zipped = await client.get("/api/recipes/", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in plain.headers
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.headers["vary"] == "Accept-Encoding"
+        assert zipped.json() == plain.json()
+        assert int(zipped.headers["content-length"]) < len(plain.content)
+        
+        health = await client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in health.headers
+
+
+@pytest.mark.asyncio
+async def test_cached_recipe_keeps_compressed_form_until_updated():
+    """Detail hits reuse the stored gzip body; an update invalidates it."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        recipe_id = (await client.post("/api/recipes/", json=LONG_RECIPE)).json()["_id"]
+        
+        first = await client.get(f"/api/recipes/{recipe_id}", headers={"Accept-Encoding": "gzip"})
+        assert first.headers["content-encoding"] == "gzip"
+        entry = await recipe_cache.get(recipe_id)
+        assert orjson.loads(gzip.decompress(entry.encoded["gzip"])) == first.json()
+        
+        second = await client.get(f"/api/recipes/{recipe_id}", headers={"Accept-Encoding": "gzip"})
+        assert await recipe_cache.get(recipe_id) is entry and second.json() == first.json()
+        
+        await client.put(f"/api/recipes/{recipe_id}", json={"name": "Quick Dal"})
+        assert await recipe_cache.get(recipe_id) is None
+        updated = await client.get(f"/api/recipes/{recipe_id}", headers={"Accept-Encoding": "gzip"})
+        assert updated.json()["name"] == "Quick Dal"
+
+
+@pytest.mark.asyncio
+async def test_streamed_ndjson_is_compressed_incrementally():
+    """Streamed shopping lists decode to the same lines when gzipped."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        recipe_id = (await client.post("/api/recipes/", json=LONG_RECIPE)).json()["_id"]
+        request = {"recipe_ids": [recipe_id] * 3}
+        headers = {"Accept": "application/x-ndjson"}
+        
+        plain = await client.post("/api/recipes/shopping-list", json=request, headers={**headers, "Accept-Encoding": "identity"})
+        zipped = await client.post("/api/recipes/shopping-list", json=request, headers={**headers, "Accept-Encoding": "gzip"})
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.text.splitlines() == plain.text.splitlines()
@@ -0,0 +1,94 @@
+"""
+Unit tests for near-duplicate recipe detection.
+Run with: pytest tests/test_dedupe.py
+"""
+import pytest
+from httpx import AsyncClient
+
+from config import settings
+from main import app
+from minhash import fingerprint, lsh_bands, signature, similarity
+from services.dedupe_service import DedupeService
+from storage.memory_store import InMemoryRecipeStore
+
+PANEER = {
+    "name": "Paneer Butter Masala",
+    "ingredients": ["paneer", "tomato", "cream", "butter", "garam masala"],
+    "instructions": "Heat butter in a pan. Add tomatoes and cook until soft. Blend, add cream and paneer, simmer ten minutes."
+}
+PANEER_REWORDED = {
+    "name": "Butter Paneer",
+    "ingredients": ["Paneer", "tomato", "cream", "butter", "garam masala"],
+    "instructions": "Heat the butter in a pan. Add tomatoes and cook until soft. Blend, add cream and paneer, then simmer ten minutes."
+}
+PASTA = {
+    "name": "Pasta Aglio",
+    "ingredients": ["spaghetti", "garlic", "olive oil", "chilli flakes"],
+    "instructions": "Boil the spaghetti. Fry garlic in olive oil, toss with pasta and chilli flakes."
+}
+
+
+def test_signatures_estimate_similarity():
+    """Reworded recipes score high and share LSH bands; unrelated ones don't."""
+    paneer, reworded, pasta = signature(PANEER), signature(PANEER_REWORDED), signature(PASTA)
+    assert similarity(paneer, paneer) == 1.0
+    assert similarity(paneer, reworded) >= 0.7
+    assert similarity(paneer, pasta) < 0.2
+    assert set(lsh_bands(paneer)) & set(lsh_bands(reworded))
+    assert not set(lsh_bands(paneer)) & set(lsh_bands(pasta))
+    # Deterministic across calls (and processes)
+    assert fingerprint(PANEER) == fingerprint(dict(PANEER))
+
+
+@pytest.mark.asyncio
+async def test_store_lookup_report_and_backfill():
+    """Band lookups find near-duplicates; the report groups them; backfill fingerprints old recipes."""
+    store = InMemoryRecipeStore([
+        {"_id": "r1", **PANEER, **fingerprint(PANEER)},
+        {"_id": "r2", **PASTA, **fingerprint(PASTA)},
+        {"_id": "r3", **PANEER_REWORDED},
+    ])
+    service = DedupeService(store, threshold=0.7)
+    assert [duplicate["_id"] for duplicate in await service.find_duplicates(PANEER_REWORDED)] == ["r1"]
+    assert await service.find_duplicates(PANEER, exclude_id="r1") == []
+    assert (await service.report())["groups"] == []
+    
+    assert await service.backfill() == 1
+    assert await service.backfill() == 0
+    report = await service.report()
+    assert [sorted(recipe["_id"] for recipe in group["recipes"]) for group in report["groups"]] == [["r1", "r3"]]
+    
+    await store.delete("r1")
+    assert await service.find_duplicates(PANEER) == [{"_id": "r3", "name": "Butter Paneer", "similarity": pytest.approx(0.9, abs=0.1)}]
+
+
+@pytest.mark.asyncio
+async def test_create_rejects_or_merges_near_duplicates(monkeypatch):
+    """NEAR_DUPLICATE_MODE=reject answers 409; merge folds new tags into the existing recipe."""
+    recipe = {
+        "name": "Dedupe Dhokla", "cuisine": "Gujarati", "prep_time_minutes": 30, "difficulty": "medium",
+        "ingredients": ["gram flour", "yogurt", "eno", "mustard seeds", "curry leaves"],
+        "instructions": "Whisk gram flour with yogurt and water. Rest, add eno, steam twenty minutes, then temper.",
+        "tags": ["snack"]
+    }
+    reworded = {**recipe, "name": "Khaman Dhokla", "tags": ["snack", "steamed"],
+                "instructions": "Whisk the gram flour with yogurt and water. Rest, add eno, steam twenty minutes, then temper it."}
+    async with AsyncClient(app=app, base_url="http://test", headers={"X-Admin-Token": settings.admin_token}) as client:
+        created = (await client.post("/api/recipes/", json=recipe)).json()
+        
+        monkeypatch.setattr(settings, "near_duplicate_mode", "reject")
+        response = await client.post("/api/recipes/", json=reworded)
+        assert response.status_code == 409
+        assert response.json()["detail"]["duplicates"][0]["_id"] == created["_id"]
+        
+        monkeypatch.setattr(settings, "near_duplicate_mode", "merge")
+        response = await client.post("/api/recipes/", json=reworded)
+        assert response.status_code == 200
+        assert response.headers["X-Duplicate-Of"] == created["_id"]
+        assert response.json()["tags"] == ["snack", "steamed"]
+        assert (await client.get(f"/api/recipes/{created['_id']}")).json()["tags"] == ["snack", "steamed"]
+        
+        # Merging left one copy, so the report doesn't list it
+        report = (await client.get("/api/admin/dedupe")).json()
+        assert report["threshold"] == settings.near_duplicate_threshold
+        assert created["_id"] not in {recipe["_id"] for group in report["groups"] for recipe in group["recipes"]}
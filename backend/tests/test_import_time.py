@@ -0,0 +1,30 @@
+"""
+Cold-start import tests.
+Run with: pytest tests/test_import_time.py
+
+The wall-clock budget test only runs with CHECK_COLD_IMPORT_BUDGET=1 (on a
+quiet machine); set COLD_IMPORT_BUDGET_MS to override the budget.
+"""
+import os
+
+import pytest
+
+from benchmarks.import_profile import profile_imports, COLD_IMPORT_BUDGET_MS, DEFERRED_MODULES
+
+
+def test_main_import_defers_heavy_modules():
+    """Importing the app must not pull in the Gemini SDK, grpc, Motor or pymongo."""
+    profile = profile_imports("main")
+    loaded = [name for name in DEFERRED_MODULES if name in profile["modules"]]
+    assert loaded == []
+
+
+@pytest.mark.skipif(not os.getenv("CHECK_COLD_IMPORT_BUDGET"), reason="timing check; set CHECK_COLD_IMPORT_BUDGET=1")
+def test_main_cold_import_budget():
+    """Importing the app stays within the cold-start budget."""
+    budget_ms = float(os.getenv("COLD_IMPORT_BUDGET_MS", COLD_IMPORT_BUDGET_MS))
+    profile_imports("main")  # make sure bytecode is compiled
+    profile = profile_imports("main")
+    assert profile["total_ms"] <= budget_ms, (
+        f"import main took {profile['total_ms']:.0f} ms (budget {budget_ms:.0f} ms)"
+    )
@@ -0,0 +1,81 @@
+"""
+Unit tests for the logging pipeline.
+Run with: pytest tests/test_logging_config.py
+"""
+import io
+import json
+import logging
+import queue
+
+import pytest
+from httpx import AsyncClient
+
+from logging_config import NonBlockingQueueHandler, SamplingFilter, setup_logging, shutdown_logging
+from main import app
+from metrics import LOG_RECORDS_DROPPED
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    yield stream
+    setup_logging(use_queue=False)
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_request_logs_are_json_with_request_id(log_stream):
+    """Records written by the listener carry the request's id, which is echoed back."""
+    setup_logging(stream=log_stream)
+    
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        given = await client.post("/api/recipes/search", json={"cuisine": "Thai"}, headers={"X-Request-ID": "req-123"})
+        generated = await client.post("/api/recipes/search", json={"cuisine": "Thai"})
+    shutdown_logging()
+    
+    assert given.headers["x-request-id"] == "req-123"
+    assert len(generated.headers["x-request-id"]) == 32
+    searches = [line for line in _lines(log_stream) if line["message"].startswith("Search found")]
+    assert [line["request_id"] for line in searches] == ["req-123", generated.headers["x-request-id"]]
+    assert searches[0]["level"] == "INFO" and searches[0]["logger"] == "services.recipe_service"
+
+
+def test_exceptions_and_extras_are_kept(log_stream):
+    """Tracebacks are rendered before queueing; extra= fields become JSON keys."""
+    setup_logging(stream=log_stream)
+    logger = logging.getLogger("tests.logging")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed %s", "badly", extra={"recipe_id": "r1"})
+    shutdown_logging()
+    
+    [line] = _lines(log_stream)
+    assert line["message"] == "Failed badly" and line["recipe_id"] == "r1"
+    assert "ValueError: boom" in line["exc_info"]
+
+
+def test_sampling_applies_to_info_lines_of_named_loggers():
+    """Rates match the most specific logger prefix; warnings are never dropped."""
+    sampler = SamplingFilter({"services": 0.0, "services.ai_service": 1.0})
+    
+    def record(name, level):
+        return logging.LogRecord(name, level, __file__, 1, "msg", (), None)
+    
+    assert not sampler.filter(record("services.recipe_service", logging.INFO))
+    assert sampler.filter(record("services.recipe_service", logging.WARNING))
+    assert sampler.filter(record("services.ai_service", logging.INFO))
+    assert sampler.filter(record("database", logging.INFO))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """With no room left, records are dropped and counted in the exported metric."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    exported = LOG_RECORDS_DROPPED.labels().get()
+    for _ in range(3):
+        handler.handle(logging.LogRecord("x", logging.INFO, __file__, 1, "msg", (), None))
+    assert handler.queue.qsize() == 1 and handler.dropped == 2
+    assert LOG_RECORDS_DROPPED.labels().get() == exported + 2
@@ -0,0 +1,96 @@
+"""
+Unit tests for the meal plan optimizer.
+Run with: pytest tests/test_meal_plan.py
+"""
+import gc
+import time
+
+import pytest
+
+from benchmarks.synthetic import generate_recipes
+from models import MealPlanRequest
+from services.meal_plan_service import CANDIDATE_LIMIT, MealPlanOptimizer, MealPlanService
+from storage.memory_store import InMemoryRecipeStore
+
+
+def _candidate(name, cuisine, is_vegetarian, prep, difficulty, ingredients):
+    return {
+        "_id": name, "name": name, "cuisine": cuisine, "is_vegetarian": is_vegetarian,
+        "prep_time_minutes": prep, "difficulty": difficulty, "ingredients": ingredients,
+    }
+
+
+CANDIDATES = [
+    _candidate("dal", "Indian", True, 30, "easy", ["lentils", "onion", "tomato"]),
+    _candidate("aloo gobi", "Indian", True, 30, "easy", ["potato", "onion", "tomato"]),
+    _candidate("paneer tikka", "Indian", True, 40, "medium", ["paneer", "onion", "tomato"]),
+    _candidate("biryani", "Indian", False, 90, "hard", ["chicken", "rice", "onion"]),
+    _candidate("pasta", "Italian", True, 20, "easy", ["pasta", "garlic", "olive oil"]),
+    _candidate("fried rice", "Chinese", True, 25, "easy", ["rice", "onion", "tomato"]),
+    _candidate("tacos", "Mexican", False, 25, "medium", ["tortilla", "beef", "cheese"]),
+]
+
+
+def test_optimizer_meets_constraints_and_reuses_ingredients():
+    """The plan satisfies every constraint and prefers shared ingredients."""
+    request = MealPlanRequest(
+        recipe_count=3,
+        max_total_prep_minutes=100,
+        min_vegetarian_ratio=1.0,
+        max_per_cuisine=2,
+        difficulty_caps={"hard": 0},
+    )
+    optimizer = MealPlanOptimizer(CANDIDATES, request)
+    plan, timed_out = optimizer.optimize(time.perf_counter() + 1)
+    summary = optimizer.score_plan(plan)
+    
+    assert not timed_out
+    assert summary["feasible"]
+    assert summary["total_prep_minutes"] <= 100
+    assert summary["vegetarian_count"] == 3
+    assert max(summary["cuisines"].values()) <= 2
+    # Two Indian dishes plus fried rice share onion and tomato
+    assert summary["distinct_ingredients"] == 5
+
+
+def test_optimizer_reports_infeasible_constraints():
+    """An impossible budget still returns a best-effort plan marked infeasible."""
+    request = MealPlanRequest(recipe_count=3, max_total_prep_minutes=30)
+    optimizer = MealPlanOptimizer(CANDIDATES, request)
+    plan, _ = optimizer.optimize(time.perf_counter() + 1)
+    
+    assert len(plan) == 3
+    assert not optimizer.score_plan(plan)["feasible"]
+
+
+def test_short_catalog_is_infeasible():
+    """Fewer candidates than requested recipes, or none at all, can't make a feasible plan."""
+    request = MealPlanRequest(recipe_count=10)
+    optimizer = MealPlanOptimizer(CANDIDATES, request)
+    plan, _ = optimizer.optimize(time.perf_counter() + 1)
+    assert len(plan) == len(CANDIDATES)
+    assert not optimizer.score_plan(plan)["feasible"]
+    
+    # A prep budget below one minute per slot leaves no candidates
+    optimizer = MealPlanOptimizer([], MealPlanRequest(recipe_count=3, max_total_prep_minutes=2))
+    plan, timed_out = optimizer.optimize(time.perf_counter() + 1)
+    assert plan == [] and not timed_out
+    assert optimizer.score_plan(plan)["feasible"] is False
+
+
+@pytest.mark.asyncio
+async def test_generate_plan_keeps_to_the_time_budget():
+    """Encoding and search over a full candidate set stop at the budget with a full-size plan."""
+    service = MealPlanService(InMemoryRecipeStore(generate_recipes(5000)))
+    # A full collection over the test session's heap can take longer than the budget itself
+    gc.collect()
+    gc.disable()
+    try:
+        result = await service.generate_plan(MealPlanRequest(recipe_count=14, time_budget_ms=30))
+    finally:
+        gc.enable()
+    
+    assert result["candidates_considered"] == CANDIDATE_LIMIT
+    assert result["timed_out"]
+    assert len(result["recipes"]) == 14
+    assert result["elapsed_ms"] < 30 + 15
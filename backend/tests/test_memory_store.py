@@ -0,0 +1,135 @@
+"""
+Unit tests for the in-memory recipe store.
+Run with: pytest tests/test_memory_store.py
+"""
+import pytest
+from httpx import AsyncClient
+
+from config import settings
+from database import MemoryStore
+from main import app
+from models import RecipeSearchFilters
+from storage.base import ReadOnlyStoreError
+from storage.memory_store import InMemoryRecipeStore
+
+
+def _recipe(recipe_id, name, cuisine, is_vegetarian, prep, difficulty, ingredients, tags):
+    return {
+        "_id": recipe_id, "name": name, "cuisine": cuisine, "is_vegetarian": is_vegetarian,
+        "prep_time_minutes": prep, "difficulty": difficulty, "ingredients": ingredients, "tags": tags,
+    }
+
+
+RECIPES = [
+    _recipe("r1", "Dal Tadka", "Indian", True, 30, "easy", ["lentils", "onion", "tomato"], ["comfort"]),
+    _recipe("r2", "Butter Chicken", "Indian", False, 50, "medium", ["chicken", "butter", "tomato"], ["spicy"]),
+    _recipe("r3", "Pasta Aglio", "Italian", True, 15, "easy", ["pasta", "garlic"], ["quick"]),
+    _recipe("r4", "Tacos", "Mexican", False, 25, "medium", ["tortilla", "beef"], ["quick", "spicy"]),
+    _recipe("r5", "Indo-Chinese Noodles", "Indo-Chinese", True, 20, "easy", ["noodles", "garlic"], ["quick"]),
+]
+
+
+def _ids(recipes):
+    return [recipe["_id"] for recipe in recipes]
+
+
+@pytest.mark.asyncio
+async def test_search_applies_all_filters_in_insertion_order():
+    """Filters combine like the MongoDB query and results keep insertion order."""
+    store = InMemoryRecipeStore(RECIPES)
+    
+    assert _ids(await store.search(RecipeSearchFilters(cuisine="indi"))) == ["r1", "r2"]
+    assert _ids(await store.search(RecipeSearchFilters(cuisine="chin"))) == ["r5"]
+    assert _ids(await store.search(RecipeSearchFilters(is_vegetarian=True, max_prep_time=20))) == ["r3", "r5"]
+    assert _ids(await store.search(RecipeSearchFilters(difficulty="Medium"))) == ["r2", "r4"]
+    assert _ids(await store.search(RecipeSearchFilters(tags=["Spicy", "comfort"]))) == ["r1", "r2", "r4"]
+    assert _ids(await store.search(RecipeSearchFilters(ingredients=["tomato", "onion"]))) == ["r1"]
+    assert _ids(await store.search(RecipeSearchFilters(search_query="GARLIC"))) == ["r3", "r5"]
+    assert _ids(await store.search(RecipeSearchFilters(search_query="taco", tags=["quick"]))) == ["r4"]
+    assert _ids(await store.search(RecipeSearchFilters(tags=["quick"]), limit=2)) == ["r3", "r4"]
+
+
+@pytest.mark.asyncio
+async def test_writes_keep_indexes_and_facets_consistent():
+    """Updates and deletes move recipes between index buckets and facet counts."""
+    store = InMemoryRecipeStore(RECIPES)
+    
+    previous, updated = await store.update("r3", {"cuisine": "Indian", "prep_time_minutes": 45})
+    assert previous["cuisine"] == "Italian" and updated["cuisine"] == "Indian"
+    assert _ids(await store.search(RecipeSearchFilters(cuisine="indian"))) == ["r1", "r2", "r3"]
+    assert _ids(await store.list()) == ["r1", "r2", "r3", "r4", "r5"]
+    
+    assert (await store.delete("r1"))["_id"] == "r1"
+    assert await store.delete("r1") is None
+    assert await store.update("missing", {"name": "x"}) is None
+    
+    facets = await store.facets()
+    assert facets["total"] == 4
+    assert facets["cuisine"] == {"Indian": 2, "Indo-Chinese": 1, "Mexican": 1}
+    assert facets["prep_time"] == {"16-30": 2, "31-60": 2}
+    assert _ids(await store.search(RecipeSearchFilters(max_prep_time=30))) == ["r4", "r5"]
+    
+    created = await store.insert({**RECIPES[0], "_id": None})
+    assert created["_id"] != "r1" and await store.count() == 5
+
+
+@pytest.mark.asyncio
+async def test_pagination_projection_and_plan_candidates():
+    """list() pages in insertion order; get_many and plan candidates project fields."""
+    store = InMemoryRecipeStore(RECIPES)
+    
+    assert _ids(await store.list(skip=1, limit=2)) == ["r2", "r3"]
+    assert _ids(await store.list(skip=4, limit=10)) == ["r5"]
+    
+    found = await store.get_many(["r2", "nope", "r2"], fields=["name"])
+    assert found == [{"_id": "r2", "name": "Butter Chicken"}, None, {"_id": "r2", "name": "Butter Chicken"}]
+    
+    candidates = await store.find_plan_candidates(30, ["easy"], True, ["prep_time_minutes"], limit=10)
+    assert candidates == [
+        {"_id": "r3", "prep_time_minutes": 15},
+        {"_id": "r5", "prep_time_minutes": 20},
+        {"_id": "r1", "prep_time_minutes": 30},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_load_sorts_prep_time_index_once():
+    """A bulk load with a repeated ID keeps the last copy; later inserts stay in prep-time order."""
+    store = InMemoryRecipeStore(RECIPES + [{**RECIPES[0], "prep_time_minutes": 10}])
+    await store.insert(_recipe("r6", "Poha", "Indian", True, 18, "easy", ["poha", "onion"], ["breakfast"]))
+    
+    candidates = await store.find_plan_candidates(None, None, None, ["prep_time_minutes"], limit=10)
+    assert [(candidate["_id"], candidate["prep_time_minutes"]) for candidate in candidates] == [
+        ("r1", 10), ("r3", 15), ("r6", 18), ("r5", 20), ("r4", 25), ("r2", 50)
+    ]
+    assert _ids(await store.list(limit=10)) == ["r2", "r3", "r4", "r5", "r1", "r6"]
+
+
+@pytest.mark.asyncio
+async def test_admin_rebuild_repairs_facet_counts(monkeypatch):
+    """POST /api/admin/facets/rebuild recounts facets from the stored recipes."""
+    store = InMemoryRecipeStore(RECIPES)
+    monkeypatch.setattr(MemoryStore, "store", store)
+    store._facet_counts["cuisine"]["Indian"] += 3
+    
+    async with AsyncClient(app=app, base_url="http://test", headers={"X-Admin-Token": settings.admin_token}) as client:
+        response = await client.post("/api/admin/facets/rebuild")
+    assert response.status_code == 200
+    assert response.json()["cuisine"]["Indian"] == 2
+    assert (await store.facets())["cuisine"]["Indian"] == 2
+
+
+@pytest.mark.asyncio
+async def test_read_only_snapshot_round_trip(tmp_path):
+    """A saved snapshot loads as a read-only store with the same recipes."""
+    path = str(tmp_path / "recipes.json")
+    InMemoryRecipeStore(RECIPES).save_snapshot(path)
+    
+    store = InMemoryRecipeStore.from_snapshot(path)
+    assert _ids(await store.list()) == _ids(RECIPES)
+    assert (await store.facets()) == (await InMemoryRecipeStore(RECIPES).facets())
+    
+    with pytest.raises(ReadOnlyStoreError):
+        await store.insert(RECIPES[0])
+    with pytest.raises(ReadOnlyStoreError):
+        await store.delete("r1")
@@ -0,0 +1,76 @@
+"""
+Unit tests for Prometheus metrics.
+Run with: pytest tests/test_metrics.py
+"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from metrics import Counter, Histogram, MONGODB_COMMAND_DURATION, render
+from mongo_monitoring import CommandMetricsListener
+
+
+def test_render_counter_and_histogram_text_format():
+    """Counters and cumulative histogram buckets render in the text format."""
+    registry = []
+    requests = Counter("test_requests_total", "Requests.", ["route"], registry=registry)
+    latency = Histogram("test_latency_seconds", "Latency.", buckets=[0.1, 1], registry=registry)
+    
+    requests.labels("/a").inc()
+    requests.labels("/a").inc(2)
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.labels().observe(value)
+    
+    lines = render(registry).decode().splitlines()
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{route="/a"} 3' in lines
+    assert 'test_latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'test_latency_seconds_bucket{le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_latency_seconds_count 4" in lines
+    assert "test_latency_seconds_sum 3.65" in lines
+
+
+def test_counter_updates_from_many_threads_are_not_lost():
+    """Per-thread cells keep concurrent increments exact without a lock."""
+    counter = Counter("test_threads_total", "Threads.", registry=[]).labels()
+    
+    def work():
+        for _ in range(10000):
+            counter.inc()
+    
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.get() == 80000
+
+
+def test_command_listener_labels_by_collection():
+    """MongoDB command durations are recorded under the collection from the started event."""
+    listener = CommandMetricsListener()
+    started = SimpleNamespace(command_name="find", command={"find": "recipes"}, connection_id=("h", 1), request_id=7)
+    finished = SimpleNamespace(command_name="find", connection_id=("h", 1), request_id=7, duration_micros=2500)
+    
+    listener.started(started)
+    listener.succeeded(finished)
+    
+    count, total = MONGODB_COMMAND_DURATION.labels("recipes", "find", "success").get()
+    assert count[-1] >= 1 and total >= 0.0025
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_labels_requests_by_route_template():
+    """Requests are labelled with the route template, not the concrete path."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/api/recipes/does-not-exist")
+        response = await client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/api/recipes/{recipe_id}",status="404"}' in response.text
+    assert "does-not-exist" not in response.text
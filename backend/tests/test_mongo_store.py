@@ -0,0 +1,141 @@
+"""
+Unit tests for the MongoDB recipe store.
+Run with: pytest tests/test_mongo_store.py
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from services.dedupe_service import DedupeService
+from services.popularity import PopularityCounters, REBASE_TIMEOUT_S
+from storage.mongo_store import MongoRecipeStore
+
+
+@pytest.mark.asyncio
+async def test_get_many_matches_ids_case_insensitively():
+    """ObjectId strings in either case find their recipe; custom IDs match exactly."""
+    store = MongoRecipeStore(mongomock_motor.AsyncMongoMockClient()["mongo_store_test"])
+    created = await store.insert({"name": "Dal"})
+    await store.collection.insert_one({"_id": "custom-id", "name": "Tacos"})
+    
+    recipes = await store.get_many([created["_id"].upper(), "custom-id", created["_id"], "missing-id"], ["name"])
+    assert [recipe and recipe["name"] for recipe in recipes] == ["Dal", "Tacos", "Dal", None]
+    assert recipes[0]["_id"] == created["_id"]
+
+
+@pytest.mark.asyncio
+async def test_backfill_pages_across_objectid_and_string_ids(monkeypatch):
+    """Backfill pages through ObjectIds then custom IDs, fingerprinting each recipe once."""
+    monkeypatch.setattr("services.dedupe_service.BACKFILL_BATCH_SIZE", 2)
+    store = MongoRecipeStore(mongomock_motor.AsyncMongoMockClient()["mongo_store_backfill_test"])
+    recipe = {"ingredients": ["rice", "dal"], "instructions": "Simmer together."}
+    for index in range(3):
+        await store.collection.insert_one({"name": f"Khichdi {index}", **recipe})
+    for custom_id in ("custom-a", "custom-b"):
+        await store.collection.insert_one({"_id": custom_id, "name": custom_id, **recipe})
+    
+    service = DedupeService(store)
+    assert await service.backfill() == 5
+    assert await store.collection.count_documents({"minhash": {"$exists": False}}) == 0
+    assert await service.backfill() == 0
+
+
+@pytest.mark.asyncio
+async def test_facet_bootstrap_counts_writes_made_while_aggregating():
+    """A recipe added during the bootstrap aggregation is counted once; rebuild repairs drift."""
+    store = MongoRecipeStore(mongomock_motor.AsyncMongoMockClient()["mongo_store_facets_test"])
+    await store.collection.insert_one({"name": "Dal", "cuisine": "Indian"})
+    aggregate = store._aggregate_facets
+    
+    async def aggregate_with_concurrent_write(query):
+        facets = await aggregate(query)
+        if facets["total"] == 1:
+            await store.insert({"name": "Tacos", "cuisine": "Mexican"})
+        return facets
+    
+    store._aggregate_facets = aggregate_with_concurrent_write
+    assert await store.count() == 2
+    store._aggregate_facets = aggregate
+    assert (await store.facets())["cuisine"] == {"Indian": 1, "Mexican": 1}
+    
+    await store.stats_collection.update_one({"_id": "recipe_facets"}, {"$inc": {"total": 5}})
+    assert (await store.rebuild_facet_counts())["total"] == 2
+    assert await store.count() == 2
+
+
+def _emulate_mul(store, monkeypatch):
+    """mongomock has no $mul; apply it to update_many document by document."""
+    collection = store.collection
+    update_many = collection.update_many
+    
+    async def update_many_with_mul(query, update, **kwargs):
+        factors = update.get("$mul")
+        if not factors:
+            return await update_many(query, update, **kwargs)
+        changes = update.get("$set", {})
+        async for document in collection.find(query):
+            scaled = {field: document.get(field, 0) * factor for field, factor in factors.items()}
+            await collection.update_one({"_id": document["_id"]}, {"$set": {**changes, **scaled}})
+    
+    monkeypatch.setattr(collection, "update_many", update_many_with_mul)
+
+
+@pytest.mark.asyncio
+async def test_flush_racing_a_trending_rebase_keeps_scores_on_one_scale(monkeypatch):
+    """A flush on the old epoch can't add to rescaled scores; flushes wait out a rebase in progress."""
+    store = MongoRecipeStore(mongomock_motor.AsyncMongoMockClient()["mongo_store_trending_test"])
+    _emulate_mul(store, monkeypatch)
+    recipe_ids = [(await store.insert({"name": name}))["_id"] for name in ("Dal", "Tacos")]
+    counters = PopularityCounters(flush_interval_s=60, half_life_s=3600)
+    counters.record_view(store, recipe_ids[0])
+    await counters.flush()
+    state = await store.trending_state()
+    
+    # Another instance moves the epoch and rescales after this flush read the old epoch
+    add_popularity = store.add_popularity
+    
+    async def add_after_rebase(increments, epoch):
+        await store.rebase_trending(state, state["epoch"] + timedelta(hours=64), 2.0 ** -64)
+        await add_popularity(increments, epoch)
+    
+    monkeypatch.setattr(store, "add_popularity", add_after_rebase)
+    counters.record_view(store, recipe_ids[0])
+    counters.record_view(store, recipe_ids[1])
+    await counters.flush()
+    monkeypatch.setattr(store, "add_popularity", add_popularity)
+    for recipe_id in recipe_ids:
+        assert (await store.get(recipe_id)).get("trending_score", 0) < 1e-15
+    
+    # While a rebase is in progress the counts are held, then written once it finishes
+    state = await store.trending_state()
+    await store.stats_collection.update_one({"_id": "trending"}, {"$set": {"rebasing_since": datetime.utcnow()}})
+    counters.record_view(store, recipe_ids[1])
+    assert await counters.flush() == 0
+    assert counters.snapshot()["pending_recipes"] == 1
+    
+    await store.stats_collection.update_one({"_id": "trending"}, {"$set": {"rebasing_since": None}})
+    assert await counters.flush() == 1
+    assert (await store.get(recipe_ids[1]))["views"] == 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_trending_rebase_is_finished_by_a_flush(monkeypatch):
+    """A rebase that stopped part way is resumed without rescaling recipes it already reached."""
+    store = MongoRecipeStore(mongomock_motor.AsyncMongoMockClient()["mongo_store_rebase_test"])
+    _emulate_mul(store, monkeypatch)
+    epoch = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    await store.stats_collection.insert_one({
+        "_id": "trending", "epoch": epoch, "factor": 0.5,
+        "rebasing_since": epoch - timedelta(seconds=REBASE_TIMEOUT_S + 1)
+    })
+    await store.collection.insert_one({"_id": "done", "trending_score": 4.0, "trending_epoch": epoch})
+    await store.collection.insert_one({"_id": "left", "trending_score": 4.0})
+    
+    counters = PopularityCounters(flush_interval_s=60, half_life_s=3600)
+    counters.record_view(store, "left")
+    assert await counters.flush() == 1
+    assert (await store.get("done"))["trending_score"] == 4.0
+    assert (await store.get("left"))["trending_score"] == pytest.approx(2.0 + 2.0, rel=1e-3)
+    assert (await store.trending_state())["rebasing_since"] is None
@@ -0,0 +1,105 @@
+"""
+Unit tests for buffered popularity counters and the trending sort.
+Run with: pytest tests/test_popularity.py
+"""
+from datetime import timedelta
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from main import app
+from services.popularity import PopularityCounters, REBASE_AFTER_HALF_LIVES, popularity
+from storage.memory_store import InMemoryRecipeStore
+
+
+def _store():
+    return InMemoryRecipeStore([{"_id": f"r{n}", "name": f"Recipe {n}"} for n in range(1, 5)])
+
+
+def _ids(recipes):
+    return [recipe["_id"] for recipe in recipes]
+
+
+@pytest.mark.asyncio
+async def test_hits_are_coalesced_into_one_flush():
+    """Hits are summed in memory and written together when the interval ends."""
+    store = _store()
+    counters = PopularityCounters(flush_interval_s=0.05)
+    for _ in range(2):
+        counters.record_view(store, "r2")
+    counters.record_simplification(store, "r3")
+    counters.record_view(store, "missing")
+    assert (await store.get("r2")).get("views") is None
+    
+    await asyncio.sleep(0.1)
+    assert counters.flushes_total == 1
+    assert (await store.get("r2"))["views"] == 2
+    assert (await store.get("r3"))["simplifications"] == 1
+    # A simplification outweighs two views
+    assert _ids(await store.list(limit=3, sort="trending")) == ["r3", "r2", "r1"]
+    assert _ids(await store.list(skip=2, sort="trending")) == ["r1", "r4"]
+
+
+@pytest.mark.asyncio
+async def test_pending_limit_and_disabled_counters():
+    """New recipes past max_pending are dropped; a zero interval or read-only store counts nothing."""
+    store = _store()
+    counters = PopularityCounters(flush_interval_s=60, max_pending=1)
+    counters.record_view(store, "r1")
+    counters.record_view(store, "r2")
+    counters.record_view(store, "r1")
+    assert counters.snapshot()["pending_recipes"] == 1 and counters.dropped_total == 1
+    assert await counters.flush() == 1
+    assert (await store.get("r1"))["views"] == 2
+    
+    disabled = PopularityCounters(flush_interval_s=0)
+    disabled.record_view(store, "r1")
+    read_only = InMemoryRecipeStore([{"_id": "r1"}], read_only=True)
+    counters.record_view(read_only, "r1")
+    assert disabled.snapshot()["pending_recipes"] == 0 and counters.snapshot()["pending_recipes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_newer_hits_count_more_and_epoch_rebases():
+    """A hit one half-life later is worth double; an old epoch is moved and scores scaled once."""
+    store = _store()
+    counters = PopularityCounters(flush_interval_s=60, half_life_s=3600)
+    counters.record_view(store, "r1")
+    await counters.flush()
+    epoch = (await store.trending_state())["epoch"]
+    assert (await store.get("r1"))["trending_score"] == pytest.approx(1.0, rel=1e-3)
+    
+    # Pretend the epoch was set one half-life ago
+    store._trending_epoch = epoch - timedelta(hours=1)
+    counters.record_view(store, "r2")
+    await counters.flush()
+    assert (await store.get("r2"))["trending_score"] == pytest.approx(2.0, rel=1e-3)
+    
+    store._trending_epoch = epoch - timedelta(hours=REBASE_AFTER_HALF_LIVES + 1)
+    counters.record_view(store, "r3")
+    await counters.flush()
+    assert (await store.trending_state())["epoch"] >= epoch
+    assert (await store.get("r3"))["trending_score"] == pytest.approx(1.0, rel=1e-3)
+    assert (await store.get("r2"))["trending_score"] < 1e-15
+    # Another instance's stale epoch no longer matches
+    stale = {"epoch": epoch - timedelta(hours=1), "factor": 1.0, "rebasing_since": None}
+    assert not await store.rebase_trending(stale, epoch, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_trending_sort_through_the_api():
+    """Views through GET /api/recipes/{id} are flushed and rank ?sort=trending."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        created = (await client.post("/api/recipes/", json={
+            "name": "Trending Toast", "cuisine": "Test", "prep_time_minutes": 5, "ingredients": ["bread"],
+            "difficulty": "easy", "instructions": "Toast the bread."
+        })).json()
+        for _ in range(50):
+            assert (await client.get(f"/api/recipes/{created['_id']}")).status_code == 200
+        await popularity.flush()
+        
+        response = await client.get("/api/recipes/?sort=trending&limit=1")
+        assert response.status_code == 200
+        assert _ids(response.json()) == [created["_id"]]
+        assert (await client.get("/api/recipes/?sort=newest")).status_code == 422
@@ -0,0 +1,85 @@
+"""
+Unit tests for per-request profiling.
+Run with: pytest tests/test_profiling.py
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from config import settings
+from main import app
+from profiling import ProfileStore, ProfilingMiddleware, profile_store, speedscope_to_collapsed
+
+
+def _busy_app() -> FastAPI:
+    busy = FastAPI()
+    
+    def crunch(seconds):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+    
+    @busy.get("/work/{item_id}")
+    async def work(item_id: str):
+        crunch(0.05)
+        await asyncio.sleep(0.05)
+        return {"item_id": item_id}
+    
+    return busy
+
+
+@pytest.mark.asyncio
+async def test_only_token_requests_are_profiled(tmp_path):
+    """Requests with the token get a saved profile; others pass straight through."""
+    store = ProfileStore(str(tmp_path), max_profiles=10)
+    profiled_app = ProfilingMiddleware(_busy_app(), store, token="secret", interval_s=0.001)
+    
+    async with AsyncClient(app=profiled_app, base_url="http://test") as client:
+        plain = await client.get("/work/1")
+        wrong = await client.get("/work/1", headers={"X-Profile-Token": "nope"})
+        profiled = await client.get("/work/2", headers={"X-Profile-Token": "secret"})
+    
+    assert "x-profile-id" not in plain.headers and "x-profile-id" not in wrong.headers
+    assert profiled.json() == {"item_id": "2"}
+    
+    [meta] = store.list()
+    assert meta["id"] == profiled.headers["x-profile-id"]
+    assert meta["route"] == "/work/{item_id}" and meta["status"] == 200
+    assert meta["duration_ms"] >= 100 and meta["samples"] > 0
+    
+    _, profile = store.load(meta["id"])
+    collapsed = speedscope_to_collapsed(profile, root="GET /work/{item_id}")
+    weights = {}
+    for line in collapsed.splitlines():
+        stack, weight = line.rsplit(" ", 1)
+        weights[stack.split(";")[-1]] = weights.get(stack.split(";")[-1], 0) + int(weight)
+        assert stack.startswith("GET /work/{item_id};")
+    # Busy time lands in crunch, the sleep in (awaiting); weights are in microseconds
+    assert weights.get("_busy_app.<locals>.crunch", 0) > 20000
+    assert weights.get("(awaiting)", 0) > 20000
+
+
+@pytest.mark.asyncio
+async def test_admin_lists_and_downloads_profiles(tmp_path, monkeypatch):
+    """Saved profiles are listed newest first and downloadable in both formats."""
+    monkeypatch.setattr(profile_store, "directory", str(tmp_path))
+    profiled_app = ProfilingMiddleware(_busy_app(), profile_store, sample_rate=1.0)
+    
+    async with AsyncClient(app=profiled_app, base_url="http://test") as client:
+        first = (await client.get("/work/1")).headers["x-profile-id"]
+        second = (await client.get("/work/2")).headers["x-profile-id"]
+    
+    async with AsyncClient(app=app, base_url="http://test", headers={"X-Admin-Token": settings.admin_token}) as client:
+        listed = (await client.get("/api/admin/profiles")).json()["profiles"]
+        assert [meta["id"] for meta in listed] == [second, first]
+        
+        speedscope = await client.get(f"/api/admin/profiles/{first}")
+        assert speedscope.json()["profiles"][0]["type"] == "sampled"
+        collapsed = await client.get(f"/api/admin/profiles/{first}", params={"format": "collapsed"})
+        assert collapsed.text.startswith("GET /work/{item_id};")
+        
+        assert (await client.get("/api/admin/profiles/missing")).status_code == 404
+        assert (await client.get("/api/admin/profiles/..")).status_code == 404
@@ -0,0 +1,82 @@
+"""
+Unit tests for AI prompt templates and token accounting.
+Run with: pytest tests/test_prompts.py
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from config import settings
+from metrics import AI_CALL_TOKENS, AI_PROMPT_TRUNCATIONS, AI_TOKENS
+from services.ai_service import AIService, GENERATION_CONFIGS, ai_cache
+from services.prompts import PROMPT_TEMPLATES, TRUNCATION_NOTE, _load_templates, estimate_tokens, fit_to_budget, render_prompt
+
+
+def test_fit_to_budget_cuts_at_a_sentence():
+    """Short text passes through squeezed; long text is cut at a sentence boundary and marked."""
+    assert fit_to_budget("Boil  water.\n\n\nAdd rice.", 100) == ("Boil water.\nAdd rice.", False)
+    
+    text = " ".join(f"Step {i}: stir the pot and wait." for i in range(200))
+    cut, truncated = fit_to_budget(text, 100)
+    assert truncated
+    assert estimate_tokens(cut) <= 100
+    assert cut.endswith("wait." + TRUNCATION_NOTE)
+    assert fit_to_budget(text, 0) == (text, False)
+
+
+def test_compact_templates_are_shorter():
+    """Compact prompts carry the same fields in fewer tokens than the original wording."""
+    fields = {"suggest": {"ingredients": "tomato, onion"}, "simplify": {"recipe_name": "Dal", "instructions": "Boil dal."}}
+    for feature, values in fields.items():
+        verbose = PROMPT_TEMPLATES["verbose"][feature].format(**values)
+        compact = PROMPT_TEMPLATES["compact"][feature].format(**values)
+        assert estimate_tokens(compact) < estimate_tokens(verbose) * 0.6
+        assert all(value in compact for value in values.values())
+    assert "tomato, onion" in render_prompt("suggest", ingredients="tomato, onion")
+
+
+def test_template_overrides_apply_only_when_all_are_valid(monkeypatch, tmp_path):
+    """One bad override keeps every feature on the built-in templates."""
+    monkeypatch.setattr(settings, "ai_prompt_style", "compact")
+    path = tmp_path / "prompts.json"
+    monkeypatch.setattr(settings, "ai_prompt_templates_path", str(path))
+    path.write_text(json.dumps({"suggest": "Cook with {ingredients}", "simplify": "Shorten {missing_field}"}))
+    assert _load_templates() == PROMPT_TEMPLATES["compact"]
+    
+    path.write_text(json.dumps({"suggest": "Cook with {ingredients}"}))
+    assert _load_templates()["suggest"] == "Cook with {ingredients}"
+
+
+@pytest.mark.asyncio
+async def test_model_calls_record_tokens_and_limits(monkeypatch):
+    """Calls pass the feature's generation config, count reported tokens and cut long instructions."""
+    ai_cache.clear()
+    calls = []
+    
+    class FakeModel:
+        def generate_content(self, prompt, generation_config=None):
+            calls.append((prompt, generation_config))
+            return SimpleNamespace(text="Step 1: relax.", usage_metadata=SimpleNamespace(prompt_token_count=120, candidates_token_count=30))
+    
+    monkeypatch.setattr(settings, "gemini_api_key", "test-key")
+    monkeypatch.setattr(AIService, "_model", FakeModel())
+    monkeypatch.setattr(AIService, "_model_failed", False)
+    service = AIService()
+    monkeypatch.setattr(settings, "ai_simplify_instruction_budget", 50)
+    prompt_tokens = AI_TOKENS.labels("simplify", "prompt").get()
+    output_tokens = AI_TOKENS.labels("simplify", "output").get()
+    truncations = AI_PROMPT_TRUNCATIONS.labels("simplify").get()
+    calls_observed = AI_CALL_TOKENS.labels("simplify", "output").get()[0][-1]
+    
+    instructions = " ".join(f"Step {i}: stir the pot." for i in range(100))
+    assert await service.simplify_recipe("Prompt Test Curry", instructions) == "Step 1: relax."
+    prompt, generation_config = calls[0]
+    assert generation_config == GENERATION_CONFIGS["simplify"]
+    assert generation_config["max_output_tokens"] == settings.ai_simplify_max_output_tokens
+    assert TRUNCATION_NOTE in prompt and "Step 99" not in prompt
+    assert AI_TOKENS.labels("simplify", "prompt").get() == prompt_tokens + 120
+    assert AI_TOKENS.labels("simplify", "output").get() == output_tokens + 30
+    assert AI_PROMPT_TRUNCATIONS.labels("simplify").get() == truncations + 1
+    assert AI_CALL_TOKENS.labels("simplify", "output").get()[0][-1] == calls_observed + 1
+    ai_cache.clear()
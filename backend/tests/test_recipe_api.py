@@ -27,6 +27,7 @@ async def test_health_endpoint():
         data = response.json()
         assert "status" in data
         assert "database" in data
+        assert data["streaming"] is True
 
 
 @pytest.mark.asyncio
@@ -77,6 +78,21 @@ async def test_search_recipes():
         assert isinstance(data, list)
 
 
+@pytest.mark.asyncio
+async def test_get_recipe_facets():
+    """Test faceted recipe counts, with and without filters."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/recipes/facets")
+        assert response.status_code == 200
+        data = response.json()
+        for facet in ["total", "cuisine", "difficulty", "is_vegetarian", "tags", "prep_time"]:
+            assert facet in data
+        
+        response = await client.get("/api/recipes/facets", params={"is_vegetarian": "true"})
+        assert response.status_code == 200
+        assert response.json()["total"] <= data["total"]
+
+
 @pytest.mark.asyncio
 async def test_invalid_recipe_creation():
     """Test that invalid recipe data is rejected."""
@@ -99,6 +115,17 @@ async def test_get_nonexistent_recipe():
         assert response.status_code == 404
 
 
+@pytest.mark.asyncio
+async def test_batch_get_recipes():
+    """Test fetching several recipes by ID, including misses."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/recipes/batch-get", json={"ids": ["nonexistent_id"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["recipes"] == [None]
+        assert data["missing"] == ["nonexistent_id"]
+
+
 @pytest.mark.asyncio
 async def test_ai_health_check():
     """Test AI service health check."""
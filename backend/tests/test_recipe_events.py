@@ -0,0 +1,98 @@
+"""
+Unit tests for live recipe change events (GET /api/recipes/stream).
+Run with: pytest tests/test_recipe_events.py
+"""
+import pytest
+import orjson
+from httpx import AsyncClient
+
+from change_feed import ChangeEvent, RESET
+from config import settings
+from main import app
+from services.recipe_events import RecipeEventBroadcaster, TooManyClientsError, recipe_events
+
+
+def _events(chunk: bytes):
+    """(id, event, data) for each SSE frame in a chunk."""
+    events = []
+    for frame in chunk.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["id"], fields["event"], orjson.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_writes_are_streamed_to_clients():
+    """Recipe writes through the API reach connected clients as compact events."""
+    queue = recipe_events.connect()
+    stream = recipe_events.stream(queue)
+    assert (await stream.__anext__()).startswith(b"retry:")
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/api/recipes/", json={
+                "name": "Stream Soup", "cuisine": "Test", "prep_time_minutes": 10, "ingredients": ["water"],
+                "difficulty": "easy", "instructions": "Boil the water."
+            })
+            recipe_id = response.json()["_id"]
+            await client.put(f"/api/recipes/{recipe_id}", json={"name": "Stream Stew"})
+            await client.delete(f"/api/recipes/{recipe_id}")
+        
+        # Queued events arrive together in one chunk
+        events = _events(await stream.__anext__())
+        assert [(event, data["id"]) for _, event, data in events] == [
+            ("create", recipe_id), ("update", recipe_id), ("delete", recipe_id)
+        ]
+        assert events[1][2]["recipe"]["name"] == "Stream Stew"
+        assert "recipe" not in events[2][2]
+    finally:
+        await stream.aclose()
+    assert recipe_events.snapshot()["clients"] == 0
+
+
+def test_slow_clients_resync_and_reconnects_replay():
+    """A client that falls behind gets one resync; a reconnect replays what it missed."""
+    broadcaster = RecipeEventBroadcaster(queue_size=2, max_clients=2)
+    slow = broadcaster.connect()
+    broadcaster.publish("delete", "r1")
+    last_seen = _events(slow.get_nowait())[0][0]
+    
+    for recipe_id in ("r2", "r3", "r4"):
+        broadcaster.publish("delete", recipe_id)
+    assert slow.qsize() == 1 and _events(slow.get_nowait())[0][1] == "resync"
+    
+    # Missed r3 and r4 after r2: replayed; missed three after r1: more than the queue holds
+    stream, _, seq = last_seen.rpartition("-")
+    reconnected = broadcaster.connect(f"{stream}-{int(seq) + 1}")
+    assert [_events(reconnected.get_nowait())[0][2]["id"] for _ in range(2)] == ["r3", "r4"]
+    with pytest.raises(TooManyClientsError):
+        broadcaster.connect(last_seen)
+    
+    broadcaster.disconnect(slow)
+    assert _events(broadcaster.connect(last_seen).get_nowait())[0][1] == "resync"
+    broadcaster.disconnect(reconnected)
+    assert _events(broadcaster.connect("other-instance-7").get_nowait())[0][1] == "resync"
+
+
+def test_change_feed_echoes_are_skipped():
+    """Writes from other instances are streamed; this process's own echoes are not."""
+    broadcaster = RecipeEventBroadcaster()
+    client = broadcaster.connect()
+    broadcaster._pending_echoes[("update", "r1")] = 1
+    
+    broadcaster.publish_change(ChangeEvent("update", "r1"))
+    broadcaster.publish_change(ChangeEvent("update", "r1", {"_id": "r1", "name": "Dal"}))
+    broadcaster.publish_change(ChangeEvent(RESET, None))
+    
+    events = [_events(client.get_nowait())[0] for _ in range(client.qsize())]
+    assert [(event, data.get("id")) for _, event, data in events] == [("update", "r1"), ("resync", None)]
+    assert events[0][2]["recipe"]["name"] == "Dal"
+
+
+@pytest.mark.asyncio
+async def test_stream_can_be_disabled(monkeypatch):
+    """With RECIPE_STREAM_ENABLED off, health says so and the stream isn't served."""
+    monkeypatch.setattr(settings, "recipe_stream_enabled", False)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.get("/api/health")).json()["streaming"] is False
+        assert (await client.get("/api/recipes/stream")).status_code == 404
@@ -0,0 +1,63 @@
+"""
+Unit tests for compact recipe records.
+Run with: pytest tests/test_recipe_records.py
+"""
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from responses import encode_recipe
+from storage.records import RecipeRecord
+
+
+def _recipe(**overrides):
+    recipe = {
+        "_id": "r1",
+        "name": "Dal Tadka",
+        "cuisine": "Indian",
+        "is_vegetarian": True,
+        "prep_time_minutes": 30,
+        "ingredients": ["lentils", "onion", "tomato"],
+        "difficulty": "easy",
+        "instructions": "Boil the lentils, then temper with cumin — serve hot.",
+        "tags": ["comfort", "dinner"],
+        "created_at": datetime(2025, 12, 19, 10, 0, 0, 123000),
+        "updated_at": datetime(2025, 12, 19, 10, 0, 0),
+    }
+    recipe.update(overrides)
+    return recipe
+
+
+def test_round_trips_documents():
+    """to_dict() returns the original document, including values kept in extras."""
+    regular = _recipe()
+    irregular = _recipe(
+        _id=ObjectId(), difficulty="expert", tags=None, prep_time_minutes=12.5,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc), notes={"serves": 2}
+    )
+    del irregular["cuisine"]
+    
+    for recipe in (regular, irregular):
+        record = RecipeRecord.from_dict(recipe)
+        assert record.to_dict() == recipe
+        assert record.to_dict(["difficulty", "cuisine", "notes"]) == {
+            field: recipe[field] for field in ("_id", "difficulty", "cuisine", "notes") if field in recipe
+        }
+    
+    record = RecipeRecord.from_dict(irregular)
+    assert record.get("cuisine") is None and record.get("cuisine", "none") == "none"
+    assert record.get("notes") == {"serves": 2}
+
+
+def test_shares_symbols_and_reads_fields_in_place():
+    """Repeated symbols are one object across records; get() avoids building the document."""
+    first = RecipeRecord.from_dict(_recipe(cuisine="".join(["Ind", "ian"])))
+    second = RecipeRecord.from_dict(_recipe(_id="r2", cuisine="".join(["Indi", "an"])))
+    
+    assert first.get("cuisine") is second.get("cuisine")
+    assert first.get("tags") == ("comfort", "dinner")
+    assert first.get("difficulty") == "easy"
+    assert first.get("updated_at") == datetime(2025, 12, 19, 10, 0, 0)
+    
+    # Records encode straight to the RecipeResponse shape
+    assert encode_recipe(first) == encode_recipe(_recipe())
@@ -0,0 +1,57 @@
+"""
+Unit tests for near-neighbour AI answer caching.
+Run with: pytest tests/test_semantic_cache.py
+"""
+import pytest
+from httpx import AsyncClient
+
+from config import settings
+from main import app
+from semantic_cache import SemanticCache, jaccard
+from services.ai_service import AIService, ai_cache, suggestion_cache
+from shared_cache import LocalCache
+
+
+@pytest.mark.asyncio
+async def test_similar_sets_share_answers():
+    """Sets at or above the threshold reuse the closest answer; others miss."""
+    cache = SemanticCache("test_semantic", LocalCache("test_semantic_answers", 10, 60), max_entries=2, threshold=0.7)
+    await cache.put("k1", {"onion", "paneer", "tomato"}, b"paneer masala")
+    await cache.put("k2", {"pasta", "garlic", "olive oil"}, b"aglio olio")
+    
+    assert await cache.get("k1", {"onion", "paneer", "tomato"}) == (b"paneer masala", 1.0)
+    assert await cache.get("k3", {"onion", "paneer", "tomato", "salt"}) == (b"paneer masala", 0.75)
+    assert await cache.get("k4", {"onion", "paneer", "spinach"}) is None
+    assert jaccard(frozenset({"onion", "paneer", "spinach"}), frozenset({"onion", "paneer", "tomato"})) == 0.5
+    
+    # Least recently used sets are evicted from the index
+    await cache.put("k5", {"rice", "dal"}, b"khichdi")
+    assert await cache.get("k6", {"pasta", "garlic", "olive oil", "chilli"}) is None
+    assert len(cache) == 2
+    assert cache.snapshot()["lookups"] == {"exact": 1, "similar": 1, "miss": 2}
+
+
+@pytest.mark.asyncio
+async def test_suggestions_are_reused_for_similar_ingredients(monkeypatch):
+    """One model call answers reordered, pluralized and slightly extended ingredient lists."""
+    ai_cache.clear()
+    suggestion_cache.clear()
+    calls = []
+    
+    async def query_model(self, prompt, feature):
+        calls.append(prompt)
+        return f"Suggestion {len(calls)}"
+    
+    monkeypatch.setattr(AIService, "_query_model", query_model)
+    service = AIService()
+    
+    assert await service.suggest_recipe(["tomato", "onion", "paneer"]) == "Suggestion 1"
+    assert await service.suggest_recipe(["Paneer", "onions", "tomatoes", "salt"]) == "Suggestion 1"
+    assert await service.suggest_recipe(["paneer", "spinach"]) == "Suggestion 2"
+    assert len(calls) == 2
+    
+    async with AsyncClient(app=app, base_url="http://test", headers={"X-Admin-Token": settings.admin_token}) as client:
+        stats = (await client.get("/api/admin/ai-cache")).json()
+    assert stats["lookups"]["similar"] >= 1 and stats["entries"] == 2
+    ai_cache.clear()
+    suggestion_cache.clear()
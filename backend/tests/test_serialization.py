@@ -0,0 +1,49 @@
+"""
+Unit tests for the fast recipe JSON serialization path.
+Run with: pytest tests/test_serialization.py
+"""
+import json
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from models import RecipeResponse
+from responses import encode_recipes, encode_recipe
+
+
+def _sample_recipe(**overrides):
+    recipe = {
+        "_id": str(ObjectId()),
+        "name": "Paneer Butter Masala",
+        "cuisine": "Indian",
+        "is_vegetarian": True,
+        "prep_time_minutes": 40,
+        "ingredients": ["paneer", "tomato", "cream"],
+        "difficulty": "medium",
+        "instructions": "Step 1: Heat butter... Step 2: Add tomatoes...",
+        "tags": ["dinner", "party"],
+        "created_at": datetime(2025, 12, 19, 10, 0, 0, 123000),
+        "updated_at": datetime(2025, 12, 19, 10, 0, 0),
+    }
+    recipe.update(overrides)
+    return recipe
+
+
+def test_fast_path_matches_response_model():
+    """orjson output must match what response_model validation would produce."""
+    recipes = [_sample_recipe(), _sample_recipe(name="Aloo Gobi", is_vegetarian=False)]
+    expected = jsonable_encoder(TypeAdapter(List[RecipeResponse]).validate_python(recipes), by_alias=True)
+    assert json.loads(encode_recipes(recipes)) == expected
+
+
+def test_fast_path_drops_internal_fields_and_fills_defaults():
+    """Extra stored fields are not leaked and missing optional fields get defaults."""
+    recipe = _sample_recipe(_id=ObjectId(), internal_counter=5)
+    del recipe["tags"]
+    data = json.loads(encode_recipe(recipe))
+    assert "internal_counter" not in data
+    assert data["tags"] == []
+    assert data["_id"] == str(recipe["_id"])
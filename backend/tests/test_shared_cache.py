@@ -0,0 +1,124 @@
+"""
+Unit tests for the shared (cross-worker) cache tier.
+Run with: pytest tests/test_shared_cache.py
+"""
+import asyncio
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from response_cache import ResponseCache
+from services.ai_service import AIService, ai_cache
+from shared_cache import SQLiteCache, LocalCache, EVICT_EVERY_PUTS
+
+
+def test_entries_are_shared_between_processes(tmp_path):
+    """Values put by one process are read by another; invalidation is host-wide."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache("recipes", path, max_entries=100, ttl_s=60)
+    other_namespace = SQLiteCache("ai", path, max_entries=100, ttl_s=60)
+    
+    subprocess.run([
+        sys.executable, "-c",
+        f"from shared_cache import SQLiteCache; SQLiteCache('recipes', {path!r}, 100, 60).put('r1', b'from worker 2')"
+    ], check=True)
+    assert cache.get("r1") == b"from worker 2"
+    assert other_namespace.get("r1") is None
+    
+    other_worker = SQLiteCache("recipes", path, max_entries=100, ttl_s=60)
+    other_worker.put("r2", b"body")
+    assert cache.get("r2") == b"body"
+    cache.invalidate("r2")
+    assert other_worker.get("r2") is None
+    other_namespace.put("r1", b"kept")
+    other_worker.clear()
+    assert cache.get("r1") is None and other_namespace.get("r1") == b"kept"
+
+
+def test_expiry_and_size_bound(tmp_path):
+    """Entries expire after the TTL and the oldest are evicted beyond max_entries."""
+    path = str(tmp_path / "cache.sqlite3")
+    short = SQLiteCache("short", path, max_entries=100, ttl_s=0.05)
+    short.put("k", b"v")
+    assert short.get("k") == b"v"
+    time.sleep(0.1)
+    assert short.get("k") is None
+    
+    bounded = SQLiteCache("bounded", path, max_entries=5, ttl_s=60)
+    for i in range(EVICT_EVERY_PUTS):
+        bounded.put(f"k{i}", b"v")
+    assert len(bounded) == 5
+    assert bounded.get(f"k{EVICT_EVERY_PUTS - 1}") == b"v" and bounded.get("k0") is None
+    
+    local = LocalCache("local", max_entries=2, ttl_s=60)
+    for key in ("a", "b", "c"):
+        local.put(key, b"v")
+    assert local.get("a") is None and local.get("c") == b"v" and len(local) == 2
+
+
+@pytest.mark.asyncio
+async def test_lock_waits_run_off_the_event_loop(tmp_path):
+    """While another worker holds the write lock, put_async waits in a thread and then skips the write."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache("recipes", path, max_entries=100, ttl_s=60)
+    assert cache.get("k") is None  # creates the schema
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    
+    ticks = []
+    
+    async def tick():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.005)
+    
+    ticker = asyncio.get_running_loop().create_task(tick())
+    await cache.put_async("k", b"v")
+    ticker.cancel()
+    writer.rollback()
+    writer.close()
+    
+    # The loop kept running through the BUSY_TIMEOUT_S wait
+    assert len(ticks) >= 3
+    assert await cache.get_async("k") is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_reads_through_shared_tier(tmp_path):
+    """A body cached by one worker's ResponseCache is served by another's."""
+    path = str(tmp_path / "cache.sqlite3")
+    worker_1 = ResponseCache("test_response", 10, 60, shared=SQLiteCache("test_response_shared", path, 10, 60))
+    worker_2 = ResponseCache("test_response", 10, 60, shared=SQLiteCache("test_response_shared", path, 10, 60))
+    
+    await worker_1.put("r1", b'{"_id": "r1"}')
+    assert (await worker_2.get("r1")).body == b'{"_id": "r1"}'
+    worker_1.invalidate("r1")
+    assert await worker_1.get("r1") is None
+    assert worker_2.shared.get("r1") is None
+
+
+@pytest.mark.asyncio
+async def test_ai_answers_are_cached(monkeypatch):
+    """Model answers are reused for the same request; fallbacks are not cached."""
+    ai_cache.clear()
+    calls = []
+    
+    async def query_model(self, prompt, feature):
+        calls.append(prompt)
+        return "Tomato rice" if len(calls) == 1 else None
+    
+    monkeypatch.setattr(AIService, "_query_model", query_model)
+    service = AIService()
+    
+    assert await service.suggest_recipe(["Tomato", "rice"]) == "Tomato rice"
+    assert await service.suggest_recipe(["rice", " tomato"]) == "Tomato rice"
+    assert len(calls) == 1
+    
+    fallback = await service.simplify_recipe("Dal", "Boil lentils until soft.")
+    assert fallback and len(calls) == 2
+    await service.simplify_recipe("Dal", "Boil lentils until soft.")
+    assert len(calls) == 3
+    ai_cache.clear()
@@ -0,0 +1,32 @@
+"""
+Unit tests for shopping list ingredient merging.
+Run with: pytest tests/test_shopping_list.py
+"""
+from services.shopping_list_service import ShoppingListService, parse_ingredient
+
+
+def test_parse_ingredient_canonicalizes_names_and_quantities():
+    """Quantities and units are split off and plurals reduced."""
+    assert parse_ingredient("2 Cups Rice") == ("rice", 2.0, "cup")
+    assert parse_ingredient("Tomatoes") == ("tomato", None, "")
+    assert parse_ingredient("1/2 tsp of salt") == ("salt", 0.5, "tsp")
+    assert parse_ingredient("3 onions") == ("onion", 3.0, "")
+
+
+def test_merge_ingredients_counts_recipes_and_scales_amounts():
+    """Ingredients are merged across recipes and amounts scaled by servings."""
+    recipes = [
+        {"name": "Pulao", "ingredients": ["1 cup rice", "onion", "onions"]},
+        {"name": "Fried Rice", "ingredients": ["2 cups rice", "soy sauce"]},
+    ]
+    items = ShoppingListService.merge_ingredients(recipes, servings_multiplier=2)
+    by_name = {item["name"]: item for item in items}
+    
+    assert items[0]["name"] == "rice"
+    assert by_name["rice"]["recipe_count"] == 2
+    assert by_name["rice"]["amounts"] == {"cup": 6.0}
+    assert by_name["onion"]["recipe_count"] == 1
+    assert by_name["onion"]["recipes"] == ["Pulao"]
+    
+    groups = ShoppingListService.group_by_recipe_count(items)
+    assert [group["recipe_count"] for group in groups] == [2, 1]
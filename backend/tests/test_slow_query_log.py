@@ -0,0 +1,101 @@
+"""
+Unit tests for the recipe search slow-query log.
+Run with: pytest tests/test_slow_query_log.py
+"""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from config import settings
+from main import app
+from models import RecipeSearchFilters
+from services.recipe_service import RecipeService
+from services.slow_query_log import SlowQueryLog, filter_shape, slow_query_log
+from storage.memory_store import InMemoryRecipeStore
+
+RECIPES = [
+    {"_id": "r1", "name": "Dal Tadka", "cuisine": "Indian", "is_vegetarian": True, "prep_time_minutes": 30,
+     "difficulty": "easy", "ingredients": ["lentils", "onion"], "tags": ["comfort"]},
+    {"_id": "r2", "name": "Butter Chicken", "cuisine": "Indian", "is_vegetarian": False, "prep_time_minutes": 50,
+     "difficulty": "medium", "ingredients": ["chicken", "butter"], "tags": ["spicy"]},
+    {"_id": "r3", "name": "Pasta Aglio", "cuisine": "Italian", "is_vegetarian": True, "prep_time_minutes": 15,
+     "difficulty": "easy", "ingredients": ["pasta", "garlic"], "tags": ["quick"]},
+]
+
+
+def test_filter_shape_ignores_values():
+    """Shapes name the filter fields in use, in model order, without values."""
+    assert filter_shape(RecipeSearchFilters()) == "(none)"
+    assert filter_shape(RecipeSearchFilters(max_prep_time=20, cuisine="x")) == "cuisine,max_prep_time"
+    assert filter_shape(RecipeSearchFilters(is_vegetarian=False, tags=[])) == "is_vegetarian"
+
+
+@pytest.mark.asyncio
+async def test_slow_searches_capture_plan_once_per_interval():
+    """Every search is aggregated; slow ones are explained, rate-limited per shape."""
+    log = SlowQueryLog(threshold_ms=5, capacity=2, explain_interval_s=60)
+    store = InMemoryRecipeStore(RECIPES)
+    
+    log.record(store, RecipeSearchFilters(cuisine="indian"), 1.0, 2, 100)
+    log.record(store, RecipeSearchFilters(cuisine="indian", is_vegetarian=True), 10.0, 1, 100)
+    log.record(store, RecipeSearchFilters(cuisine="italian", is_vegetarian=True), 30.0, 1, 100)
+    log.record(store, RecipeSearchFilters(search_query="pasta"), 8.0, 1, 100)
+    await asyncio.gather(*log._tasks)
+    
+    snapshot = log.snapshot()
+    shapes = {shape["shape"]: shape for shape in snapshot["shapes"]}
+    assert [shape["shape"] for shape in snapshot["shapes"]] == ["cuisine,is_vegetarian", "search_query", "cuisine"]
+    assert shapes["cuisine,is_vegetarian"]["count"] == 2
+    assert shapes["cuisine,is_vegetarian"]["slow_count"] == 2
+    assert shapes["cuisine,is_vegetarian"]["explained"] == 1
+    assert shapes["cuisine"]["slow_count"] == 0
+    
+    # Ring buffer keeps the newest entries, newest first
+    assert [entry["shape"] for entry in snapshot["recent"]] == ["search_query", "cuisine,is_vegetarian"]
+    indexed, scanned = snapshot["recent"][1], snapshot["recent"][0]
+    assert indexed["plan"] == "INDEX_INTERSECTION(cuisine, is_vegetarian)"
+    assert indexed["docs_examined"] == 1 and indexed["returned"] == 1
+    assert indexed["filters"] == {"cuisine": "indian", "is_vegetarian": True}
+    assert scanned["plan"] == "COLLECTION_SCAN" and scanned["docs_examined"] == 3
+    
+    log.reset()
+    assert log.snapshot()["shapes"] == [] and log.snapshot()["recent"] == []
+    
+    # A reset while an explain is in flight doesn't fail it
+    log.record(store, RecipeSearchFilters(difficulty="easy"), 20.0, 2, 100)
+    log.reset()
+    await asyncio.gather(*log._tasks)
+    assert log.snapshot()["shapes"] == []
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoint_reports_service_searches(monkeypatch):
+    """RecipeService searches show up at GET /api/admin/slow-queries."""
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    slow_query_log.reset()
+    
+    await RecipeService(InMemoryRecipeStore(RECIPES)).search_recipes(RecipeSearchFilters(difficulty="easy"))
+    await asyncio.gather(*slow_query_log._tasks)
+    
+    async with AsyncClient(app=app, base_url="http://test", headers={"X-Admin-Token": settings.admin_token}) as client:
+        response = await client.get("/api/admin/slow-queries")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["shapes"][0]["shape"] == "difficulty"
+        assert data["recent"][0]["plan"] == "INDEX_INTERSECTION(difficulty)"
+        
+        assert (await client.delete("/api/admin/slow-queries")).status_code == 204
+        assert (await client.get("/api/admin/slow-queries")).json()["shapes"] == []
+
+
+@pytest.mark.asyncio
+async def test_admin_routes_require_a_configured_token(monkeypatch):
+    """Admin routes reject wrong tokens, and every request when no token is configured."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.get("/api/admin/slow-queries")).status_code == 403
+        assert (await client.get("/api/admin/slow-queries", headers={"X-Admin-Token": "wrong"})).status_code == 403
+        
+        monkeypatch.setattr(settings, "admin_token", None)
+        assert (await client.delete("/api/admin/slow-queries", headers={"X-Admin-Token": ""})).status_code == 403
+        assert (await client.post("/api/admin/dedupe/backfill")).status_code == 403
@@ -82,7 +82,14 @@ const RecipeForm = ({ recipe, onClose, onSubmit, isEdit = false }: RecipeFormPro
       onClose();
     } catch (error: any) {
       console.error('Error submitting recipe:', error);
-      alert(error.response?.data?.detail || 'Failed to save recipe. Please try again.');
+      const detail = error.response?.data?.detail;
+      if (error.response?.status === 409 && detail?.duplicates?.length) {
+        // Near-duplicate of existing recipes (NEAR_DUPLICATE_MODE=reject)
+        const names = detail.duplicates.map((duplicate: { name: string }) => duplicate.name).join(', ');
+        alert(`This recipe is very similar to: ${names}`);
+      } else {
+        alert(detail || 'Failed to save recipe. Please try again.');
+      }
     } finally {
       setLoading(false);
     }
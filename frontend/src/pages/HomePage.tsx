@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Loader2, Plus, Sparkles } from 'lucide-react';
 import RecipeCard from '../components/RecipeCard';
 import RecipeModal from '../components/RecipeModal';
@@ -6,7 +6,7 @@ import RecipeForm from '../components/RecipeForm';
 import SearchBar from '../components/SearchBar';
 import AIChatWidget from '../components/AIChatWidget';
 import { recipeAPI } from '../services/api';
-import { type Recipe, type RecipeCreate, type SearchFilters } from '../types';
+import { type Recipe, type RecipeChangeEvent, type RecipeCreate, type SearchFilters } from '../types';
 
 interface HomePageProps {
   showAddForm: boolean;
@@ -19,9 +19,13 @@ const HomePage = ({ showAddForm, setShowAddForm }: HomePageProps) => {
   const [selectedRecipe, setSelectedRecipe] = useState<Recipe | null>(null);
   const [editingRecipe, setEditingRecipe] = useState<Recipe | null>(null);
   const [isChatOpen, setIsChatOpen] = useState(false);
+  // Filters of the search being shown, or null for all recipes
+  const activeFilters = useRef<SearchFilters | null>(null);
 
   useEffect(() => {
     loadRecipes();
+    // Patch the list with changes made in other tabs or by other users
+    return recipeAPI.subscribeToChanges(handleRecipeChange);
   }, []);
 
   const loadRecipes = async () => {
@@ -37,10 +41,41 @@ const HomePage = ({ showAddForm, setShowAddForm }: HomePageProps) => {
     }
   };
 
+  const handleRecipeChange = async (change: RecipeChangeEvent) => {
+    if (change.op === 'delete') {
+      setRecipes(current => current.filter(r => r._id !== change.id));
+      return;
+    }
+    if (change.op === 'resync' || activeFilters.current) {
+      // Missed too many changes, or search results are shown and only the
+      // server knows whether the changed recipe matches: refetch what's shown
+      try {
+        const filters = activeFilters.current;
+        setRecipes(filters ? await recipeAPI.searchRecipes(filters) : await recipeAPI.getAllRecipes());
+      } catch (error) {
+        console.error('Error refreshing recipes:', error);
+      }
+      return;
+    }
+    try {
+      // Changes made through another server may only carry the ID
+      const recipe = change.recipe ?? await recipeAPI.getRecipe(change.id!);
+      setRecipes(current => {
+        if (current.some(r => r._id === recipe._id)) {
+          return current.map(r => r._id === recipe._id ? recipe : r);
+        }
+        return change.op === 'create' ? [recipe, ...current] : current;
+      });
+    } catch (error) {
+      console.error('Error applying recipe change:', error);
+    }
+  };
+
   const handleSearch = async (filters: SearchFilters) => {
     try {
       setLoading(true);
       const data = await recipeAPI.searchRecipes(filters);
+      activeFilters.current = Object.values(filters).some(value => value !== undefined) ? filters : null;
       setRecipes(data);
     } catch (error) {
       console.error('Error searching recipes:', error);
@@ -53,7 +88,8 @@ const HomePage = ({ showAddForm, setShowAddForm }: HomePageProps) => {
   const handleCreateRecipe = async (recipeData: RecipeCreate) => {
     try {
       const newRecipe = await recipeAPI.createRecipe(recipeData);
-      setRecipes([newRecipe, ...recipes]);
+      // The stream may have added it already
+      setRecipes(current => [newRecipe, ...current.filter(r => r._id !== newRecipe._id)]);
       setShowAddForm(false);
       alert('Recipe created successfully! 🎉');
     } catch (error: any) {
@@ -67,7 +103,7 @@ const HomePage = ({ showAddForm, setShowAddForm }: HomePageProps) => {
     
     try {
       const updatedRecipe = await recipeAPI.updateRecipe(editingRecipe._id, recipeData);
-      setRecipes(recipes.map(r => r._id === updatedRecipe._id ? updatedRecipe : r));
+      setRecipes(current => current.map(r => r._id === updatedRecipe._id ? updatedRecipe : r));
       setEditingRecipe(null);
       setSelectedRecipe(null);
       alert('Recipe updated successfully! ✓');
@@ -80,7 +116,7 @@ const HomePage = ({ showAddForm, setShowAddForm }: HomePageProps) => {
   const handleDeleteRecipe = async (recipeId: string) => {
     try {
       await recipeAPI.deleteRecipe(recipeId);
-      setRecipes(recipes.filter(r => r._id !== recipeId));
+      setRecipes(current => current.filter(r => r._id !== recipeId));
       setSelectedRecipe(null);
       alert('Recipe deleted successfully');
     } catch (error) {
@@ -1,6 +1,6 @@
 // API service for making HTTP requests to backend
 import axios from 'axios';
-import { API_BASE_URL, type Recipe, type RecipeCreate, type SearchFilters, type AIResponse } from '../types';
+import { API_BASE_URL, type Recipe, type RecipeCreate, type SearchFilters, type AIResponse, type RecipeChangeEvent } from '../types';
 
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -50,6 +50,27 @@ export const recipeAPI = {
     const response = await api.get('/api/recipes/count');
     return response.data.count;
   },
+
+  // Subscribe to live recipe changes (Server-Sent Events) if the backend serves them
+  // (serverless deployments don't); returns a function that unsubscribes
+  subscribeToChanges: (onChange: (change: RecipeChangeEvent) => void): (() => void) => {
+    let source: EventSource | null = null;
+    let closed = false;
+    api.get('/api/health')
+      .then(response => {
+        if (closed || !response.data.streaming) return;
+        source = new EventSource(`${API_BASE_URL}/api/recipes/stream`);
+        const handleMessage = (message: MessageEvent) => onChange(JSON.parse(message.data));
+        for (const op of ['create', 'update', 'delete', 'resync']) {
+          source.addEventListener(op, handleMessage);
+        }
+      })
+      .catch(error => console.error('Error checking for live updates:', error));
+    return () => {
+      closed = true;
+      source?.close();
+    };
+  },
 };
 
 export const aiAPI = {
@@ -36,6 +36,13 @@ export interface SearchFilters {
   search_query?: string;
 }
 
+// Live change pushed by GET /api/recipes/stream
+export interface RecipeChangeEvent {
+  op: 'create' | 'update' | 'delete' | 'resync';
+  id?: string;
+  recipe?: Recipe;
+}
+
 export interface AIResponse {
   success: boolean;
   data?: string;